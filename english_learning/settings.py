@@ -52,18 +52,64 @@ MEDIA_URL = '/media/'
 # 定义媒体文件的根目录
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 打包音频存储：开启后新下载的发音追加写入单个 pack 文件，而不是每个单词一个 mp3
+AUDIO_PACK_ENABLED = False
+AUDIO_PACK_FILE = MEDIA_ROOT / 'audio.pack'
+
+# 音频交给前端代理发送：None（由 Django 直接发送）、'X-Accel-Redirect'（nginx）或 'X-Sendfile'（Apache/lighttpd）
+AUDIO_SENDFILE_HEADER = None
+# X-Accel-Redirect 使用的 nginx internal location 前缀，需指向 MEDIA_ROOT
+AUDIO_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # 放在靠前的位置，会话、认证中间件产生的查询也计入统计
+    "learning.middleware.RequestMetricsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "learning.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# 请求指标：按视图统计 SQL 次数和耗时，/metrics/ 输出 Prometheus 格式
+REQUEST_METRICS_ENABLED = True
+# 每个视图的预算（queries: SQL 次数，latency_ms: 总耗时），超出时记录警告日志；未配置的视图使用 default
+# 查询次数按 load_test 实测（20 用户 × 2000 单词，含会话和用户查询）留少量余量：
+# word_card 平时 4–7 次，当天首次访问生成任务时最多 54 次；handle_feedback 10–13 次；get_audio_url 2–4 次；
+# /async/ 下的异步视图与同步版本相同
+REQUEST_METRICS_BUDGETS = {
+    'default': {'queries': 50, 'latency_ms': 1000},
+    'word_card': {'queries': 60, 'latency_ms': 300},
+    'handle_feedback': {'queries': 16, 'latency_ms': 300},
+    'get_audio_url': {'queries': 5, 'latency_ms': 200},
+    'word_card_async': {'queries': 60, 'latency_ms': 300},
+    'handle_feedback_async': {'queries': 16, 'latency_ms': 300},
+    'get_audio_url_async': {'queries': 5, 'latency_ms': 200},
+}
+# Prometheus 抓取使用的 Bearer token，未配置时只允许管理员访问 /metrics/
+METRICS_TOKEN = None
+
+# 请求采样分析（默认关闭）：携带 X-Profile: <PROFILER_TOKEN> 请求头、管理员请求带 ?__profile=1，
+# 或按 PROFILER_SAMPLE_RATE 比例随机抽样的请求会被分析，结果在 /profiles/ 查看
+PROFILER_TOKEN = None
+PROFILER_SAMPLE_RATE = 0.0
+PROFILER_INTERVAL = 0.005  # 采样间隔（秒）
+PROFILER_DIR = BASE_DIR / 'profiles'
+PROFILER_MAX_FILES = 200  # 只保留最近的分析结果
+
+# 学习队列：回答“忘记”的单词在再学多少张卡片之后重现
+STUDY_RELEARN_STEPS = 3
+
+# 复习负载均衡（可选）：下次复习日期在间隔 ±REVIEW_LOAD_FUZZ 的窗口内选到期单词最少的一天；
+# 关闭时沿用 ±10% 的随机波动
+REVIEW_LOAD_BALANCING = False
+REVIEW_LOAD_FUZZ = 0.1
+
 ROOT_URLCONF = "english_learning.urls"
 
 TEMPLATES = [
@@ -3,7 +3,7 @@ from django.contrib import admin
 # Register your models here.
 # 导入Django的admin模块，用于管理网站后台
 from django.contrib import admin
-from .models import UserWord, DailyTask, TaskWord
+from .models import UserWord, DailyTask, TaskWord, AudioCleanupTask
 # 从当前应用的models.py文件中导入Word模型
 from .models import Word
 
@@ -39,3 +39,10 @@ class TaskWordAdmin(admin.ModelAdmin):
     list_display = ('task', 'word', 'status')
     # 过滤器，按状态筛选
     list_filter = ('status',)
+
+
+# 音频清理队列管理
+@admin.register(AudioCleanupTask)
+class AudioCleanupTaskAdmin(admin.ModelAdmin):
+    # 在列表中显示的字段
+    list_display = ('file_path', 'attempts', 'last_error', 'created_at')
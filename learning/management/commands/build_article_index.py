@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from learning.models import Article
+from learning.utils.article_index import build_article_index
+
+
+class Command(BaseCommand):
+    help = '为文章建立词汇倒排索引（添加单词后重新执行可让新单词参与标注）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('article_ids', nargs='*', type=int, help='只重建指定文章，默认全部')
+
+    def handle(self, *args, **options):
+        articles = Article.objects.order_by('id')
+        if options['article_ids']:
+            articles = articles.filter(id__in=options['article_ids'])
+
+        count = 0
+        for article in articles.iterator(chunk_size=100):
+            index = build_article_index(article)
+            count += 1
+            self.stdout.write(f"{article.title}: {len(index)} 个词汇")
+        self.stdout.write(self.style.SUCCESS(f"已重建 {count} 篇文章的词汇索引"))
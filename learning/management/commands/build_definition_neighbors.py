@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.utils.definition_neighbors import DEFAULT_TOP_K, update_definition_neighbors
+
+
+class Command(BaseCommand):
+    help = '按释义的字符 n-gram TF-IDF 相似度计算近邻单词，用于释义选择题的干扰项（默认只更新释义有变化的单词）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='重新计算所有单词')
+        parser.add_argument('--top', type=int, default=DEFAULT_TOP_K, help='每个单词保存的近邻数量')
+
+    def handle(self, *args, **options):
+        try:
+            count = update_definition_neighbors(full=options['full'], top_k=options['top'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"已更新 {count} 个单词的释义近邻"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from learning.models import Word, WordForm
+from learning.utils.word_forms import FORM_BATCH_SIZE, build_form_rows, bump_forms_version
+
+
+class Command(BaseCommand):
+    help = '离线生成词形索引（原形 + 规则 / 不规则屈折形式 → 单词）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=FORM_BATCH_SIZE, help='每批处理的单词数量')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total_words = total_forms = 0
+
+        with transaction.atomic():
+            WordForm.objects.all().delete()
+            last_id = 0
+            while True:
+                words = list(
+                    Word.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'word')[:batch_size]
+                )
+                if not words:
+                    break
+                last_id = words[-1][0]
+                rows = build_form_rows(words)
+                WordForm.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+                total_words += len(words)
+                total_forms += len(rows)
+            transaction.on_commit(bump_forms_version)
+
+        self.stdout.write(self.style.SUCCESS(f"已为 {total_words} 个单词生成 {total_forms} 个词形"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from learning.utils.word_frequency import CountMinSketch, assign_frequency_ranks, count_corpus, \
+    iter_article_texts, iter_corpus_files
+
+
+class Command(BaseCommand):
+    help = '统计文章和语料文件中的词频，为单词写入 frequency_rank（新单词按词频从高到低引入）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', nargs='*', help='额外的语料文本文件')
+        parser.add_argument('--no-articles', action='store_true', help='不统计 Article 正文')
+        parser.add_argument('--width', type=int, default=1 << 18, help='Count-Min Sketch 宽度')
+        parser.add_argument('--depth', type=int, default=4, help='Count-Min Sketch 深度')
+        parser.add_argument('--min-count', type=int, default=1, help='参与排名的最低出现次数')
+        parser.add_argument('--encoding', default='utf-8', help='语料文件编码')
+
+    def handle(self, *args, **options):
+        sketch = CountMinSketch(width=options['width'], depth=options['depth'])
+        total_tokens = 0
+
+        if not options['no_articles']:
+            _, tokens = count_corpus(iter_article_texts(), sketch)
+            total_tokens += tokens
+            self.stdout.write(f"文章词元: {tokens}")
+        if options['corpus']:
+            _, tokens = count_corpus(iter_corpus_files(options['corpus'], options['encoding']), sketch)
+            total_tokens += tokens
+            self.stdout.write(f"语料文件词元: {tokens}")
+
+        ranked = assign_frequency_ranks(sketch, min_count=options['min_count'])
+        self.stdout.write(self.style.SUCCESS(
+            f"共 {total_tokens} 个词元，其中 {sketch.total} 个对应词库单词，{ranked} 个单词获得排名"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from learning.models import AudioCleanupTask
+from learning.utils.audio_cleanup import MAX_CLEANUP_ATTEMPTS, process_cleanup_queue
+
+
+class Command(BaseCommand):
+    help = '处理音频文件清理队列（可重复执行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='重置多次失败任务的尝试次数后重新处理',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            reset = AudioCleanupTask.objects.filter(
+                attempts__gte=MAX_CLEANUP_ATTEMPTS
+            ).update(attempts=0)
+            self.stdout.write(f"重置失败任务: {reset}")
+
+        removed, failed = process_cleanup_queue()
+        pending = AudioCleanupTask.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f"已删除文件: {removed}，失败: {failed}，剩余任务: {pending}"
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from learning.utils.synthetic_data import DEFAULT_PREFIX, clear_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = '按固定随机种子批量生成合成用户、单词、学习记录和当日任务，用于性能测试'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='用户数量')
+        parser.add_argument('--words', type=int, default=1000, help='单词数量')
+        parser.add_argument('--seed', type=int, default=0, help='随机种子')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='用户名和单词的前缀')
+        parser.add_argument('--clear', action='store_true', help='删除该前缀生成的数据后退出')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            users, words = clear_dataset(options['prefix'])
+            self.stdout.write(self.style.SUCCESS(f"已删除 {users} 个用户和 {words} 个单词"))
+            return
+
+        counts = generate_dataset(
+            users=options['users'], words=options['words'], seed=options['seed'], prefix=options['prefix'],
+        )
+        summary = '，'.join(f"{name} {count}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"已生成合成数据：{summary}"))
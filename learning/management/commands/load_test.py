@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.utils.load_test import (
+    ASYNC_STUDY_PREFIX, DEFAULT_CORRECT_RATE, DEFAULT_CONCURRENCY, DEFAULT_DURATION,
+    AsgiTransport, HttpTransport, run_load_test, saturation_level,
+)
+from learning.utils.synthetic_data import DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = ('模拟并发学习者（登录 → 单词卡片 → 发音 → 反馈）对应用施加闭环负载，逐级提高并发，'
+            '报告吞吐量、错误率和延迟分布；账号来自 generate_synthetic_data 生成的用户')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default=','.join(map(str, DEFAULT_CONCURRENCY)),
+                            help='并发级别，逗号分隔')
+        parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='每一级持续的秒数')
+        parser.add_argument('--correct-rate', type=float, default=DEFAULT_CORRECT_RATE, help='回答“认识”的比例')
+        parser.add_argument('--url', help='本地服务器地址，如 http://127.0.0.1:8000；不指定时在进程内调用 ASGI 应用')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='合成用户的用户名前缀')
+        parser.add_argument('--password', default='password', help='合成用户的密码')
+        parser.add_argument('--no-audio', action='store_true', help='不请求发音')
+        parser.add_argument('--async-views', action='store_true', help='学习路径改用 /async/ 下的异步视图')
+        parser.add_argument('--seed', type=int, default=0, help='随机种子')
+        parser.add_argument('--output', help='把结果写入 JSON 文件')
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(value) for value in options['concurrency'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError("--concurrency 应为逗号分隔的整数")
+        usernames = list(
+            User.objects.filter(username__startswith=f"{options['prefix']}_user_")
+            .order_by('username').values_list('username', flat=True)[:max(levels)]
+        )
+        if not usernames:
+            raise CommandError("没有可用的测试账号，请先运行 generate_synthetic_data")
+        accounts = [(username, options['password']) for username in usernames]
+
+        transport = HttpTransport(options['url']) if options['url'] else AsgiTransport()
+        try:
+            results = asyncio.run(run_load_test(
+                transport, accounts, levels, options['duration'], options['correct_rate'],
+                seed=options['seed'], fetch_audio=not options['no_audio'],
+                study_prefix=ASYNC_STUDY_PREFIX if options['async_views'] else '',
+            ))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'concurrency':>12}{'req/s':>10}{'errors':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+        for result in results:
+            self.stdout.write(
+                f"{result['concurrency']:>12}{result['throughput']:>10}{result['error_rate']:>10.2%}"
+                f"{result['p50_ms']:>10}{result['p90_ms']:>10}{result['p99_ms']:>10}"
+            )
+            if result['errors']:
+                self.stdout.write(f"{'':>12}错误: {result['errors']}")
+
+        level = saturation_level(results)
+        if level:
+            self.stdout.write(self.style.WARNING(f"并发 {level} 时吞吐量不再增长或出现错误"))
+        else:
+            self.stdout.write(self.style.SUCCESS("测试范围内吞吐量随并发持续增长，未出现错误"))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
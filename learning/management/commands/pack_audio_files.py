@@ -0,0 +1,81 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Value, When
+
+from learning.models import AudioFile, Word
+from learning.utils.audio_cleanup import enqueue_audio_cleanup, schedule_audio_cleanup
+from learning.utils.audio_pack import PACK_PATH_PREFIX, get_audio_pack, packed_path
+
+
+class Command(BaseCommand):
+    help = '把 media/audio 下的单个 mp3 文件打包进 pack 文件，并改写 AudioFile.file_path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每个事务处理的记录数')
+        parser.add_argument(
+            '--delete-originals',
+            action='store_true',
+            help='打包完成后把原始 mp3 交给音频清理队列删除',
+        )
+
+    def handle(self, *args, **options):
+        store = get_audio_pack()
+        batch_size = options['batch_size']
+        packed = missing = 0
+        last_id = 0
+
+        while True:
+            batch = list(
+                AudioFile.objects
+                .filter(id__gt=last_id)
+                .exclude(file_path__startswith=PACK_PATH_PREFIX)
+                .exclude(file_path__isnull=True)
+                .exclude(file_path='')
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            updated = []
+            mapping = {}
+            for audio_file in batch:
+                full_path = os.path.join(settings.MEDIA_ROOT, audio_file.file_path)
+                try:
+                    with open(full_path, 'rb') as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    self.stderr.write(f"文件不存在，跳过: {audio_file.file_path}")
+                    missing += 1
+                    continue
+                entry = store.add(data)
+                mapping[audio_file.file_path] = packed_path(entry.sha256)
+                audio_file.file_path = mapping[audio_file.file_path]
+                updated.append(audio_file)
+
+            if updated:
+                self._rewrite_paths(updated, mapping, options['delete_originals'])
+            packed += len(updated)
+            self.stdout.write(f"已打包 {packed} 个音频")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"打包完成: {packed} 个，缺失文件: {missing} 个，pack 文件大小: {store.pack_size()} 字节"
+        ))
+
+    @transaction.atomic
+    def _rewrite_paths(self, audio_files, mapping, delete_originals):
+        AudioFile.objects.bulk_update(audio_files, ['file_path'])
+
+        # Word 上冗余保存的音频路径一并改写（一条 UPDATE ... CASE）
+        for field in ('phonetic_uk', 'phonetic_us'):
+            whens = [When(**{field: old}, then=Value(new)) for old, new in mapping.items()]
+            Word.objects.filter(**{f'{field}__in': list(mapping)}).update(
+                **{field: Case(*whens, default=field)}
+            )
+
+        if delete_originals:
+            enqueue_audio_cleanup(mapping.keys())
+            schedule_audio_cleanup()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.utils.fulltext import install_fulltext, optimize_fulltext
+
+
+class Command(BaseCommand):
+    help = '重建单词例句和文章的全文检索索引（FTS5）'
+
+    def handle(self, *args, **options):
+        if not install_fulltext(rebuild=True):
+            raise CommandError('全文检索只支持 SQLite 数据库')
+        optimize_fulltext()
+        self.stdout.write(self.style.SUCCESS('全文检索索引已重建'))
@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.utils.review_forecast import rebuild_forecast
+
+
+class Command(BaseCommand):
+    help = '用一次 GROUP BY 全量重建复习量预测（ReviewForecast），纠正增量维护的偏差；建议每晚执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='只重建指定用户名')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            user_ids = list(User.objects.filter(username=options['user']).values_list('id', flat=True))
+            if not user_ids:
+                raise CommandError(f"用户 {options['user']} 不存在")
+        rows, drift = rebuild_forecast(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"已重建 {rows} 行复习量预测，其中 {drift} 行与增量结果不一致"))
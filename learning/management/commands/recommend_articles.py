@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.utils.article_recommendation import DEFAULT_TOP_N, USER_BATCH_SIZE, refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = '按用户词汇掌握情况计算文章覆盖率并生成推荐（默认只刷新复习记录有变化的用户）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重新计算所有用户')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='只计算指定用户ID')
+        parser.add_argument('--top', type=int, default=DEFAULT_TOP_N, help='每个用户保存的推荐数量')
+        parser.add_argument('--batch-size', type=int, default=USER_BATCH_SIZE, help='每批计算的用户数量')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if options['all']:
+            user_ids = list(User.objects.values_list('id', flat=True))
+
+        try:
+            count = refresh_recommendations(user_ids, top_n=options['top'], batch_size=options['batch_size'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"已更新 {count} 个用户的文章推荐"))
@@ -0,0 +1,219 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, Value, When
+
+from learning.models import AudioFile, Word
+from learning.utils.audio_cleanup import enqueue_audio_cleanup, schedule_audio_cleanup
+from learning.utils.audio_pack import PACK_PATH_PREFIX
+
+# 目录名与 AudioFile.language / Word 字段的对应关系
+LANGUAGE_FIELDS = {
+    'uk': 'phonetic_uk',
+    'us': 'phonetic_us',
+}
+
+
+def iter_files(media_root, relative_dir):
+    """用 os.scandir 递归地逐个产出目录下文件的相对路径，不排序也不保存完整列表"""
+    stack = [relative_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(os.path.join(media_root, current)) as entries:
+                for entry in entries:
+                    relative_path = f"{current}/{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(relative_path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield relative_path
+        except FileNotFoundError:
+            continue
+
+
+def batched(iterable, size):
+    """把可迭代对象切成最多 size 个元素的列表"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def missing_files(media_root, paths):
+    """返回 paths 中磁盘上不存在的路径（在工作线程中执行，只访问文件系统）"""
+    return [path for path in paths if not os.path.isfile(os.path.join(media_root, path))]
+
+
+class Command(BaseCommand):
+    help = (
+        '对比 MEDIA_ROOT/audio 下的文件与 AudioFile / Word 音频字段，修复两侧的孤立数据。'
+        '两侧都按 --chunk-size 分批流式处理，内存占用与文件数无关'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只报告差异，不做修改')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='并行检查文件是否存在的线程数，同时也是同时在途的批次数')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='每批的路径数 / 批量修复的大小')
+        parser.add_argument('--force', action='store_true',
+                            help='音频目录不存在或为空时仍然执行（会删除全部 AudioFile 记录并清空单词的音频路径）')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.chunk_size = options['chunk_size']
+        self.workers = max(1, options['workers'])
+        self.stats = {
+            'orphan_rows': 0,
+            'orphan_word_refs': 0,
+            'adopted_files': 0,
+            'orphan_files': 0,
+        }
+
+        self.media_root = str(settings.MEDIA_ROOT)
+        audio_root = os.path.join(self.media_root, 'audio')
+        pack_dir = PACK_PATH_PREFIX.rstrip('/').rsplit('/', 1)[-1]
+        try:
+            with os.scandir(audio_root) as entries:
+                directories = sorted(
+                    entry.name for entry in entries
+                    if entry.is_dir(follow_symlinks=False) and entry.name != pack_dir
+                )
+        except OSError as e:
+            if not options['force']:
+                raise CommandError(f"无法读取音频目录 {audio_root}: {e}；确认需要清空全部音频记录时使用 --force")
+            directories = []
+        # 目录为空多半是存储未挂载，此时对账会把所有记录当作孤立数据删除
+        if not directories and not options['force']:
+            raise CommandError(f"音频目录 {audio_root} 下没有语言目录；确认需要清空全部音频记录时使用 --force")
+
+        # 1. 记录 → 文件：按路径顺序分批读取记录，每批是一段连续的文件名前缀区间，交给线程池检查文件是否存在
+        self._check_in_parallel(self._record_batches(), lambda _, paths: self._fix_orphan_rows(paths))
+        for field in LANGUAGE_FIELDS.values():
+            self._check_in_parallel(self._word_ref_batches(field), self._clear_word_refs)
+
+        # 2. 文件 → 记录：流式列出目录，每批用 file_path 索引查出已有记录
+        for name in directories:
+            language = name if name in LANGUAGE_FIELDS else None
+            for paths in batched(iter_files(self.media_root, f"audio/{name}"), self.chunk_size):
+                recorded = set(AudioFile.objects.filter(file_path__in=paths).values_list('file_path', flat=True))
+                unrecorded = [path for path in paths if path not in recorded]
+                if unrecorded:
+                    self._fix_orphan_files(unrecorded, language)
+
+        summary = '，'.join(f"{key}: {value}" for key, value in self.stats.items())
+        prefix = '[dry-run] ' if self.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(f"{prefix}对账完成 {summary}"))
+
+    def _check_in_parallel(self, batches, handle):
+        """
+        把 (key, 路径列表) 批次交给线程池检查文件是否存在，主线程按完成顺序调用 handle(key, 缺失路径)
+
+        批次由主线程从数据库读取（数据库连接只在主线程使用），处理完一批才读取下一批，
+        同时在途的批次不超过 workers 个。
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {}
+
+            def submit_next():
+                item = next(batches, None)
+                if item is not None:
+                    key, paths = item
+                    futures[executor.submit(missing_files, self.media_root, paths)] = key
+
+            for _ in range(self.workers):
+                submit_next()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = futures.pop(future)
+                    missing = future.result()
+                    if missing:
+                        handle(key, missing)
+                    submit_next()
+
+    def _record_batches(self):
+        """按 file_path 顺序分批产出 AudioFile 的路径（pack 中的音频不在磁盘上，跳过）"""
+        last_path = ''
+        while True:
+            paths = list(
+                AudioFile.objects.filter(file_path__gt=last_path)
+                .order_by('file_path').values_list('file_path', flat=True).distinct()[:self.chunk_size]
+            )
+            if not paths:
+                return
+            last_path = paths[-1]
+            paths = [path for path in paths if not path.startswith(PACK_PATH_PREFIX)]
+            if paths:
+                yield None, paths
+
+    def _word_ref_batches(self, field):
+        """按 id 分批产出 Word 上冗余保存的音频路径"""
+        last_id = 0
+        while True:
+            rows = list(
+                Word.objects.filter(id__gt=last_id).exclude(**{field: ''})
+                .order_by('id').values_list('id', field)[:self.chunk_size]
+            )
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            paths = sorted({path for _, path in rows if not path.startswith(PACK_PATH_PREFIX)})
+            if paths:
+                yield field, paths
+
+    def _fix_orphan_rows(self, paths):
+        """AudioFile 记录存在但文件缺失：删除记录"""
+        self.stats['orphan_rows'] += len(paths)
+        for path in paths[:5]:
+            self.stdout.write(f"缺失文件: {path}")
+        if not self.dry_run:
+            AudioFile.objects.filter(file_path__in=paths).delete()
+
+    def _clear_word_refs(self, field, paths):
+        """Word 上的音频路径指向不存在的文件：清空"""
+        self.stats['orphan_word_refs'] += len(paths)
+        if not self.dry_run:
+            Word.objects.filter(**{f'{field}__in': paths}).update(**{field: ''})
+
+    @transaction.atomic
+    def _fix_orphan_files(self, paths, language):
+        """
+        文件存在但没有 AudioFile 记录：
+        能按文件名对应到单词的补建记录，否则登记到音频清理队列删除
+        """
+        by_text = {}
+        if language:
+            for path in paths:
+                text, ext = os.path.splitext(path.rsplit('/', 1)[-1])
+                if ext == '.mp3':
+                    by_text[text] = path
+        word_texts = set(Word.objects.filter(word__in=list(by_text)).values_list('word', flat=True))
+
+        adopted = [by_text[text] for text in word_texts]
+        orphaned = sorted(set(paths) - set(adopted))
+        self.stats['adopted_files'] += len(adopted)
+        self.stats['orphan_files'] += len(orphaned)
+        for path in orphaned[:5]:
+            self.stdout.write(f"孤立文件: {path}")
+        if self.dry_run:
+            return
+
+        if adopted:
+            field = LANGUAGE_FIELDS[language]
+            AudioFile.objects.bulk_create([
+                AudioFile(word_text=text, file_path=by_text[text], language=language)
+                for text in word_texts
+            ])
+            Word.objects.filter(word__in=word_texts, **{field: ''}).update(**{
+                field: Case(*[When(word=text, then=Value(by_text[text])) for text in word_texts], default=field)
+            })
+        if orphaned:
+            enqueue_audio_cleanup(orphaned)
+            schedule_audio_cleanup()
@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.utils.learning_stats import rollup_user
+
+
+class Command(BaseCommand):
+    help = '从 UserWord.history_intervals 重算每日学习统计（DailyStats），用于回填历史数据或纠正偏差'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='只处理指定用户名')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"用户 {options['user']} 不存在")
+
+        total = 0
+        user_count = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            total += rollup_user(user_id)
+            user_count += 1
+        self.stdout.write(self.style.SUCCESS(f"已重算 {user_count} 个用户的每日统计，共 {total} 行"))
@@ -0,0 +1,73 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.utils.benchmark import (
+    CASES, DEFAULT_ITERATIONS, DEFAULT_SCALES, DEFAULT_TOLERANCE,
+    compare_with_baseline, load_baseline, run_benchmarks, save_baseline,
+)
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+def parse_scale(value):
+    try:
+        users, words = value.lower().split('x')
+        return int(users), int(words)
+    except ValueError:
+        raise CommandError(f"规模格式应为 <用户数>x<单词数>，例如 10x500: {value}")
+
+
+class Command(BaseCommand):
+    help = '在合成数据上测量热点路径的吞吐量、p50/p99 耗时和查询次数，并与基线对比（数据在事务中生成，结束后回滚）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', dest='scales',
+                            help='数据规模，如 10x500，可重复指定（默认 %s）' % ', '.join(
+                                f'{u}x{w}' for u, w in DEFAULT_SCALES))
+        parser.add_argument('--case', action='append', dest='cases', choices=list(CASES), help='只运行指定用例')
+        parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='每个用例的计时次数')
+        parser.add_argument('--seed', type=int, default=0, help='随机种子')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线 JSON 路径')
+        parser.add_argument('--save-baseline', action='store_true', help='把本次结果写入基线文件')
+        parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='p50 耗时允许的相对增幅')
+        parser.add_argument('--output', help='把本次结果写入 JSON 文件')
+        parser.add_argument('--fail-on-regression', action='store_true', help='出现退化时以非零状态退出')
+
+    def handle(self, *args, **options):
+        scales = [parse_scale(value) for value in options['scales']] if options['scales'] else DEFAULT_SCALES
+        results = run_benchmarks(scales, options['cases'], options['iterations'], options['seed'])
+
+        self.stdout.write(f"{'benchmark':<34}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}")
+        for key, stats in results.items():
+            self.stdout.write(
+                f"{key:<34}{stats['ops_per_sec']:>10}{stats['p50_ms']:>10}{stats['p99_ms']:>10}"
+                f"{stats['queries_per_op']:>10}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+        baseline_path = options['baseline']
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+            save_baseline(baseline_path, results, scales, options['iterations'], options['seed'])
+            self.stdout.write(self.style.SUCCESS(f"已保存基线: {baseline_path}"))
+            return
+
+        if not os.path.exists(baseline_path):
+            self.stdout.write(self.style.WARNING(f"基线文件不存在，跳过对比: {baseline_path}"))
+            return
+
+        regressions = compare_with_baseline(results, load_baseline(baseline_path), options['tolerance'])
+        for item in regressions:
+            self.stdout.write(self.style.ERROR(
+                f"退化 {item['benchmark']} {item['metric']}: {item['baseline']} → {item['current']}"
+            ))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("与基线相比没有退化"))
+        elif options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} 项指标相比基线退化")
@@ -2,14 +2,23 @@ import time
 
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
-from learning.my_utils.init_db_and_audio import word_card
+from learning.my_utils.init_db_and_audio import enrich_words, word_card
 from learning.utils.priority_adjustment_based_on_feedback import calculate_initial_schedule, initialize_user_words
 
 
 class Command(BaseCommand):
     help = 'Run the word_card test function'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--enrich', type=int, default=0,
+                            help='补全最多 N 个缺少释义或发音的单词（结束后统一更新释义近邻），不初始化复习计划')
+        parser.add_argument('--delay', type=float, default=2, help='补全每个单词之间的间隔秒数')
+
     def handle(self, *args, **kwargs):
+        if kwargs['enrich']:
+            enriched = enrich_words(kwargs['enrich'], delay=kwargs['delay'])
+            self.stdout.write(self.style.SUCCESS(f'已补全 {enriched} 个单词的释义'))
+            return
         # while True:
         #     result = word_card()
         #     print(result)
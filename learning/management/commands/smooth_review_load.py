@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.utils.review_load import apply_smoothing, invalidate_histogram, load_fuzz, smooth_user
+
+
+class Command(BaseCommand):
+    help = '重新均衡已有的复习安排：每个单词在其间隔的 ±fuzz 窗口内移到负载最低的一天，消除复习墙'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='只处理指定用户名')
+        parser.add_argument('--fuzz', type=float, help='允许移动的间隔比例，默认为 REVIEW_LOAD_FUZZ')
+        parser.add_argument('--spread-overdue', type=int, default=0,
+                            help='把已过期的积压按优先级分摊到今天起的 N 天内（默认不处理积压）')
+        parser.add_argument('--dry-run', action='store_true', help='只报告，不写入数据库')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"用户 {options['user']} 不存在")
+        fuzz = load_fuzz() if options['fuzz'] is None else options['fuzz']
+
+        total = 0
+        for user_id, username in users.values_list('id', 'username'):
+            changed, before, after = smooth_user(user_id, fuzz=fuzz, spread_overdue=options['spread_overdue'])
+            if not changed:
+                continue
+            if not options['dry_run']:
+                written = apply_smoothing(changed)
+                invalidate_histogram(user_id)
+            else:
+                written = len(changed)
+            total += written
+            self.stdout.write(f"{username}: 调整 {written} 个单词，单日峰值 {before} → {after}")
+
+        action = '将调整' if options['dry_run'] else '已调整'
+        self.stdout.write(self.style.SUCCESS(f"{action} {total} 个单词的复习日期"))
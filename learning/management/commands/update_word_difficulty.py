@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from learning.utils.word_difficulty import estimate_all, rebuild_word_stats
+
+
+class Command(BaseCommand):
+    help = '按全体用户的作答统计估计单词难度，并写回尚未学习的 UserWord 的初始强度；建议每晚执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='先从 UserWord.history_intervals 重算作答计数（首次使用或纠正偏差时）')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rows = rebuild_word_stats()
+            self.stdout.write(f"已从学习记录重算 {rows} 个单词的作答计数")
+        words, user_words = estimate_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"已估计 {words} 个单词的难度，更新 {user_words} 条未学习记录的初始强度"
+        ))
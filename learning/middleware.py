@@ -0,0 +1,158 @@
+"""
+请求指标与采样分析中间件
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from learning.utils.profiler import DEFAULT_INTERVAL, PROFILE_QUERY_PARAM, StackSampler, save_profile, should_profile
+from learning.utils.request_metrics import UNRESOLVED_VIEW, QueryRecorder, exceeded_budget, registry, \
+    reset_current_recorder, set_current_recorder
+
+
+class RequestMetricsMiddleware:
+    """
+    记录每个请求的 SQL 查询次数、SQL 耗时、总耗时和重复查询，按视图名聚合到进程内的直方图，
+    超出 REQUEST_METRICS_BUDGETS 配置的预算时记录警告日志。
+
+    总耗时截止到视图返回响应为止，流式响应的传输时间不计入。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        self.observe(request, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return await self.get_response(request)
+
+        # 异步视图的查询在其他线程的连接上执行，记录器通过上下文传递
+        recorder = QueryRecorder()
+        token = set_current_recorder(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_current_recorder(token)
+        self.observe(request, recorder, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, recorder, total):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else UNRESOLVED_VIEW
+        exceeded = exceeded_budget(view, recorder, total)
+        registry.observe(view, recorder, total, over_budget=bool(exceeded))
+        if exceeded:
+            self.log_budget_violation(request, view, recorder, total, exceeded)
+
+    @staticmethod
+    def log_budget_violation(request, view, recorder, total, exceeded):
+        message = (
+            f"视图 {view} 超出预算 {','.join(exceeded)}: {request.method} {request.path} "
+            f"查询 {recorder.count} 次，SQL {recorder.duration * 1000:.1f}ms，总耗时 {total * 1000:.1f}ms"
+        )
+        duplicates = recorder.duplicates()
+        if duplicates:
+            sql, count = max(duplicates.items(), key=lambda item: item[1])
+            message += f"；重复最多的查询执行了 {count} 次: {sql[:300]}"
+        logging.warning(message)
+
+
+class ProfilingMiddleware:
+    """
+    对选中的请求做调用栈采样，结果写入 PROFILER_DIR（见 learning.utils.profiler）
+
+    需要放在 AuthenticationMiddleware 之后，才能识别管理员的 ?__profile=1。
+    异步请求采样的是事件循环线程，sync_to_async 中执行的同步代码只表现为等待。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not should_profile(request, random.random()):
+            return self.get_response(request)
+
+        sampler = self.start_sampler()
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            counts = sampler.stop()
+        return self.save(request, response, sampler, counts, started_at, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        # should_profile 会读取管理员请求的 request.user，异步上下文中不能惰性加载
+        if PROFILE_QUERY_PARAM in request.GET:
+            request.user = await request.auser()
+        if not should_profile(request, random.random()):
+            return await self.get_response(request)
+
+        sampler = self.start_sampler()
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            counts = sampler.stop()
+        return self.save(request, response, sampler, counts, started_at, time.perf_counter() - start)
+
+    @staticmethod
+    def start_sampler():
+        return StackSampler(
+            threading.get_ident(), getattr(settings, 'PROFILER_INTERVAL', DEFAULT_INTERVAL)
+        ).start()
+
+    @staticmethod
+    def save(request, response, sampler, counts, started_at, duration):
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        meta = {
+            'view': match.view_name if match else UNRESOLVED_VIEW,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'user': user.get_username() if user is not None and user.is_authenticated else '',
+            'status': response.status_code,
+            'started_at': started_at,
+            'duration_ms': round(duration * 1000, 2),
+            'samples': sampler.samples,
+        }
+        try:
+            name = save_profile(counts, meta)
+            response['X-Profile-Id'] = name
+        except OSError as e:
+            logging.error(f"保存分析结果失败: {e}")
+        return response
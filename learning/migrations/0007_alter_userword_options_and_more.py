@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2025-02-10 02:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0006_dailytask_taskword_userword_history_intervals_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='userword',
+            options={'verbose_name': '用户单词记忆', 'verbose_name_plural': '用户单词记忆记录'},
+        ),
+        migrations.RemoveIndex(
+            model_name='userword',
+            name='learning_us_user_id_4f8cc1_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='userword',
+            new_name='priority_idx',
+            old_name='learning_us_priorit_71995d_idx',
+        ),
+        migrations.RemoveField(
+            model_name='userword',
+            name='lock_version',
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='correct_streak',
+            field=models.IntegerField(default=0, help_text='最近连续回答正确的次数（允许负值表示连续错误）', verbose_name='连续正确次数'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='error_count',
+            field=models.PositiveIntegerField(default=0, help_text='累计回答错误次数', verbose_name='错误次数'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='history_intervals',
+            field=models.JSONField(default=list, help_text='存储历次复习间隔的JSON数组', verbose_name='历史间隔记录'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='initial_strength',
+            field=models.FloatField(default=3.0, help_text='记忆初始强度值，参与记忆强度计算', verbose_name='初始强度'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='last_review',
+            field=models.DateTimeField(auto_now=True, help_text='最后一次复习的时间戳', verbose_name='最后复习时间'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='memory_phase',
+            field=models.CharField(choices=[('initial', '初次学习'), ('retention', '保持阶段'), ('mastered', '完全掌握')], default='initial', help_text='当前记忆阶段：initial/retention/mastered', max_length=20, verbose_name='记忆阶段'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='memory_strength',
+            field=models.FloatField(default=3.0, help_text='动态计算的记忆强度值，范围[0.5, 15.0]', verbose_name='记忆强度'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='next_review',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='根据记忆算法计算的下次复习时间', verbose_name='下次复习时间'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='priority',
+            field=models.FloatField(default=0.0, help_text='动态计算的复习优先级，值越大优先级越高', verbose_name='复习优先级'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, help_text='总复习次数（含正确和错误）', verbose_name='复习次数'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='user',
+            field=models.ForeignKey(help_text='关联的用户账户', on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='用户'),
+        ),
+        migrations.AlterField(
+            model_name='userword',
+            name='word',
+            field=models.ForeignKey(help_text='关联的单词', on_delete=django.db.models.deletion.CASCADE, to='learning.word', verbose_name='单词'),
+        ),
+        migrations.AddIndex(
+            model_name='userword',
+            index=models.Index(fields=['user', 'next_review', '-priority'], name='user_next_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0007_alter_userword_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioCleanupTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=255, unique=True, verbose_name='文件路径')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='尝试次数')),
+                ('last_error', models.CharField(blank=True, max_length=255, verbose_name='最后错误')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='登记时间')),
+            ],
+            options={
+                'verbose_name': '音频清理任务',
+                'verbose_name_plural': '音频清理任务',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0007_audiocleanuptask_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackedAudio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='内容哈希')),
+                ('offset', models.BigIntegerField(verbose_name='偏移量')),
+                ('length', models.PositiveIntegerField(verbose_name='长度')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='写入时间')),
+            ],
+            options={
+                'verbose_name': '打包音频',
+                'verbose_name_plural': '打包音频',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0008_packedaudio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='vocab_index',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='vocab_index_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0009_article_vocab_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordForm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form', models.CharField(db_index=True, max_length=100, verbose_name='词形')),
+                ('is_lemma', models.BooleanField(default=False, verbose_name='是否原形')),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forms', to='learning.word', verbose_name='单词')),
+            ],
+            options={
+                'verbose_name': '词形',
+                'verbose_name_plural': '词形',
+                'unique_together': {('form', 'word')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0010_wordform'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coverage', models.FloatField(verbose_name='词汇覆盖率')),
+                ('unknown_density', models.FloatField(verbose_name='陌生词密度')),
+                ('rank', models.PositiveIntegerField(verbose_name='推荐排名')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='计算时间')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='learning.article', verbose_name='文章')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '文章推荐',
+                'verbose_name_plural': '文章推荐',
+                'indexes': [models.Index(fields=['user', 'rank'], name='user_reco_rank_idx')],
+                'unique_together': {('user', 'article')},
+            },
+        ),
+    ]
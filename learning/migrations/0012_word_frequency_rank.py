@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0011_articlerecommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='frequency_rank',
+            field=models.PositiveIntegerField(db_index=True, default=1000000000),
+        ),
+    ]
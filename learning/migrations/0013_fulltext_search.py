@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from learning.utils.fulltext import install_fulltext
+    install_fulltext(schema_editor.connection, rebuild=True)
+
+
+def uninstall(apps, schema_editor):
+    from learning.utils.fulltext import uninstall_fulltext
+    uninstall_fulltext(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0012_word_frequency_rank'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0013_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefinitionNeighbors',
+            fields=[
+                ('word', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='definition_neighbors', serialize=False, to='learning.word', verbose_name='单词')),
+                ('neighbor_ids', models.BinaryField(default=bytes, verbose_name='近邻单词ID')),
+                ('threshold', models.FloatField(default=0.0, verbose_name='第 k 近邻相似度')),
+                ('definition_hash', models.CharField(max_length=40, verbose_name='释义哈希')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='计算时间')),
+            ],
+            options={
+                'verbose_name': '释义近邻',
+                'verbose_name_plural': '释义近邻',
+            },
+        ),
+    ]
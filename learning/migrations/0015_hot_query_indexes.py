@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0014_definition_neighbors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userword',
+            name='user_next_priority_idx',
+        ),
+        migrations.AddIndex(
+            model_name='audiofile',
+            index=models.Index(fields=['word_text', 'language'], name='audio_word_language_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userword',
+            index=models.Index(fields=['user', '-priority', 'next_review'], name='user_priority_next_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userword',
+            index=models.Index(fields=['user', 'review_count'], name='user_review_count_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0015_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userword',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='每次处理反馈加一，用于检测并发更新', verbose_name='版本号'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0017_review_forecast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('reviews', models.PositiveIntegerField(default=0, verbose_name='复习次数')),
+                ('correct', models.PositiveIntegerField(default=0, verbose_name='回答正确次数')),
+                ('new_words', models.PositiveIntegerField(default=0, verbose_name='首次学习的单词数')),
+                ('mastered', models.PositiveIntegerField(default=0, verbose_name='进入掌握阶段的单词数')),
+                ('time_spent', models.PositiveIntegerField(default=0, verbose_name='学习时长（秒）')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '每日学习统计',
+                'verbose_name_plural': '每日学习统计',
+                'unique_together': {('user', 'day')},
+            },
+        ),
+    ]
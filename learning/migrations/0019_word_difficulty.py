@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0018_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordDifficulty',
+            fields=[
+                ('word', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='difficulty_stats', serialize=False, to='learning.word', verbose_name='单词')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='作答次数')),
+                ('first_attempts', models.PositiveIntegerField(default=0, verbose_name='首次作答次数')),
+                ('first_errors', models.PositiveIntegerField(default=0, verbose_name='首次作答错误次数')),
+                ('mastered', models.PositiveIntegerField(default=0, verbose_name='进入掌握阶段的次数')),
+                ('reviews_to_mastery', models.PositiveIntegerField(default=0, verbose_name='进入掌握阶段前的复习次数合计')),
+                ('difficulty', models.FloatField(blank=True, null=True, verbose_name='难度')),
+                ('initial_strength', models.FloatField(default=3.0, verbose_name='建议初始强度')),
+                ('estimated_at', models.DateTimeField(blank=True, null=True, verbose_name='估计时间')),
+            ],
+            options={
+                'verbose_name': '单词难度统计',
+                'verbose_name_plural': '单词难度统计',
+            },
+        ),
+    ]
@@ -2,9 +2,17 @@ from django.contrib.auth.models import User
 
 import math
 import random
-from django.db import models
+import time
+from django.db import OperationalError, connection, models, transaction
 from django.utils import timezone
-from django.db import transaction
+
+
+# 未参与词频统计的单词使用的排名，保证新单词排在所有已统计单词之后
+UNRANKED_FREQUENCY = 1_000_000_000
+# 新学单词的默认初始强度；WordDifficulty 按全体用户的作答统计给难词设更低的值
+DEFAULT_INITIAL_STRENGTH = 3.0
+# 前几次复习的基础间隔按初始强度缩放，之后完全由复习表现决定
+INITIAL_STRENGTH_REVIEWS = 3
 
 
 class Word(models.Model):
@@ -24,6 +32,8 @@ class Word(models.Model):
     phonetic = models.CharField(max_length=100, blank=True)
     phonetic_us = models.CharField(max_length=100, blank=True)  # 美音发音地址
     rating = models.IntegerField(default=0, choices=[(i, str(i)) for i in range(0, 6)])  # 单词本身的难度评分
+    # 语料词频排名（1 为最常用），由 build_word_frequency 命令生成；未统计的单词排在最后
+    frequency_rank = models.PositiveIntegerField(default=UNRANKED_FREQUENCY, db_index=True)
 
     def __str__(self):
         """
@@ -35,6 +45,42 @@ class Word(models.Model):
         return self.word
 
 
+class WordForm(models.Model):
+    """
+    词形索引：小写词形（原形或屈折形式）→ 单词。
+
+    由 build_word_forms 命令离线生成，同一词形可能对应多个单词（saw → see / saw），
+    解析时原形优先。
+    """
+    form = models.CharField(max_length=100, db_index=True, verbose_name="词形")
+    word = models.ForeignKey('Word', on_delete=models.CASCADE, related_name='forms', verbose_name="单词")
+    is_lemma = models.BooleanField(default=False, verbose_name="是否原形")
+
+    class Meta:
+        unique_together = ('form', 'word')
+        verbose_name = "词形"
+        verbose_name_plural = "词形"
+
+    def __str__(self):
+        return f"{self.form} → {self.word_id}"
+
+
+# process_feedback 写回的字段
+FEEDBACK_FIELDS = (
+    'review_count', 'correct_streak', 'error_count', 'memory_phase', 'memory_strength',
+    'priority', 'history_intervals', 'next_review', 'last_review',
+)
+# 乐观并发冲突的最大尝试次数
+FEEDBACK_MAX_RETRIES = 5
+# 数据库锁冲突（SQLite 的 database is locked）的最大重试次数和退避基数（秒）
+FEEDBACK_LOCK_RETRIES = 10
+FEEDBACK_LOCK_BACKOFF = 0.01
+
+
+class FeedbackConflict(Exception):
+    """同一条 UserWord 被并发更新，重试后仍然冲突"""
+
+
 class UserWord(models.Model):
     """
     用户单词记忆模型，记录用户对特定单词的记忆信息
@@ -47,6 +93,7 @@ class UserWord(models.Model):
     4. 修正复习次数统计逻辑
     5. 添加字段说明提升可维护性
     6. 使用initial_strength字段参与计算
+    7. version 字段用于 process_feedback 的乐观并发控制
     """
     MEMORY_PHASE_CHOICES = [
         ('initial', '初次学习'),
@@ -115,19 +162,27 @@ class UserWord(models.Model):
         help_text="当前记忆阶段：initial/retention/mastered"
     )
     initial_strength = models.FloatField(
-        default=3.0,
+        default=DEFAULT_INITIAL_STRENGTH,
         verbose_name="初始强度",
         help_text="记忆初始强度值，参与记忆强度计算"
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name="版本号",
+        help_text="每次处理反馈加一，用于检测并发更新"
+    )
 
     class Meta:
         unique_together = ('user', 'word')
         indexes = [
-            # 优化复合索引，覆盖常用查询条件
+            # 到期单词按优先级排序：user 等值定位后沿 priority 顺序读取，next_review 在索引内过滤，
+            # 避免 (user, next_review) 范围扫描后再建临时 B-tree 排序
             models.Index(
-                fields=['user', 'next_review', '-priority'],
-                name='user_next_priority_idx'
+                fields=['user', '-priority', 'next_review'],
+                name='user_priority_next_idx'
             ),
+            # 当日任务补充新单词（review_count=0）
+            models.Index(fields=['user', 'review_count'], name='user_review_count_idx'),
             # 保留单独索引用于特殊排序需求
             models.Index(fields=['priority'], name='priority_idx'),
         ]
@@ -166,13 +221,18 @@ class UserWord(models.Model):
         return self.priority
 
     @classmethod
-    def get_due_words(cls, user, limit=50):
-        """获取待复习单词列表，确保所有单词都能被复习到"""
-        due_query = cls.objects.filter(
+    def due_queryset(cls, user):
+        """已到期的单词，按优先级从高到低（走 user_priority_next_idx）"""
+        return cls.objects.filter(
             user=user,
             next_review__lte=timezone.now()
         ).order_by('-priority')
 
+    @classmethod
+    def get_due_words(cls, user, limit=50):
+        """获取待复习单词列表，确保所有单词都能被复习到"""
+        due_query = cls.due_queryset(user)
+
         count = due_query.count()
         if count > limit:
             # 获取高优先级的前半部分
@@ -189,53 +249,112 @@ class UserWord(models.Model):
 
         return due_words
 
-    @transaction.atomic
     def process_feedback(self, is_correct):
-        """处理用户反馈的原子操作（返回更新后的实例）"""
-        # 获取并锁定记录（使用select_for_update保证原子性）
-        obj = UserWord.objects.select_for_update().get(pk=self.pk)
+        """
+        处理用户反馈（返回更新后的实例）
+
+        乐观并发：基于当前实例计算新状态，用一条 UPDATE ... WHERE id=? AND version=? 只写回与反馈前相比变化的字段
+        （review_count、last_review 和追加了一条记录的 history_intervals 每次都会写回）；
+        影响行数为 0 说明记录已被其他请求更新，重新读取后重试，超过 FEEDBACK_MAX_RETRIES 次抛出 FeedbackConflict。
 
+        UserWord 的更新与复习量预测、每日统计、单词难度的计数在同一个事务中提交，每项计数一条 upsert，
+        不使用保存点。遇到数据库锁冲突时整个事务回滚，退避后重新读取并重试；已处于外层事务中时无法单独重试，直接抛出。
+        """
+        from learning.utils import review_load
+
+        conflicts = lock_errors = 0
+        while True:
+            try:
+                if conflicts or lock_errors:
+                    self.refresh_from_db(fields=FEEDBACK_FIELDS + ('version',))
+                previous_review, previous_phase = self.next_review, self.memory_phase
+                values = self._apply_feedback(is_correct)
+                updated = self._save_feedback(values, is_correct, previous_review, previous_phase)
+            except OperationalError:
+                lock_errors += 1
+                if connection.in_atomic_block or lock_errors >= FEEDBACK_LOCK_RETRIES:
+                    raise
+                time.sleep(random.uniform(0, FEEDBACK_LOCK_BACKOFF * lock_errors))
+                continue
+            if updated:
+                self.version += 1
+                if review_load.balancing_enabled():
+                    review_load.record_move(self.user_id, previous_review, self.next_review)
+                return self
+            conflicts += 1
+            if conflicts >= FEEDBACK_MAX_RETRIES:
+                raise FeedbackConflict(f"UserWord {self.pk} 并发更新冲突，重试 {FEEDBACK_MAX_RETRIES} 次后放弃")
+
+    def _save_feedback(self, values, is_correct, previous_review, previous_phase):
+        """条件更新 UserWord 并累加派生计数，返回是否写入（版本号不匹配时不写入）"""
+        from learning.utils import learning_stats, review_forecast, word_difficulty
+
+        with transaction.atomic(savepoint=False):
+            if not UserWord.objects.filter(pk=self.pk, version=self.version).update(
+                version=self.version + 1, **values
+            ):
+                return False
+            mastered = self.memory_phase == 'mastered' and previous_phase != 'mastered'
+            review_forecast.shift_due(self.user_id, previous_review, self.next_review)
+            learning_stats.record_review(
+                self.user_id, self.last_review, is_correct,
+                first_review=self.review_count == 1, mastered=mastered,
+            )
+            word_difficulty.record_answer(
+                self.word_id, is_correct,
+                first_review=self.review_count == 1,
+                mastery_reviews=self.review_count if mastered else None,
+            )
+        return True
+
+    def _apply_feedback(self, is_correct):
+        """在实例上计算反馈后的记忆状态，返回 FEEDBACK_FIELDS 中值发生变化的字段"""
+        from learning.utils import review_load
+
+        before = {field: getattr(self, field) for field in FEEDBACK_FIELDS}
         # 更新基础数据（无论对错都增加复习次数）
-        obj.review_count += 1
+        self.review_count += 1
 
         if is_correct:
-            obj.correct_streak += 1
-            obj.error_count = max(0, obj.error_count - 1)
+            self.correct_streak += 1
+            self.error_count = max(0, self.error_count - 1)
         else:
-            obj.correct_streak = max(-2, obj.correct_streak - 2)  # 允许最低到-2
-            obj.error_count += 1
+            self.correct_streak = max(-2, self.correct_streak - 2)  # 允许最低到-2
+            self.error_count += 1
 
         # 动态调整记忆阶段
-        if obj.review_count >= 4 and obj.error_count == 0:
-            obj.memory_phase = 'mastered'
-        elif obj.review_count > 1:
-            obj.memory_phase = 'retention'
+        if self.review_count >= 4 and self.error_count == 0:
+            self.memory_phase = 'mastered'
+        elif self.review_count > 1:
+            self.memory_phase = 'retention'
         else:
-            obj.memory_phase = 'initial'
+            self.memory_phase = 'initial'
 
         # 计算记忆参数
-        obj.update_memory_strength()
-        obj.calculate_priority()
-        interval = obj._calculate_interval()
-
-        # 记录历史间隔（使用可序列化的时间格式）
-        obj.history_intervals.append({
-            'date': timezone.now().isoformat(),
+        self.update_memory_strength()
+        self.calculate_priority()
+        interval = self._calculate_interval()
+
+        # 记录历史间隔（使用可序列化的时间格式），复制列表以免重试时残留
+        now = timezone.now()
+        self.history_intervals = self.history_intervals + [{
+            'date': now.isoformat(),
             'interval': interval,
             'correct': is_correct,
-            'strength': round(obj.memory_strength, 2)
-        })
-
-        # 设置下次复习时间（添加时间微调防止批量重复）
-        jitter = random.uniform(0.9, 1.1)  # ±10%时间波动
-        obj.next_review = timezone.now() + timezone.timedelta(
-            days=interval * jitter
-        )
-        obj.save()
+            'strength': round(self.memory_strength, 2)
+        }]
 
-        # 更新当前实例状态
-        self.__dict__.update(obj.__dict__)
-        return self
+        # 设置下次复习时间：开启负载均衡时选间隔窗口内到期数最少的一天，否则添加时间微调防止批量重复
+        if review_load.balancing_enabled():
+            self.next_review = review_load.balanced_next_review(self.user_id, interval, now)
+        else:
+            jitter = random.uniform(0.9, 1.1)  # ±10%时间波动
+            self.next_review = now + timezone.timedelta(
+                days=interval * jitter
+            )
+        # update() 不会触发 auto_now
+        self.last_review = now
+        return {field: getattr(self, field) for field in FEEDBACK_FIELDS if getattr(self, field) != before[field]}
 
     def _calculate_interval(self):
         """间隔计算算法（带自适应调整）"""
@@ -244,6 +363,9 @@ class UserWord(models.Model):
         # 根据复习次数选择基础间隔
         idx = min(self.review_count - 1, len(base_intervals) - 1)
         base_interval = base_intervals[idx] if idx >= 0 else 1
+        # 难词（初始强度低于默认值）起步间隔更短，易词更长；不短于一天（负载均衡的窗口同样从一天起）
+        if self.review_count <= INITIAL_STRENGTH_REVIEWS:
+            base_interval = max(1, base_interval * self.initial_strength / DEFAULT_INITIAL_STRENGTH)
 
         # 错误惩罚机制
         if self.error_count >= 2:
@@ -272,8 +394,10 @@ class DailyTask(models.Model):
     def check_completion(self):
         """检查任务是否全部完成"""
         incomplete = self.taskword_set.filter(status__in=['new', 'retry']).exists()
-        self.is_completed = not incomplete
-        self.save()
+        # 状态没有变化时不写库（每次反馈都会调用）
+        if self.is_completed != (not incomplete):
+            self.is_completed = not incomplete
+            self.save(update_fields=['is_completed'])
         return self.is_completed
 
 
@@ -304,6 +428,14 @@ class AudioFile(models.Model):
     # 存储英音还是美音
     language = models.CharField(max_length=2, choices=LANGUAGE_CHOICES, blank=False, null=False)
 
+    class Meta:
+        indexes = [
+            # 按单词和口音查找发音
+            models.Index(fields=['word_text', 'language'], name='audio_word_language_idx'),
+            # reconcile_audio 按路径分批查找记录、按路径顺序遍历记录
+            models.Index(fields=['file_path'], name='audio_file_path_idx'),
+        ]
+
     def __str__(self):
         return self.word_text
 
@@ -381,9 +513,175 @@ class Article(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     difficulty = models.CharField(max_length=20, choices=[('1', 'easy'), ('2', 'medium'), ('3', 'hard')])
+    # 词汇倒排索引：{单词ID: [词元位置, ...]}，由 learning.utils.article_index 生成
+    vocab_index = models.JSONField(default=dict, blank=True, editable=False)
+    # 生成索引时正文的哈希，正文修改后索引自动失效
+    vocab_index_hash = models.CharField(max_length=40, blank=True, editable=False)
 
     def __str__(self):
         """
         返回文章的标题字符串表示。
         """
         return self.title
+
+
+class AudioCleanupTask(models.Model):
+    """
+    待删除音频文件队列。
+
+    删除单词时只在事务中登记文件路径，实际的 os.remove 在事务提交后由后台清理线程
+    或 cleanup_audio_files 命令完成。file_path 唯一，重复登记和重复执行都是幂等的。
+    """
+    file_path = models.CharField(max_length=255, unique=True, verbose_name="文件路径")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="尝试次数")
+    last_error = models.CharField(max_length=255, blank=True, verbose_name="最后错误")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="登记时间")
+
+    class Meta:
+        verbose_name = "音频清理任务"
+        verbose_name_plural = "音频清理任务"
+
+    def __str__(self):
+        return self.file_path
+
+
+class PackedAudio(models.Model):
+    """
+    打包音频索引：记录每段音频在追加写入的 pack 文件中的位置。
+
+    sha256 唯一，相同内容的发音只存一份；对应 AudioFile.file_path 形如 audio/pack/<sha256>.mp3。
+    """
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="内容哈希")
+    offset = models.BigIntegerField(verbose_name="偏移量")
+    length = models.PositiveIntegerField(verbose_name="长度")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="写入时间")
+
+    class Meta:
+        verbose_name = "打包音频"
+        verbose_name_plural = "打包音频"
+
+    def __str__(self):
+        return self.sha256
+
+
+class ArticleRecommendation(models.Model):
+    """
+    按用户计算的文章推荐结果（由 recommend_articles 命令批量生成）。
+
+    coverage 为文章词汇中用户已掌握部分的占比（按出现次数加权），
+    unknown_density 为每个词元对应的陌生单词数，rank 越小越推荐。
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="用户")
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, verbose_name="文章")
+    coverage = models.FloatField(verbose_name="词汇覆盖率")
+    unknown_density = models.FloatField(verbose_name="陌生词密度")
+    rank = models.PositiveIntegerField(verbose_name="推荐排名")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="计算时间")
+
+    class Meta:
+        unique_together = ('user', 'article')
+        indexes = [
+            models.Index(fields=['user', 'rank'], name='user_reco_rank_idx'),
+        ]
+        verbose_name = "文章推荐"
+        verbose_name_plural = "文章推荐"
+
+    def __str__(self):
+        return f"{self.user_id} - {self.article_id} (#{self.rank})"
+
+
+class DefinitionNeighbors(models.Model):
+    """
+    释义相似的近邻单词（由 build_definition_neighbors 命令和释义变更时的增量更新生成）。
+
+    neighbor_ids 为按相似度降序排列的单词ID数组（小端 uint32 字节串），
+    threshold 为第 k 个近邻的相似度，近邻不足 k 个时为 0，用于增量更新时判断是否需要重算。
+    """
+    word = models.OneToOneField(Word, on_delete=models.CASCADE, primary_key=True,
+                                related_name='definition_neighbors', verbose_name="单词")
+    neighbor_ids = models.BinaryField(default=bytes, verbose_name="近邻单词ID")
+    threshold = models.FloatField(default=0.0, verbose_name="第 k 近邻相似度")
+    # 计算近邻时释义的哈希，释义修改后视为过期
+    definition_hash = models.CharField(max_length=40, verbose_name="释义哈希")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="计算时间")
+
+    class Meta:
+        verbose_name = "释义近邻"
+        verbose_name_plural = "释义近邻"
+
+    def __str__(self):
+        return f"{self.word_id}"
+
+
+class ReviewForecast(models.Model):
+    """
+    每个用户每天到期的复习单词数（按本地日期）。
+
+    由 learning.utils.review_forecast 在单词加入、删除和重新排期时增量维护，
+    rebuild_review_forecast 命令每晚用一次 GROUP BY 全量重建以纠正偏差。
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="用户")
+    day = models.DateField(verbose_name="到期日期")
+    due_count = models.PositiveIntegerField(default=0, verbose_name="到期单词数")
+
+    class Meta:
+        unique_together = ('user', 'day')
+        verbose_name = "复习量预测"
+        verbose_name_plural = "复习量预测"
+
+    def __str__(self):
+        return f"{self.user_id} - {self.day}: {self.due_count}"
+
+
+class DailyStats(models.Model):
+    """
+    每个用户每天的学习统计（按本地日期）。
+
+    由 process_feedback 在每次反馈后增量累加，rollup_daily_stats 命令可从 UserWord.history_intervals 回填。
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="用户")
+    day = models.DateField(verbose_name="日期")
+    reviews = models.PositiveIntegerField(default=0, verbose_name="复习次数")
+    correct = models.PositiveIntegerField(default=0, verbose_name="回答正确次数")
+    new_words = models.PositiveIntegerField(default=0, verbose_name="首次学习的单词数")
+    mastered = models.PositiveIntegerField(default=0, verbose_name="进入掌握阶段的单词数")
+    time_spent = models.PositiveIntegerField(default=0, verbose_name="学习时长（秒）")
+
+    class Meta:
+        unique_together = ('user', 'day')
+        verbose_name = "每日学习统计"
+        verbose_name_plural = "每日学习统计"
+
+    def __str__(self):
+        return f"{self.user_id} - {self.day}: {self.reviews}"
+
+    @property
+    def accuracy(self):
+        return self.correct / self.reviews if self.reviews else 0.0
+
+
+class WordDifficulty(models.Model):
+    """
+    单词在所有用户中的作答统计及由此估计的难度。
+
+    计数由 process_feedback 用 F 表达式累加；难度和新用户的初始强度由 update_word_difficulty 命令定期计算，
+    并批量写回尚未学习的 UserWord.initial_strength。
+    """
+    word = models.OneToOneField('Word', on_delete=models.CASCADE, primary_key=True,
+                                related_name='difficulty_stats', verbose_name="单词")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="作答次数")
+    first_attempts = models.PositiveIntegerField(default=0, verbose_name="首次作答次数")
+    first_errors = models.PositiveIntegerField(default=0, verbose_name="首次作答错误次数")
+    mastered = models.PositiveIntegerField(default=0, verbose_name="进入掌握阶段的次数")
+    reviews_to_mastery = models.PositiveIntegerField(default=0, verbose_name="进入掌握阶段前的复习次数合计")
+    # 相对难度，1 为平均水平；尚未计算时为空
+    difficulty = models.FloatField(null=True, blank=True, verbose_name="难度")
+    initial_strength = models.FloatField(default=DEFAULT_INITIAL_STRENGTH, verbose_name="建议初始强度")
+    estimated_at = models.DateTimeField(null=True, blank=True, verbose_name="估计时间")
+
+    class Meta:
+        verbose_name = "单词难度统计"
+        verbose_name_plural = "单词难度统计"
+
+    def __str__(self):
+        return f"{self.word_id}: {self.difficulty}"
@@ -12,6 +12,8 @@ import requests
 from lxml import html
 
 from learning.models import Word, AudioFile
+from learning.utils.audio_pack import get_audio_pack, packed_path
+from learning.utils.definition_neighbors import refresh_neighbors_for
 
 # Create your views here.
 
@@ -23,7 +25,13 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 """
 
 
-def word_card():
+def word_card(enriched_ids=None):
+    """
+    为一个缺少释义或发音的单词补全数据
+
+    enriched_ids 为列表时只记录补全了释义的单词 ID，由调用方在批量补全结束后统一更新释义近邻
+    （见 enrich_words）；否则立即更新该单词的释义近邻。
+    """
     start_time = time.time()
 
     try:
@@ -51,10 +59,14 @@ def word_card():
             try:
                 phonetic, chinese_meaning, uk_pronunciation_link, us_pronunciation_link = get_youdao_data(random_word)
                 if chinese_meaning:
-                    with transaction.atomic():
-                        random_word.definition = chinese_meaning
-                        random_word.phonetic = phonetic
-                        random_word.save()
+                    random_word.definition = chinese_meaning
+                    random_word.phonetic = phonetic
+                    random_word.save()
+                    # 释义变化后增量更新释义近邻
+                    if enriched_ids is None:
+                        refresh_neighbors_for([random_word.id])
+                    else:
+                        enriched_ids.append(random_word.id)
             except Exception as e:
                 logging.error(f"Failed to get Youdao data: {e}")
 
@@ -84,12 +96,29 @@ def word_card():
     return f"单词: {random_word.word}"
 
 
+def enrich_words(limit, delay=2):
+    """批量补全最多 limit 个单词，结束后对补全了释义的单词统一更新一次释义近邻，返回补全释义的单词数"""
+    enriched_ids = []
+    for _ in range(limit):
+        if not word_card(enriched_ids):
+            break
+        time.sleep(delay)
+    enriched_ids = sorted(set(enriched_ids))
+    if enriched_ids:
+        refresh_neighbors_for(enriched_ids)
+    return len(enriched_ids)
+
+
 def download_and_save_audio(url, word, language):
     try:
         logging.info("--------------------------------------------------")
         logging.info(f"下载音频 URL: {url}")
         logging.info("--------------------------------------------------")
 
+        if settings.AUDIO_PACK_ENABLED:
+            download_audio_into_pack(url, word, language)
+            return
+
         # 构建相对路径（相对于 MEDIA_ROOT）
         if language == "us":
             relative_path = f"audio/us/{word.word}.mp3"
@@ -158,6 +187,30 @@ def download_and_save_audio(url, word, language):
         logging.error(f"处理音频文件时发生未知异常: {e}")
 
 
+def download_audio_into_pack(url, word, language):
+    """下载音频并追加写入 pack 文件（AUDIO_PACK_ENABLED 开启时使用）"""
+    if AudioFile.objects.filter(word_text=word.word, language=language).exists():
+        logging.info(f"单词 {word.word} 的 {language} 发音已存在，跳过下载")
+        return
+
+    response = requests.get(url, timeout=10)
+    if response.status_code != 200:
+        logging.error(f"下载失败，状态码：{response.status_code}")
+        return
+
+    entry = get_audio_pack().add(response.content)
+    relative_path = packed_path(entry.sha256)
+    logging.info(f"音频已写入 pack 文件: {relative_path}")
+
+    with transaction.atomic():
+        if language == "uk":
+            word.phonetic_uk = relative_path
+        else:
+            word.phonetic_us = relative_path
+        word.save()
+        AudioFile.objects.create(word_text=word.word, file_path=relative_path, language=language)
+
+
 # 提供单词音频地址
 def get_audio_url(request, word):
     # audio_files = get_object_or_404(AudioFile, word_text=word)
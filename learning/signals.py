@@ -0,0 +1,37 @@
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate, post_save
+from django.dispatch import receiver
+
+from learning.models import UserWord, Word
+from learning.utils.fulltext import install_fulltext
+from learning.utils.request_metrics import install_dispatcher
+from learning.utils.review_forecast import add_due
+from learning.utils.word_forms import bump_forms_version
+
+
+@receiver(post_save, sender=Word)
+def word_saved(sender, instance, created, **kwargs):
+    """新增单词后让各进程重新加载词形映射（原形可以立即解析）"""
+    if created:
+        transaction.on_commit(bump_forms_version)
+
+
+@receiver(post_save, sender=UserWord)
+def user_word_saved(sender, instance, created, **kwargs):
+    """新加入学习记录的单词计入复习量预测（之后的排期变化由 process_feedback 维护）"""
+    if created:
+        add_due(instance.user_id, instance.next_review)
+
+
+@receiver(post_migrate)
+def ensure_fulltext(sender, using, **kwargs):
+    """SQLite 重建表时会丢失触发器，每次 migrate 后补齐全文检索的虚拟表和触发器"""
+    if sender.name == 'learning':
+        install_fulltext(connections[using])
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    """让请求指标能统计到异步视图在其他线程中执行的查询（见 learning.utils.request_metrics）"""
+    install_dispatcher(connection)
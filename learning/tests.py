@@ -1,8 +1,1188 @@
-from django.test import TestCase
-from learning.my_utils.init_db_and_audio import word_card
+import asyncio
+import base64
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+
+from learning.models import (
+    DEFAULT_INITIAL_STRENGTH, FEEDBACK_MAX_RETRIES, UNRANKED_FREQUENCY, FeedbackConflict,
+    Article, ArticleRecommendation, AudioCleanupTask, AudioFile, DailyStats, DailyTask, PackedAudio, ReviewForecast, TaskWord, UserWord,
+    Word, WordDifficulty, WordForm,
+)
+from learning.my_utils.init_db_and_audio import download_and_save_audio, enrich_words, word_card
+from learning.views import feedback_dedupe, sync_result_dedupe
+from learning.utils.article_recommendation import refresh_recommendations, stale_user_ids
+from learning.utils.audio_cleanup import process_cleanup_queue
+from learning.utils.audio_pack import get_audio_pack, packed_path
+from learning.utils.benchmark import compare_with_baseline, run_benchmarks
+from learning.utils.bktree import BKTree, get_spelling_index, levenshtein, rebuild_spelling_index, spelling_distractors
+from learning.utils.definition_neighbors import get_neighbor_ids, update_definition_neighbors
+from learning.utils.idempotency import DedupeStore, LocalDedupeCache, replay_response
+from learning.utils.inflection import generate_forms
+from learning.utils.learning_stats import current_streak, heatmap_weeks, last_answer_key, record_review
+from learning.utils.load_test import AsgiTransport, LoadStats, classify_error, saturation_level
+from learning.utils.profiler import StackSampler, list_profiles, save_profile
+from learning.utils.query_plan import HotQuery, check_hot_queries, plan_violations
+from learning.utils.request_metrics import QueryRecorder, registry
+from learning.utils.study_queue import requeue
+from learning.utils.review_forecast import count_by_day
+from learning.utils.review_load import balanced_next_review, build_histogram, get_histogram, interval_window, \
+    record_move
+from learning.utils.synthetic_data import clear_dataset, generate_dataset
+from learning.utils.word_deletion import bulk_delete_words
+from learning.utils.word_frequency import CountMinSketch
+from learning.utils.word_difficulty import estimate_all, rebuild_word_stats
+from learning.utils.word_forms import resolve
+
 
 class WordCardTests(TestCase):
     def test_word_card(self):
         result = word_card()
         self.assertIsNotNone(result)  # 根据实际需求添加断言
-        print(f'Test result: {result}')
\ No newline at end of file
+        print(f'Test result: {result}')
+
+    def test_enrich_words_refreshes_neighbors_once(self):
+        words = [Word.objects.create(word=text, definition='', example='') for text in ['apple', 'pear']]
+
+        def youdao(word):
+            # 模拟发音已下载，下一轮选择下一个单词
+            AudioFile.objects.create(word_text=word.word, file_path='', language='us')
+            return '', f'{word.word} 的释义', '', ''
+
+        with mock.patch('learning.my_utils.init_db_and_audio.get_youdao_data', side_effect=youdao), \
+                mock.patch('learning.my_utils.init_db_and_audio.refresh_neighbors_for') as refresh:
+            self.assertEqual(enrich_words(limit=5, delay=0), 2)
+        refresh.assert_called_once_with([word.id for word in words])
+
+    def test_command_enriches_words(self):
+        out = StringIO()
+        with mock.patch('learning.management.commands.run_my_script.enrich_words', return_value=3) as enrich:
+            call_command('run_my_script', enrich=5, delay=0, stdout=out)
+        enrich.assert_called_once_with(5, delay=0)
+        self.assertIn('3', out.getvalue())
+
+
+class BulkDeleteWordsTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_user('alice', password='pw')
+        self.task = DailyTask.objects.create(user=self.user)
+        self.words = []
+        for text in ['apple', 'banana', 'cherry']:
+            word = Word.objects.create(word=text, definition='', example='')
+            user_word = UserWord.objects.create(user=self.user, word=word)
+            TaskWord.objects.create(task=self.task, word=user_word)
+            relative_path = f'audio/us/{text}.mp3'
+            os.makedirs(os.path.join(self.media_root, 'audio/us'), exist_ok=True)
+            with open(os.path.join(self.media_root, relative_path), 'wb') as f:
+                f.write(b'mp3')
+            AudioFile.objects.create(word_text=text, file_path=relative_path, language='us')
+            self.words.append(word)
+
+    def test_delete_defers_file_removal_until_commit(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with self.captureOnCommitCallbacks() as callbacks:
+                deleted = bulk_delete_words(word_ids=[w.id for w in self.words[:2]], chunk_size=1)
+
+            self.assertEqual(deleted, 2)
+            # 每个分块登记两个回调：启动音频清理线程、递增词库版本号
+            self.assertEqual(len(callbacks), 4)
+            self.assertEqual(list(Word.objects.values_list('word', flat=True)), ['cherry'])
+            self.assertEqual(UserWord.objects.count(), 1)
+            self.assertEqual(TaskWord.objects.count(), 1)
+            self.assertEqual(AudioCleanupTask.objects.count(), 2)
+            # 文件在清理队列执行前仍然存在
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, 'audio/us/apple.mp3')))
+
+            self.assertEqual(process_cleanup_queue(), (2, 0))
+            # 重复执行是幂等的
+            self.assertEqual(process_cleanup_queue(), (0, 0))
+
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'audio/us/apple.mp3')))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, 'audio/us/cherry.mp3')))
+        self.assertEqual(AudioCleanupTask.objects.count(), 0)
+
+    def test_delete_by_queryset(self):
+        with self.captureOnCommitCallbacks():
+            deleted = bulk_delete_words(queryset=Word.objects.filter(word__startswith='b'))
+        self.assertEqual(deleted, 1)
+        self.assertFalse(AudioFile.objects.filter(word_text='banana').exists())
+
+    def test_view_rejects_unfiltered_delete(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/delete_words/', {'ids': [self.words[0].id]}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        invalid = [
+            {'filter': {'foo': 1}}, {'filter': {'keyword': ''}}, {'filter': {}}, ['apple'],
+            {'ids': 'apple'}, {'ids': [self.words[0].id, 'x']}, {'ids': [None]}, {'ids': [True]}, {'ids': {'1': 1}},
+            {'filter': {'rating': 'hard'}}, {'filter': {'keyword': ['a']}},
+        ]
+        for body in invalid:
+            response = self.client.post('/delete_words/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Word.objects.count(), 3)
+
+
+class PackedAudioTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            AUDIO_PACK_FILE=os.path.join(self.media_root, 'audio.pack'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_pack_dedupes_and_serves_ranges(self):
+        store = get_audio_pack()
+        first = store.add(b'0123456789')
+        second = store.add(b'abcdef')
+        self.assertEqual(store.add(b'0123456789').id, first.id)
+        self.assertEqual(second.offset, 10)
+        self.assertEqual(bytes(store.read(second)), b'abcdef')
+
+        url = '/media/' + packed_path(second.sha256)
+        response = self.client.get(url)
+        self.assertEqual(b''.join(response.streaming_content), b'abcdef')
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.get(url, HTTP_RANGE='bytes=2-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-3/6')
+        self.assertEqual(b''.join(response.streaming_content), b'cd')
+
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=9-').status_code, 416)
+
+    def test_download_appends_to_pack(self):
+        word = Word.objects.create(word='apple', definition='', example='')
+        response = mock.Mock(status_code=200, content=b'mp3-bytes')
+        with override_settings(AUDIO_PACK_ENABLED=True), \
+                mock.patch('learning.my_utils.init_db_and_audio.requests.get', return_value=response):
+            download_and_save_audio('https://example.com/apple.mp3', word, 'us')
+
+        packed = PackedAudio.objects.get()
+        self.assertEqual(packed.length, len(b'mp3-bytes'))
+        audio = AudioFile.objects.get(word_text='apple', language='us')
+        self.assertEqual(audio.file_path, packed_path(packed.sha256))
+        word.refresh_from_db()
+        self.assertEqual(word.phonetic_us, audio.file_path)
+
+    def test_pack_command_rewrites_paths(self):
+        os.makedirs(os.path.join(self.media_root, 'audio/us'))
+        for text in ['apple', 'apples']:
+            with open(os.path.join(self.media_root, f'audio/us/{text}.mp3'), 'wb') as f:
+                f.write(b'same-bytes')
+            AudioFile.objects.create(word_text=text, file_path=f'audio/us/{text}.mp3', language='us')
+            Word.objects.create(word=text, definition='', example='', phonetic_us=f'audio/us/{text}.mp3')
+
+        call_command('pack_audio_files', stdout=StringIO())
+
+        self.assertEqual(PackedAudio.objects.count(), 1)
+        digest = PackedAudio.objects.get().sha256
+        self.assertEqual(set(AudioFile.objects.values_list('file_path', flat=True)), {packed_path(digest)})
+        self.assertEqual(set(Word.objects.values_list('phonetic_us', flat=True)), {packed_path(digest)})
+
+
+class ServeAudioTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        os.makedirs(os.path.join(self.media_root, 'audio/us'))
+        with open(os.path.join(self.media_root, 'audio/us/apple.mp3'), 'wb') as f:
+            f.write(b'0123456789')
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = '/media/audio/us/apple.mp3'
+
+    def test_conditional_and_range_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+    def test_rejects_paths_outside_audio_tree(self):
+        self.assertEqual(self.client.get('/media/audio/../../etc/passwd').status_code, 404)
+        self.assertEqual(self.client.get('/media/audio/us/missing.mp3').status_code, 404)
+
+    @override_settings(AUDIO_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/audio/us/apple.mp3')
+        self.assertEqual(response.content, b'')
+
+
+class ReconcileAudioTests(TestCase):
+    def test_fixes_orphans_on_both_sides(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        os.makedirs(os.path.join(media_root, 'audio/us'))
+        for name in ['apple', 'stray']:
+            with open(os.path.join(media_root, f'audio/us/{name}.mp3'), 'wb') as f:
+                f.write(b'mp3')
+        Word.objects.create(word='apple', definition='', example='')
+        Word.objects.create(word='ghost', definition='', example='', phonetic_us='audio/us/ghost.mp3')
+        AudioFile.objects.create(word_text='ghost', file_path='audio/us/ghost.mp3', language='us')
+        AudioFile.objects.create(word_text='lost', file_path='audio/uk/lost.mp3', language='uk')
+
+        with override_settings(MEDIA_ROOT=media_root), self.captureOnCommitCallbacks():
+            call_command('reconcile_audio', workers=2, stdout=StringIO())
+
+        self.assertEqual(list(AudioFile.objects.values_list('file_path', flat=True)), ['audio/us/apple.mp3'])
+        self.assertEqual(Word.objects.get(word='apple').phonetic_us, 'audio/us/apple.mp3')
+        self.assertEqual(Word.objects.get(word='ghost').phonetic_us, '')
+        self.assertEqual(list(AudioCleanupTask.objects.values_list('file_path', flat=True)), ['audio/us/stray.mp3'])
+
+    def test_small_batches_cover_every_path(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        os.makedirs(os.path.join(media_root, 'audio/us'))
+        texts = ['apple', 'banana', 'cherry', 'date', 'elder']
+        for text in texts[:3]:
+            with open(os.path.join(media_root, f'audio/us/{text}.mp3'), 'wb') as f:
+                f.write(b'mp3')
+        for text in texts:
+            path = f'audio/us/{text}.mp3'
+            Word.objects.create(word=text, definition='', example='', phonetic_us=path)
+            AudioFile.objects.create(word_text=text, file_path=path, language='us')
+        AudioFile.objects.filter(word_text='banana').delete()
+
+        out = StringIO()
+        with override_settings(MEDIA_ROOT=media_root), self.captureOnCommitCallbacks():
+            call_command('reconcile_audio', workers=3, chunk_size=2, stdout=out)
+
+        self.assertEqual(sorted(AudioFile.objects.values_list('word_text', flat=True)), ['apple', 'banana', 'cherry'])
+        self.assertEqual(sorted(Word.objects.exclude(phonetic_us='').values_list('word', flat=True)),
+                         ['apple', 'banana', 'cherry'])
+        self.assertIn('orphan_rows: 2', out.getvalue())
+        self.assertIn('orphan_word_refs: 2', out.getvalue())
+        self.assertIn('adopted_files: 1', out.getvalue())
+
+    def test_missing_audio_root_aborts(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        Word.objects.create(word='apple', definition='', example='', phonetic_us='audio/us/apple.mp3')
+        AudioFile.objects.create(word_text='apple', file_path='audio/us/apple.mp3', language='us')
+
+        with override_settings(MEDIA_ROOT=media_root):
+            with self.assertRaises(CommandError):
+                call_command('reconcile_audio', stdout=StringIO())
+        self.assertEqual(AudioFile.objects.count(), 1)
+        self.assertEqual(Word.objects.get(word='apple').phonetic_us, 'audio/us/apple.mp3')
+
+
+class TaskBundleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        sync_result_dedupe.local.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        os.makedirs(os.path.join(self.media_root, 'audio/us'))
+        with open(os.path.join(self.media_root, 'audio/us/apple.mp3'), 'wb') as f:
+            f.write(b'apple-mp3')
+        self.user = User.objects.create_user('alice', password='pw')
+        for text in ['apple', 'banana']:
+            word = Word.objects.create(
+                word=text, definition='', example='',
+                phonetic_us='audio/us/apple.mp3' if text == 'apple' else '',
+            )
+            UserWord.objects.create(user=self.user, word=word)
+        self.client.force_login(self.user)
+
+    def test_bundle_and_sync(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.get('/task_bundle/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        bundle = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(bundle['cards']), 2)
+        self.assertEqual(base64.b64decode(bundle['audio']['audio/us/apple.mp3']), b'apple-mp3')
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            cached = self.client.get('/task_bundle/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        results = [{'id': f'r{card["id"]}', 'word_id': card['id'], 'action': 'know'} for card in bundle['cards']]
+        response = self.client.post(
+            '/sync_task_results/',
+            json.dumps({'task_id': bundle['task_id'], 'results': results[:1]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['applied'], 1)
+        # 离开页面时重发整批结果，已执行的部分被忽略
+        response = self.client.post(
+            '/sync_task_results/',
+            json.dumps({'task_id': bundle['task_id'], 'results': results}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'success': True, 'applied': 1, 'duplicates': 1, 'task_completed': True})
+        self.assertEqual(UserWord.objects.filter(review_count=1).count(), 2)
+
+        task_id = bundle['task_id']
+        invalid = [
+            [1, 2], 'x', {'task_id': task_id, 'results': [1]},
+            {'task_id': task_id, 'results': [{'id': 'r9', 'word_id': 'apple', 'action': 'know'}]},
+            {'task_id': task_id, 'results': [{'id': 'r9', 'action': 'know'}]},
+            {'task_id': task_id, 'results': [{'id': 'r9', 'word_id': 1, 'action': 'maybe'}]},
+            {'task_id': task_id, 'results': [{'id': 9, 'word_id': 1, 'action': 'know'}]},
+        ]
+        for body in invalid:
+            response = self.client.post('/sync_task_results/', json.dumps(body), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_bundle_rebuilt_after_word_edit(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            etag = self.client.get('/task_bundle/')['ETag']
+            Word.objects.filter(word='banana').update(definition='香蕉')
+            response = self.client.get('/task_bundle/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        bundle = json.loads(response.content)
+        self.assertIn('香蕉', [card['definition'] for card in bundle['cards']])
+
+
+class ReadingPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        apple = Word.objects.create(word='apple', definition='', example='')
+        Word.objects.create(word='tree', definition='', example='')
+        UserWord.objects.create(user=self.user, word=apple, review_count=2, memory_phase='mastered',
+                                next_review=timezone.now() + timedelta(days=3))
+        self.article = Article.objects.create(
+            title='Apples', content='An Apple fell from the tree.\nApple pie!', difficulty='1'
+        )
+        self.client.force_login(self.user)
+
+    def test_annotates_with_constant_queries(self):
+        self.client.get(f'/reading/{self.article.id}/')  # 首次访问建立索引
+        self.article.refresh_from_db()
+        self.assertEqual(len(self.article.vocab_index), 2)
+
+        with self.assertNumQueries(4):  # 会话、用户、文章、单词状态
+            response = self.client.get(f'/reading/{self.article.id}/')
+        self.assertEqual(response.context['summary'], {'due': 0, 'learning': 0, 'mastered': 1, 'unseen': 1})
+        self.assertContains(response, 'class="word-mastered" data-word-id', count=2)
+        self.assertContains(response, 'class="word-unseen" data-word-id', count=1)
+
+
+class WordFormTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_forms(self):
+        self.assertTrue({'run', 'runs', 'running', 'ran'} <= generate_forms('run'))
+        self.assertTrue({'study', 'studies', 'studied', 'studying'} <= generate_forms('study'))
+        self.assertTrue({'make', 'making', 'made'} <= generate_forms('Make'))
+        self.assertEqual(generate_forms('ice cream'), {'ice cream'})
+
+    def test_resolve_prefers_lemma(self):
+        see = Word.objects.create(word='see', definition='', example='')
+        saw = Word.objects.create(word='saw', definition='', example='')
+        run = Word.objects.create(word='run', definition='', example='')
+        call_command('build_word_forms', stdout=StringIO())
+        cache.clear()  # 测试事务不会提交，手动让映射失效
+        self.assertTrue(WordForm.objects.filter(form='running', word=run).exists())
+
+        self.assertEqual(
+            resolve(['Running', 'ran', 'saw', 'seen', 'unknown']),
+            [run.id, run.id, saw.id, see.id, None],
+        )
+
+
+class ArticleRecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        words = {text: Word.objects.create(word=text, definition='', example='') for text in ['cat', 'dog', 'fox']}
+        for text in ['cat', 'dog']:
+            UserWord.objects.create(user=self.user, word=words[text], review_count=3, memory_phase='mastered')
+        self.easy = Article.objects.create(title='Easy', content='cat dog cat dog', difficulty='3')
+        self.hard = Article.objects.create(title='Hard', content='fox fox fox cat', difficulty='1')
+
+    def test_ranks_by_coverage_and_refreshes_incrementally(self):
+        self.assertEqual(stale_user_ids(), [self.user.id])
+        self.assertEqual(refresh_recommendations(), 1)
+
+        recommendations = list(ArticleRecommendation.objects.filter(user=self.user).order_by('rank'))
+        self.assertEqual([r.article_id for r in recommendations], [self.easy.id, self.hard.id])
+        self.assertEqual(recommendations[0].coverage, 1.0)
+        self.assertEqual(recommendations[1].coverage, 0.25)
+        self.assertEqual(stale_user_ids(), [])
+
+    def test_user_matrix_queries_word_ids_in_chunks(self):
+        with mock.patch('learning.utils.article_recommendation.WORD_ID_CHUNK_SIZE', 1):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(refresh_recommendations(), 1)
+        # 文章中出现 3 个不同单词，每块一个 id
+        user_word_queries = [q['sql'] for q in queries if 'FROM "learning_userword"' in q['sql']]
+        self.assertEqual(len(user_word_queries), 3)
+        coverage = dict(ArticleRecommendation.objects.filter(user=self.user).values_list('article_id', 'coverage'))
+        self.assertEqual(coverage, {self.easy.id: 1.0, self.hard.id: 0.25})
+
+
+class WordFrequencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_count_min_sketch_never_underestimates(self):
+        sketch = CountMinSketch(width=64, depth=3)
+        for key in range(200):
+            sketch.add(key, count=key % 7)
+        self.assertTrue(all(sketch.estimate(key) >= key % 7 for key in range(200)))
+
+    def test_new_words_follow_corpus_frequency(self):
+        user = User.objects.create_user('alice', password='pw')
+        for text in ['zebra', 'the', 'cat']:
+            UserWord.objects.create(user=user, word=Word.objects.create(word=text, definition='', example=''),
+                                    next_review=timezone.now() + timedelta(days=1))
+        Article.objects.create(title='a', content='The cat saw the cats. The end.', difficulty='1')
+
+        call_command('build_word_frequency', stdout=StringIO())
+        ranks = dict(Word.objects.values_list('word', 'frequency_rank'))
+        self.assertEqual(ranks, {'the': 1, 'cat': 2, 'zebra': UNRANKED_FREQUENCY})
+
+        self.client.force_login(user)
+        self.client.get('/word_card/')
+        task_words = TaskWord.objects.filter(task__user=user).order_by('id')
+        self.assertEqual([tw.word.word.word for tw in task_words], ['the', 'cat', 'zebra'])
+
+
+class FullTextSearchTests(TestCase):
+    def test_search_examples_and_articles(self):
+        Word.objects.create(word='run', definition='', example='She is running <fast> to school.')
+        word = Word.objects.create(word='walk', definition='', example='We walk home.')
+        Article.objects.create(title='Morning', content='Runners run every morning.', difficulty='1')
+
+        response = self.client.get('/search/', {'q': 'runs'})
+        data = response.json()
+        self.assertEqual([r['word'] for r in data['examples']], ['run'])
+        self.assertIn('<mark>running</mark>', data['examples'][0]['snippet'])
+        self.assertIn('&lt;fast&gt;', data['examples'][0]['snippet'])
+        self.assertEqual([r['title'] for r in data['articles']], ['Morning'])
+
+        # 触发器同步更新和删除
+        Word.objects.filter(id=word.id).update(example='They ran away.')
+        self.assertEqual(self.client.get('/search/', {'q': 'walk', 'scope': 'examples'}).json()['examples'], [])
+        Word.objects.filter(word='run').delete()
+        self.assertEqual(self.client.get('/search/', {'q': 'running"', 'scope': 'examples'}).json()['examples'], [])
+
+
+class SpellingQuizTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        for text in ['apple', 'apply', 'ample', 'maple', 'banana']:
+            Word.objects.create(word=text, definition=f'{text} definition', example='')
+        UserWord.objects.create(user=self.user, word=Word.objects.get(word='apple'))
+        self.client.force_login(self.user)
+        # 后台重建线程看不到测试事务中的数据，这里同步构建
+        rebuild_spelling_index()
+
+    def test_bktree_distractors(self):
+        tree = BKTree()
+        for text in ['apple', 'apply', 'ample', 'maple', 'banana']:
+            tree.add(text)
+        self.assertEqual(tree.search('appel', 2), [(2, 'apple'), (2, 'apply')])
+        self.assertEqual(levenshtein('kitten', 'sitting'), 3)
+
+        distractors = spelling_distractors('apple')
+        self.assertEqual(len(distractors), 3)
+        self.assertNotIn('apple', distractors)
+        self.assertNotIn('banana', distractors)
+
+    def test_vocabulary_change_rebuilds_off_request(self):
+        old_tree = get_spelling_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            Word.objects.create(word='appla', definition='appla definition', example='')
+        with mock.patch('learning.utils.bktree.start_rebuild_worker') as start:
+            self.assertIs(get_spelling_index(), old_tree)
+        start.assert_called_once_with()
+
+        tree = rebuild_spelling_index()
+        self.assertIsNot(tree, old_tree)
+        self.assertIn((1, 'appla'), tree.search('apple', 1))
+        with mock.patch('learning.utils.bktree.start_rebuild_worker') as start:
+            self.assertIs(get_spelling_index(), tree)
+        start.assert_not_called()
+
+    def test_quiz_answer_checked_on_server(self):
+        response = self.client.get('/quiz/')
+        self.assertContains(response, 'apple definition')
+        self.assertEqual(len(response.context['options']), 4)
+
+        task_id = response.context['task_id']
+        word_id = response.context['word_id']
+        response = self.client.post(
+            '/quiz/answer/',
+            json.dumps({'task_id': task_id, 'word_id': word_id, 'choice': 'apply'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['correct'], False)
+        self.assertEqual(response.json()['answer'], 'apple')
+        self.assertEqual(TaskWord.objects.get(task_id=task_id).status, 'retry')
+
+        response = self.client.post(
+            '/quiz/answer/',
+            json.dumps({'task_id': task_id, 'word_id': word_id, 'choice': 'Apple'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['correct'], True)
+        self.assertTrue(response.json()['task_completed'])
+        self.assertEqual(UserWord.objects.get(user=self.user).review_count, 2)
+
+
+class DefinitionNeighborTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        definitions = {
+            'apple': 'n. 苹果；苹果树',
+            'pear': 'n. 梨；梨树',
+            'peach': 'n. 桃；桃树',
+            'run': 'v. 跑；奔跑',
+            'walk': 'v. 走；散步',
+        }
+        for text, definition in definitions.items():
+            Word.objects.create(word=text, definition=definition, example='')
+
+    def neighbors(self, text):
+        return [Word.objects.get(id=i).word for i in get_neighbor_ids(Word.objects.get(word=text).id, 2)]
+
+    def test_neighbors_and_incremental_update(self):
+        self.assertEqual(update_definition_neighbors(top_k=2), 5)
+        self.assertEqual(set(self.neighbors('apple')), {'pear', 'peach'})
+        self.assertEqual(self.neighbors('run')[0], 'walk')
+        self.assertEqual(update_definition_neighbors(), 0)
+
+        # 修改释义后只重算受影响的单词
+        Word.objects.filter(word='walk').update(definition='n. 李子；李子树')
+        self.assertLess(update_definition_neighbors(top_k=2), 5)
+        self.assertTrue(set(self.neighbors('walk')) <= {'apple', 'pear', 'peach'})
+        self.assertNotIn('walk', self.neighbors('run'))
+
+    def test_meaning_quiz(self):
+        update_definition_neighbors()
+        UserWord.objects.create(user=self.user, word=Word.objects.get(word='apple'))
+        self.client.force_login(self.user)
+
+        response = self.client.get('/quiz/meaning/')
+        labels = [option['label'] for option in response.context['options']]
+        self.assertEqual(len(labels), 4)
+        self.assertIn('n. 苹果；苹果树', labels)
+        self.assertIn('n. 梨；梨树', labels)
+
+        response = self.client.post(
+            '/quiz/answer/',
+            json.dumps({
+                'task_id': response.context['task_id'],
+                'word_id': response.context['word_id'],
+                'mode': 'meaning',
+                'choice': str(Word.objects.get(word='apple').id),
+            }),
+            content_type='application/json',
+        )
+        self.assertTrue(response.json()['correct'])
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user('alice', password='pw')
+        for text in ['apple', 'banana', 'cherry']:
+            Word.objects.create(word=text, definition='', example='')
+
+    @override_settings(REQUEST_METRICS_BUDGETS={'default': {'queries': 1}})
+    def test_records_queries_and_exposes_metrics(self):
+        with self.assertLogs(level='WARNING') as logs:
+            self.client.get('/words/')
+        self.assertTrue(any('word_list' in line for line in logs.output))
+
+        metrics = registry.views['word_list']
+        self.assertEqual(metrics.queries.count, 1)
+        self.assertGreater(metrics.queries.sum, 1)
+        self.assertEqual(metrics.budget_violations, 1)
+
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        body = self.client.get('/metrics/').content.decode()
+        self.assertIn('learning_request_queries_count{view="word_list"} 1', body)
+        self.assertIn('learning_request_duration_seconds_bucket{view="word_list",le="+Inf"} 1', body)
+
+    def test_duplicate_signatures(self):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for word in Word.objects.all():
+                Word.objects.filter(id=word.id).exists()
+        self.assertEqual(list(recorder.duplicates().values()), [3])
+
+
+class BenchmarkTests(TestCase):
+    def test_synthetic_dataset_is_reproducible(self):
+        counts = generate_dataset(users=3, words=50, seed=1, prefix='t')
+        self.assertEqual(counts['users'], 3)
+        self.assertEqual(UserWord.objects.count(), counts['user_words'])
+        first = list(UserWord.objects.order_by('id').values_list('review_count', 'memory_phase'))
+        self.assertEqual(clear_dataset('t'), (3, 50))
+
+        generate_dataset(users=3, words=50, seed=1, prefix='t')
+        self.assertEqual(list(UserWord.objects.order_by('id').values_list('review_count', 'memory_phase')), first)
+
+    def test_runner_and_baseline_comparison(self):
+        results = run_benchmarks(scales=[(2, 30)], cases=['get_due_words', 'word_list'], iterations=3)
+        self.assertEqual(set(results), {'get_due_words@2x30', 'word_list@2x30'})
+        self.assertFalse(User.objects.filter(username__startswith='bench_').exists())
+        self.assertEqual(compare_with_baseline(results, results), [])
+
+        baseline = {key: dict(stats, queries_per_op=stats['queries_per_op'] - 1) for key, stats in results.items()}
+        regressions = compare_with_baseline(results, baseline)
+        self.assertEqual({item['metric'] for item in regressions}, {'queries_per_op'})
+
+
+class LoadTestHarnessTests(TestCase):
+    def test_asgi_transport_and_error_classification(self):
+        async def app(scope, receive, send):
+            message = await receive()
+            status = 500 if scope['path'] == '/locked/' else 200
+            body = b'database is locked' if status == 500 else message['body']
+            await send({'type': 'http.response.start', 'status': status,
+                        'headers': [(b'Set-Cookie', b'sessionid=abc; Path=/')]})
+            await send({'type': 'http.response.body', 'body': body})
+
+        transport = AsgiTransport(app)
+        response = asyncio.run(transport.request('POST', '/echo/?x=1', [], b'hello'))
+        self.assertEqual((response.status, response.body), (200, b'hello'))
+        self.assertEqual(response.cookies(), ['sessionid=abc; Path=/'])
+        locked = asyncio.run(transport.request('GET', '/locked/', []))
+        self.assertEqual(classify_error(locked), 'database_locked')
+        self.assertIsNone(classify_error(response))
+
+    def test_summary_and_saturation(self):
+        stats = LoadStats()
+        for i in range(10):
+            stats.record('word_card', 0.01 * (i + 1), 'http_500' if i == 9 else None)
+        summary = stats.summary(2.0)
+        self.assertEqual((summary['throughput'], summary['error_rate'], summary['p50_ms']), (5.0, 0.1, 50.0))
+
+        levels = [
+            {'concurrency': 1, 'throughput': 100, 'error_rate': 0},
+            {'concurrency': 2, 'throughput': 180, 'error_rate': 0},
+            {'concurrency': 4, 'throughput': 185, 'error_rate': 0},
+        ]
+        self.assertEqual(saturation_level(levels), 4)
+        self.assertIsNone(saturation_level(levels[:2]))
+
+
+class AsyncStudyViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.word = Word.objects.create(word='apple', definition='苹果', example='')
+        UserWord.objects.create(user=self.user, word=self.word)
+
+    async def test_card_and_feedback(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/async/word_card/')
+        self.assertContains(response, 'apple')
+        self.assertContains(response, '/async/handle_feedback/')
+
+        task_id = response.context['task_id']
+        word_id = response.context['word']['id']
+        response = await self.async_client.post(
+            '/async/handle_feedback/', {'task_id': task_id, 'word_id': word_id, 'action': 'know'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['task_completed'], True)
+        self.assertEqual(await TaskWord.objects.filter(task_id=task_id, status='known').acount(), 1)
+        # 异步视图在其他线程执行的查询也计入请求指标
+        self.assertGreater(registry.views['handle_feedback_async'].queries.sum, 0)
+
+        response = await self.async_client.get('/async/word_card/')
+        self.assertTemplateUsed(response, 'learning/review_complete.html')
+
+    async def test_audio_url_cached(self):
+        await AudioFile.objects.acreate(word_text='apple', language='us', file_path='audio/apple_us.mp3')
+        response = await self.async_client.get('/async/audio/apple/')
+        self.assertEqual(response.json(), {'audio_url': 'audio/apple_us.mp3'})
+        await AudioFile.objects.all().adelete()
+        self.assertEqual((await self.async_client.get('/async/audio/apple/')).status_code, 200)
+        self.assertEqual((await self.async_client.get('/async/audio/pear/')).status_code, 404)
+
+
+class OptimisticFeedbackTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        self.user_word = UserWord.objects.create(
+            user=self.user, word=Word.objects.create(word='apple', definition='苹果', example='')
+        )
+
+    def test_conditional_update(self):
+        stale = UserWord.objects.get(pk=self.user_word.pk)
+        self.user_word.process_feedback(True)
+        self.assertEqual(self.user_word.version, 1)
+
+        # 过期实例更新冲突后重新读取，在最新状态上继续计算
+        stale.process_feedback(False)
+        self.assertEqual((stale.version, stale.review_count, stale.error_count), (2, 2, 1))
+        self.assertEqual(len(UserWord.objects.get(pk=stale.pk).history_intervals), 2)
+
+    def test_writes_only_changed_fields(self):
+        # 新单词第一次答对：错误次数和记忆阶段不变，不写回
+        with CaptureQueriesContext(connection) as queries:
+            self.user_word.process_feedback(True)
+        update = next(q['sql'] for q in queries if q['sql'].startswith('UPDATE "learning_userword"'))
+        self.assertIn('"history_intervals"', update)
+        self.assertNotIn('"error_count"', update)
+        self.assertNotIn('"memory_phase"', update)
+
+    @override_settings(REVIEW_LOAD_BALANCING=True)
+    def test_parallel_answers_not_lost(self):
+        # 每次冲突意味着另一个线程已经成功，线程数不超过最大尝试次数时每个回答都必然写入
+        answers = FEEDBACK_MAX_RETRIES
+        barrier = threading.Barrier(answers)
+        errors = []
+
+        def answer(is_correct):
+            try:
+                user_word = UserWord.objects.get(pk=self.user_word.pk)
+                barrier.wait()
+                user_word.process_feedback(is_correct)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=answer, args=(i % 2 == 0,)) for i in range(answers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        user_word = UserWord.objects.get(pk=self.user_word.pk)
+        self.assertEqual((user_word.review_count, user_word.version), (answers, answers))
+        self.assertEqual(len(user_word.history_intervals), answers)
+        self.assertEqual(sum(entry['correct'] for entry in user_word.history_intervals), (answers + 1) // 2)
+        # 派生计数与 UserWord 在同一个事务中提交，锁冲突重试后不会丢失
+        self.assertEqual(DailyStats.objects.get(user=self.user).reviews, answers)
+        self.assertEqual(WordDifficulty.objects.get(word=user_word.word).attempts, answers)
+        self.assertEqual(
+            dict(ReviewForecast.objects.filter(due_count__gt=0).values_list('day', 'due_count')),
+            {timezone.localtime(user_word.next_review).date(): 1},
+        )
+
+
+class IdempotentFeedbackTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        feedback_dedupe.local.clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        for text in ['apple', 'banana']:
+            UserWord.objects.create(user=self.user, word=Word.objects.create(word=text, definition='', example=''))
+        self.client.force_login(self.user)
+
+    def post_feedback(self, word_id, key, path='/handle_feedback/'):
+        return self.client.post(
+            path, {'task_id': self.task_id, 'word_id': word_id, 'action': 'know'},
+            content_type='application/json', headers={'Idempotency-Key': key},
+        )
+
+    def test_replay_returns_cached_response(self):
+        response = self.client.get('/word_card/')
+        self.task_id = response.context['task_id']
+        word_id = response.context['word']['id']
+        key = response.context['feedback_key']
+
+        first = self.post_feedback(word_id, key)
+        # 同步和异步视图共用去重存储
+        for path in ['/handle_feedback/', '/async/handle_feedback/']:
+            replay = self.post_feedback(word_id, key, path)
+            self.assertEqual(replay['Idempotent-Replay'], 'true')
+            self.assertEqual(replay.content, first.content)
+        self.assertEqual(UserWord.objects.get(pk=word_id).review_count, 1)
+
+        # 进程内缓存失效后仍可从缓存后端命中；新的键照常处理
+        feedback_dedupe.local.clear()
+        self.assertEqual(self.post_feedback(word_id, key)['Idempotent-Replay'], 'true')
+        self.assertNotIn('Idempotent-Replay', self.post_feedback(word_id, 'another-key'))
+        self.assertEqual(UserWord.objects.get(pk=word_id).review_count, 2)
+
+    def test_retryable_failure_releases_key(self):
+        response = self.client.get('/word_card/')
+        self.task_id = response.context['task_id']
+        word_id = response.context['word']['id']
+        key = response.context['feedback_key']
+
+        with mock.patch.object(UserWord, 'process_feedback', side_effect=FeedbackConflict('conflict')):
+            self.assertEqual(self.post_feedback(word_id, key).status_code, 409)
+        with mock.patch.object(UserWord, 'process_feedback', side_effect=OperationalError('database is locked')):
+            self.assertEqual(self.post_feedback(word_id, key).status_code, 400)
+        # 失败的响应没有保存，同一个键重试时照常处理
+        retry = self.post_feedback(word_id, key)
+        self.assertNotIn('Idempotent-Replay', retry)
+        self.assertTrue(json.loads(retry.content)['success'])
+        self.assertEqual(UserWord.objects.get(pk=word_id).review_count, 1)
+
+        # 确定性的 404 会被重放
+        self.task_id = 0
+        self.assertEqual(self.post_feedback(word_id, 'missing-task').status_code, 404)
+        self.assertEqual(self.post_feedback(word_id, 'missing-task')['Idempotent-Replay'], 'true')
+
+    def test_pending_and_local_eviction(self):
+        store = DedupeStore('test', ttl=60, local_size=2)
+        self.assertTrue(store.claim('1:a'))
+        self.assertFalse(store.claim('1:a'))
+        self.assertEqual(replay_response(store.lookup('1:a')).status_code, 409)
+
+        for key in ['1:a', '1:b', '1:c']:
+            store.store(key, 200, b'{}')
+        self.assertEqual(len(store.local), 2)
+        self.assertIsNone(store.local.get('1:a'))
+
+        expired = LocalDedupeCache(ttl=0)
+        expired.set('k', 'v')
+        self.assertIsNone(expired.get('k'))
+
+
+class StudyQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        for i in range(5):
+            UserWord.objects.create(user=self.user, word=Word.objects.create(word=f'w{i}', definition='', example=''))
+        self.client.force_login(self.user)
+
+    def test_requeue(self):
+        queue = deque([1, 2, 3, 4, 5])
+        self.assertEqual(list(requeue(queue, 1, False, 3)), [2, 3, 4, 1, 5])
+        self.assertEqual(list(requeue(queue, 2, True, 3)), [3, 4, 1, 5])
+        self.assertEqual(list(requeue(queue, 3, False, 10)), [4, 1, 5, 3])
+
+    @override_settings(STUDY_RELEARN_STEPS=2)
+    def test_forgotten_word_returns_after_steps(self):
+        def show_card():
+            response = self.client.get('/word_card/')
+            return response.context['task_id'], response.context['word']['id']
+
+        def answer(task_id, word_id, action):
+            self.client.post('/handle_feedback/', {'task_id': task_id, 'word_id': word_id, 'action': action},
+                             content_type='application/json')
+
+        task_id, forgotten = show_card()
+        # 回答之前刷新页面仍是同一张卡片
+        self.assertEqual(show_card(), (task_id, forgotten))
+        answer(task_id, forgotten, 'forget')
+        for _ in range(2):
+            _, word_id = show_card()
+            self.assertNotEqual(word_id, forgotten)
+            answer(task_id, word_id, 'know')
+        self.assertEqual(show_card()[1], forgotten)
+
+        # 缓存丢失后按 TaskWord 状态重建：已掌握的两个单词不再出现
+        cache.clear()
+        seen = set()
+        for _ in range(3):
+            _, word_id = show_card()
+            seen.add(word_id)
+            answer(task_id, word_id, 'know')
+        self.assertIn(forgotten, seen)
+        self.assertEqual(TaskWord.objects.filter(task_id=task_id, status='known').count(), 5)
+        self.assertTemplateUsed(self.client.get('/word_card/'), 'learning/review_complete.html')
+
+
+class ReviewLoadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.now = timezone.now()
+
+    def add_words(self, count, due_in_days, interval_days=None):
+        for _ in range(count):
+            word = Word.objects.create(word=f'w{Word.objects.count()}', definition='', example='')
+            user_word = UserWord.objects.create(
+                user=self.user, word=word, next_review=self.now + timedelta(days=due_in_days)
+            )
+            UserWord.objects.filter(pk=user_word.pk).update(
+                last_review=self.now + timedelta(days=due_in_days - (interval_days or due_in_days)),
+            )
+
+    def test_picks_least_loaded_day(self):
+        self.add_words(3, 9)
+        self.add_words(3, 10)
+        self.add_words(1, 11)
+        self.assertEqual(interval_window(10, 0.1), (9, 11))
+        chosen = balanced_next_review(self.user.id, 10, self.now)
+        self.assertEqual((chosen - self.now).days, 11)
+
+        # 增量维护：从第 11 天移到第 9 天
+        record_move(self.user.id, chosen, self.now + timedelta(days=9))
+        histogram = get_histogram(self.user.id)
+        today = timezone.localdate(self.now).toordinal()
+        self.assertEqual((histogram[today + 9], histogram.get(today + 11, 0)), (4, 0))
+
+    def test_balancing_off_by_default(self):
+        self.add_words(1, 0, interval_days=1)
+        user_word = UserWord.objects.get(user=self.user)
+        with mock.patch('learning.utils.review_load.balanced_next_review') as balanced, \
+                mock.patch('learning.utils.review_load.record_move') as move:
+            user_word.process_feedback(True)
+        balanced.assert_not_called()
+        move.assert_not_called()
+
+    @override_settings(REVIEW_LOAD_BALANCING=True)
+    def test_feedback_updates_histogram(self):
+        self.add_words(1, 0, interval_days=1)
+        get_histogram(self.user.id)
+        user_word = UserWord.objects.get(user=self.user)
+        user_word.process_feedback(True)
+        self.assertEqual(get_histogram(self.user.id), build_histogram(self.user.id))
+
+    def test_smoothing_command_flattens_review_wall(self):
+        self.add_words(20, 20, interval_days=40)
+        out = StringIO()
+        call_command('smooth_review_load', '--fuzz', '0.1', stdout=out)
+        self.assertIn('单日峰值 20 → 3', out.getvalue())
+        self.assertLessEqual(max(build_histogram(self.user.id).values()), 3)
+        self.assertEqual(UserWord.objects.filter(user=self.user, version=1).count(), 20 - 3)
+
+
+class ReviewForecastTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.now = timezone.now()
+        self.user_words = [
+            UserWord.objects.create(
+                user=self.user, next_review=self.now + timedelta(days=offset),
+                word=Word.objects.create(word=f'w{i}', definition='', example=''),
+            )
+            for i, offset in enumerate([0, 1, 1, 3, -2])
+        ]
+        self.client.force_login(self.user)
+
+    def assert_in_sync(self):
+        stored = {(row.user_id, row.day): row.due_count for row in ReviewForecast.objects.filter(due_count__gt=0)}
+        self.assertEqual(stored, dict(count_by_day()))
+
+    def test_incremental_maintenance_and_endpoint(self):
+        self.assert_in_sync()
+        self.user_words[0].process_feedback(True)
+        self.assert_in_sync()
+        bulk_delete_words([self.user_words[1].word_id])
+        self.assert_in_sync()
+
+        data = self.client.get('/forecast/', {'days': 5}).json()
+        self.assertEqual(data['overdue'], 1)
+        self.assertEqual(len(data['days']), 5)
+        self.assertEqual(data['days'][0]['date'], timezone.localdate().isoformat())
+        self.assertEqual(sum(day['due'] for day in data['days']), 3)
+
+        self.assertEqual(self.client.get('/forecast/', {'days': 0}).status_code, 400)
+        self.assertEqual(self.client.get('/forecast/', {'user': 'admin'}).status_code, 403)
+
+    def test_rebuild_corrects_drift(self):
+        UserWord.objects.filter(pk=self.user_words[3].pk).update(next_review=self.now + timedelta(days=10))
+        out = StringIO()
+        call_command('rebuild_review_forecast', stdout=out)
+        self.assertIn('其中 2 行与增量结果不一致', out.getvalue())
+        self.assert_in_sync()
+
+
+class LearningStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.user_words = [
+            UserWord.objects.create(user=self.user, word=Word.objects.create(word=text, definition='', example=''))
+            for text in ['apple', 'banana']
+        ]
+
+    def test_incremental_rollup_matches_backfill(self):
+        for is_correct in [True, True, True, True]:
+            self.user_words[0].process_feedback(is_correct)
+        self.user_words[1].process_feedback(False)
+
+        stats = DailyStats.objects.get(user=self.user)
+        self.assertEqual(
+            (stats.reviews, stats.correct, stats.new_words, stats.mastered),
+            (5, 4, 2, 1),
+        )
+        incremental = list(DailyStats.objects.values_list('day', 'reviews', 'correct', 'new_words', 'mastered'))
+
+        call_command('rollup_daily_stats', stdout=StringIO())
+        self.assertEqual(
+            list(DailyStats.objects.values_list('day', 'reviews', 'correct', 'new_words', 'mastered')), incremental
+        )
+
+    def test_last_answer_time_moves_only_on_commit(self):
+        start = timezone.localtime().replace(hour=12, minute=0)
+        key = last_answer_key(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            record_review(self.user.id, start, True, True, False)
+        self.assertEqual(cache.get(key), start)
+
+        # 回滚的回答不推进上一次回答时间，重试时仍按原来的间隔计时
+        with self.assertRaises(OperationalError):
+            with transaction.atomic():
+                record_review(self.user.id, start + timedelta(seconds=30), True, False, False)
+                raise OperationalError('database is locked')
+        self.assertEqual(cache.get(key), start)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_review(self.user.id, start + timedelta(seconds=40), True, False, False)
+        self.assertEqual(DailyStats.objects.get(user=self.user).time_spent, 40)
+
+    def test_streak_and_heatmap(self):
+        today = timezone.localdate()
+        reviews = {today - timedelta(days=offset): 5 for offset in [1, 2, 3, 5]}
+        self.assertEqual(current_streak(reviews, today), 3)
+        weeks = heatmap_weeks(reviews, today, days=14)
+        cells = [cell for week in weeks for cell in week]
+        self.assertTrue(all(len(week) == 7 for week in weeks))
+        self.assertEqual(sum(cell['reviews'] for cell in cells), 20)
+
+    def test_dashboard_reads_rollups_only(self):
+        today = timezone.localdate()
+        for offset in range(10):
+            DailyStats.objects.create(user=self.user, day=today - timedelta(days=offset), reviews=10, correct=8,
+                                      time_spent=120)
+        self.client.force_login(self.user)
+        # 会话、用户、统计行各一次查询
+        with self.assertNumQueries(3):
+            response = self.client.get('/stats/')
+        self.assertEqual(response.context['streak'], 10)
+        self.assertEqual(response.context['totals']['accuracy'], 80)
+        self.assertEqual(response.context['totals']['minutes'], 20)
+
+
+class WordDifficultyTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'user{i}', password='pw') for i in range(4)]
+        self.easy = Word.objects.create(word='apple', definition='', example='')
+        self.hard = Word.objects.create(word='onomatopoeia', definition='', example='')
+
+    def answer(self, user, word, answers):
+        user_word, _ = UserWord.objects.get_or_create(user=user, word=word)
+        for is_correct in answers:
+            user_word.process_feedback(is_correct)
+
+    def test_counters_match_rebuild(self):
+        self.answer(self.users[0], self.easy, [True] * 4)
+        self.answer(self.users[1], self.hard, [False, True, True])
+
+        stats = WordDifficulty.objects.get(word=self.easy)
+        self.assertEqual(
+            (stats.attempts, stats.first_attempts, stats.first_errors, stats.mastered, stats.reviews_to_mastery),
+            (4, 1, 0, 1, 4),
+        )
+        fields = ('word_id', 'attempts', 'first_attempts', 'first_errors', 'mastered', 'reviews_to_mastery')
+        incremental = list(WordDifficulty.objects.order_by('word_id').values_list(*fields))
+        rebuild_word_stats()
+        self.assertEqual(list(WordDifficulty.objects.order_by('word_id').values_list(*fields)), incremental)
+
+    def test_hard_words_reseed_unseen_rows(self):
+        for user in self.users[:3]:
+            self.answer(user, self.easy, [True] * 4)
+            self.answer(user, self.hard, [False, False, True])
+        unseen_easy = UserWord.objects.create(user=self.users[3], word=self.easy)
+        unseen_hard = UserWord.objects.create(user=self.users[3], word=self.hard)
+        learned = UserWord.objects.get(user=self.users[0], word=self.hard)
+
+        words, updated = estimate_all()
+        self.assertEqual((words, updated), (2, 2))
+        unseen_easy.refresh_from_db()
+        unseen_hard.refresh_from_db()
+        self.assertGreater(unseen_easy.initial_strength, DEFAULT_INITIAL_STRENGTH)
+        self.assertLess(unseen_hard.initial_strength, DEFAULT_INITIAL_STRENGTH)
+        # 已学习的记录保持原值
+        self.assertEqual(UserWord.objects.get(pk=learned.pk).initial_strength, DEFAULT_INITIAL_STRENGTH)
+        # 再次执行时没有变化的行不会重复写入
+        self.assertEqual(estimate_all()[1], 0)
+
+        # 起步阶段难词的间隔更短，之后与初始强度无关
+        with mock.patch('learning.models.random.uniform', return_value=1.0):
+            unseen_easy.review_count = unseen_hard.review_count = 3
+            self.assertLess(unseen_hard._calculate_interval(), 4)
+            self.assertGreater(unseen_easy._calculate_interval(), 4)
+            unseen_easy.review_count = unseen_hard.review_count = 6
+            self.assertEqual(unseen_hard._calculate_interval(), 21)
+            self.assertEqual(unseen_easy._calculate_interval(), 21)
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+        self.staff = User.objects.create_user('admin', password='pw', is_staff=True)
+
+    def test_staff_flag_captures_and_lists_profile(self):
+        with override_settings(PROFILER_DIR=self.profile_dir, PROFILER_INTERVAL=0.001):
+            self.assertNotIn('X-Profile-Id', self.client.get('/words/'))
+
+            self.client.force_login(self.staff)
+            response = self.client.get('/words/', {'__profile': '1'})
+            name = response['X-Profile-Id']
+            self.assertContains(self.client.get('/profiles/'), 'word_list')
+
+            download = self.client.get(f'/profiles/{name}.folded')
+            self.assertEqual(download.status_code, 200)
+            self.assertEqual(self.client.get('/profiles/..%2Fsecret.folded').status_code, 404)
+
+    def test_sampler_and_rotation(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.001).start()
+        time.sleep(0.05)
+        counts = sampler.stop()
+        self.assertTrue(any('test_sampler_and_rotation' in stack for stack in counts))
+
+        for i in range(3):
+            save_profile(counts, {'view': 'x', 'started_at': i}, self.profile_dir, max_files=2)
+        self.assertEqual(len(list_profiles(self.profile_dir)), 2)
+        self.assertEqual(len(os.listdir(self.profile_dir)), 4)
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_expected_indexes(self):
+        failures = check_hot_queries()
+        message = '\n'.join(
+            f"{name}: {'; '.join(problems)}\n    计划: {plan}" for name, (plan, problems) in failures.items()
+        )
+        self.assertEqual(failures, {}, message)
+
+    def test_detects_temp_sort(self):
+        query = HotQuery('unindexed', lambda: Word.objects.order_by('definition'), (), True, False)
+        plan, problems = plan_violations(query)
+        self.assertTrue(any('USE TEMP B-TREE' in line for line in plan))
+        self.assertEqual(len(problems), 1)
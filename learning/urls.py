@@ -4,6 +4,7 @@ from django.conf.urls.static import static
 from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import path
 from . import views
+from .utils.audio_pack import PACK_PATH_PREFIX
 
 # 定义URL模式列表，用于映射URL到视图函数
 urlpatterns = [
@@ -13,14 +14,37 @@ urlpatterns = [
     path('', views.home, name='home'),  # 首页
     path('words/', views.word_list, name='word_list'),  # 单词列表页
     path('word_card/', views.word_card, name='word_card'),  # 单词卡片页
+    path('quiz/', views.quiz, name='quiz'),  # 拼写测验
+    path('quiz/meaning/', views.quiz, {'mode': 'meaning'}, name='meaning_quiz'),  # 释义测验
+    path('quiz/answer/', views.quiz_answer, name='quiz_answer'),
     path('reading/', views.reading_page, name='reading_page'),  # 阅读页
+    path('metrics/', views.metrics, name='metrics'),  # Prometheus 请求指标
+    path('forecast/', views.review_forecast, name='review_forecast'),  # 未来每天的复习量
+    path('stats/', views.stats_dashboard, name='stats_dashboard'),  # 学习统计
+    path('profiles/', views.profile_list, name='profile_list'),  # 请求采样分析结果
+    path('profiles/<str:name>.folded', views.profile_download, name='profile_download'),
+    path('search/', views.search, name='search'),  # 例句和文章全文检索
+    path('reading/<int:article_id>/', views.reading_page, name='reading_article'),  # 带词汇标注的文章
     path('add_words/', views.add_words, name='add_words'),  # 添加单词页面
     path('delete_word/<int:word_id>/', views.delete_word, name='delete_word'),
+    path('delete_words/', views.delete_words, name='delete_words'),  # 批量删除单词
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('register/', views.register, name='register'),
     path('audio/<str:word>/', views.get_audio_url, name='get_audio_url'),
     path('handle_feedback/', views.handle_feedback, name='handle_feedback'),
     path('get-next-word/', views.get_next_word, name='get_next_word'),
+    # 学习接口的异步版本，在 ASGI 部署下不占用同步视图的线程
+    path('async/word_card/', views.word_card_async, name='word_card_async'),
+    path('async/audio/<str:word>/', views.get_audio_url_async, name='get_audio_url_async'),
+    path('async/handle_feedback/', views.handle_feedback_async, name='handle_feedback_async'),
     path('daily/', views.daily_review, name='daily_review'),
+    path('offline/', views.offline_study, name='offline_study'),  # 离线学习页
+    path('task_bundle/', views.task_bundle, name='task_bundle'),  # 当日任务离线包
+    path('sync_task_results/', views.sync_task_results, name='sync_task_results'),  # 同步离线学习结果
+    # 打包音频：与 MEDIA_URL + AudioFile.file_path 保持一致，前端无需区分存储方式
+    path(f"{settings.MEDIA_URL.lstrip('/')}{PACK_PATH_PREFIX}<str:digest>.mp3", views.serve_packed_audio,
+         name='serve_packed_audio'),
+    # 音频文件：带缓存头、条件请求和 Range 支持，替代开发环境的 static() 媒体服务
+    path(f"{settings.MEDIA_URL.lstrip('/')}audio/<path:path>", views.serve_audio, name='serve_audio'),
 ]
@@ -0,0 +1,127 @@
+"""
+文章词汇标注
+
+- 正文切分为词元（单词与非单词片段交替），单词词元按出现顺序编号
+- 每篇文章只建立一次倒排索引 {单词ID: [位置, ...]}，保存在 Article.vocab_index 中
+- 渲染时用一次批量查询取出当前用户对索引中所有单词的学习状态
+"""
+import hashlib
+import re
+
+from django.utils import timezone
+
+from learning.models import UserWord
+from learning.utils.word_forms import resolve
+
+TOKEN_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
+
+# 单词状态：到期复习 / 学习中 / 已掌握 / 未学过
+STATE_DUE = 'due'
+STATE_LEARNING = 'learning'
+STATE_MASTERED = 'mastered'
+STATE_UNSEEN = 'unseen'
+
+
+def tokenize(text):
+    """
+    切分正文，返回 [(片段文本, 是否单词), ...]
+
+    片段按原文顺序首尾相接，拼接后与原文完全一致。
+    """
+    segments = []
+    last = 0
+    for match in TOKEN_RE.finditer(text):
+        if match.start() > last:
+            segments.append((text[last:match.start()], False))
+        segments.append((match.group(), True))
+        last = match.end()
+    if last < len(text):
+        segments.append((text[last:], False))
+    return segments
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def resolve_word_ids(tokens):
+    """把词元（含屈折形式）映射到单词ID，返回 {小写词元: 单词ID}"""
+    forms = list({token.lower() for token in tokens})
+    return {form: word_id for form, word_id in zip(forms, resolve(forms)) if word_id is not None}
+
+
+def build_article_index(article, save=True):
+    """为文章建立词汇倒排索引"""
+    words = [text for text, is_word in tokenize(article.content) if is_word]
+    mapping = resolve_word_ids(words)
+
+    index = {}
+    for position, token in enumerate(words):
+        word_id = mapping.get(token.lower())
+        if word_id is not None:
+            index.setdefault(str(word_id), []).append(position)
+
+    article.vocab_index = index
+    article.vocab_index_hash = content_hash(article.content)
+    if save:
+        article.save(update_fields=['vocab_index', 'vocab_index_hash'])
+    return index
+
+
+def ensure_article_index(article):
+    """索引缺失或正文已修改时重建索引"""
+    if article.vocab_index_hash != content_hash(article.content):
+        build_article_index(article)
+    return article.vocab_index
+
+
+def get_word_states(user, word_ids):
+    """一次查询取出用户对一批单词的学习状态，返回 {单词ID: 状态}"""
+    now = timezone.now()
+    states = {}
+    rows = UserWord.objects.filter(user=user, word_id__in=word_ids).values_list(
+        'word_id', 'next_review', 'memory_phase', 'review_count'
+    )
+    for word_id, next_review, memory_phase, review_count in rows:
+        if review_count == 0:
+            # 已加入学习计划但从未复习过
+            states[word_id] = STATE_UNSEEN
+        elif next_review <= now:
+            states[word_id] = STATE_DUE
+        elif memory_phase == 'mastered':
+            states[word_id] = STATE_MASTERED
+        else:
+            states[word_id] = STATE_LEARNING
+    return states
+
+
+def annotate_article(article, user):
+    """
+    返回带标注的片段列表 [{'text', 'word_id', 'state'}, ...] 和各状态的单词数量
+
+    查询次数与文章长度无关：索引有效时只有一次状态查询。
+    """
+    index = ensure_article_index(article)
+    position_to_word = {}
+    for word_id, positions in index.items():
+        for position in positions:
+            position_to_word[position] = int(word_id)
+
+    word_ids = [int(word_id) for word_id in index]
+    states = get_word_states(user, word_ids) if user.is_authenticated and word_ids else {}
+
+    segments = []
+    position = 0
+    for text, is_word in tokenize(article.content):
+        word_id = state = None
+        if is_word:
+            word_id = position_to_word.get(position)
+            if word_id is not None:
+                state = states.get(word_id, STATE_UNSEEN)
+            position += 1
+        segments.append({'text': text, 'word_id': word_id, 'state': state})
+
+    summary = {STATE_DUE: 0, STATE_LEARNING: 0, STATE_MASTERED: 0, STATE_UNSEEN: 0}
+    for word_id in word_ids:
+        summary[states.get(word_id, STATE_UNSEEN)] += 1
+    return segments, summary
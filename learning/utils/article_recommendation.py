@@ -0,0 +1,189 @@
+"""
+按用户的文章难度评估与推荐
+
+- 每篇文章表示为稀疏的 单词ID → 出现次数 向量（来自 Article.vocab_index）
+- 每个用户表示为 单词ID → 掌握程度 向量（0~1，来自 UserWord.memory_strength / memory_phase）
+- 用稀疏矩阵乘法一次算出一批用户对所有文章的覆盖率和陌生词密度
+- 覆盖率最接近 TARGET_COVERAGE（略高于舒适区的可理解输入）的文章排在最前
+
+依赖 NumPy / SciPy，只在批处理任务中使用，请求路径只读取 ArticleRecommendation 表。
+"""
+import logging
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max, OuterRef, Q, Subquery
+
+from learning.models import Article, ArticleRecommendation, UserWord
+from learning.utils.article_index import ensure_article_index
+
+# 理想的词汇覆盖率：大部分词认识，同时有少量生词可学
+TARGET_COVERAGE = 0.95
+# 记忆强度达到该值视为完全掌握
+FULL_STRENGTH = 10.0
+# 掌握程度低于该值的单词计为陌生词
+KNOWN_THRESHOLD = 0.5
+# 每个用户保存的推荐数量
+DEFAULT_TOP_N = 20
+# 每批计算的用户数量，控制稠密结果矩阵的大小
+USER_BATCH_SIZE = 256
+# 按单词 id 分块查询掌握程度：与一批用户 id 合计不超过 SQLite 的绑定参数上限（旧版本为 999）
+WORD_ID_CHUNK_SIZE = 500
+
+
+def _require_scientific_stack():
+    try:
+        import numpy as np
+        from scipy import sparse
+    except ImportError as e:
+        raise RuntimeError("文章推荐需要安装 numpy 和 scipy") from e
+    return np, sparse
+
+
+def build_article_matrix():
+    """
+    构建文章-单词计数矩阵，返回 (文章ID数组, 单词ID → 列号, CSR 矩阵)
+
+    索引缺失或过期的文章会先重建索引。
+    """
+    np, sparse = _require_scientific_stack()
+    article_ids = []
+    word_columns = {}
+    rows, cols, counts = [], [], []
+
+    for article in Article.objects.order_by('id').iterator(chunk_size=200):
+        index = ensure_article_index(article)
+        row = len(article_ids)
+        article_ids.append(article.id)
+        for word_id, positions in index.items():
+            col = word_columns.setdefault(int(word_id), len(word_columns))
+            rows.append(row)
+            cols.append(col)
+            counts.append(len(positions))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), (rows, cols)),
+        shape=(len(article_ids), len(word_columns)),
+    )
+    return np.asarray(article_ids, dtype=np.int64), word_columns, matrix
+
+
+def build_user_matrix(user_ids, word_columns):
+    """构建用户-单词掌握程度矩阵（只包含文章中出现过的单词）"""
+    np, sparse = _require_scientific_stack()
+    user_rows = {user_id: i for i, user_id in enumerate(user_ids)}
+    rows, cols, values = [], [], []
+
+    word_ids = list(word_columns)
+    for start in range(0, len(word_ids), WORD_ID_CHUNK_SIZE):
+        queryset = (
+            UserWord.objects
+            .filter(user_id__in=user_ids, word_id__in=word_ids[start:start + WORD_ID_CHUNK_SIZE],
+                    review_count__gt=0)
+            .values_list('user_id', 'word_id', 'memory_strength', 'memory_phase')
+        )
+        for user_id, word_id, strength, phase in queryset.iterator(chunk_size=5000):
+            known = 1.0 if phase == 'mastered' else min(1.0, strength / FULL_STRENGTH)
+            rows.append(user_rows[user_id])
+            cols.append(word_columns[word_id])
+            values.append(known)
+
+    return sparse.csr_matrix(
+        (np.asarray(values, dtype=np.float32), (rows, cols)),
+        shape=(len(user_ids), len(word_columns)),
+    )
+
+
+def score_articles(article_matrix, user_matrix):
+    """
+    计算每个用户对每篇文章的覆盖率和陌生词密度
+
+    返回两个 (用户数 × 文章数) 的稠密数组：
+    - coverage = Σ 次数 × 掌握程度 / Σ 次数
+    - unknown_density = 未掌握的不同单词数 / 文章词元数
+    """
+    np, sparse = _require_scientific_stack()
+    token_totals = np.asarray(article_matrix.sum(axis=1)).ravel()
+    safe_totals = np.where(token_totals > 0, token_totals, 1.0)
+
+    known_tokens = (user_matrix @ article_matrix.T).toarray()
+    coverage = known_tokens / safe_totals
+
+    presence = article_matrix.copy()
+    presence.data[:] = 1.0
+    distinct_words = np.asarray(presence.sum(axis=1)).ravel()
+    known_binary = (user_matrix >= KNOWN_THRESHOLD).astype(np.float32)
+    known_distinct = (known_binary @ presence.T).toarray()
+    unknown_density = (distinct_words - known_distinct) / safe_totals
+
+    # 没有可识别词汇的文章无法评估
+    empty = token_totals == 0
+    coverage[:, empty] = 0.0
+    unknown_density[:, empty] = 1.0
+    return coverage, unknown_density
+
+
+def rank_articles(coverage, unknown_density, top_n):
+    """按与目标覆盖率的距离排序，返回每个用户的前 top_n 个文章列号"""
+    np, _ = _require_scientific_stack()
+    distance = np.abs(coverage - TARGET_COVERAGE) + 0.1 * unknown_density
+    top_n = min(top_n, distance.shape[1])
+    if top_n == 0:
+        return np.zeros((distance.shape[0], 0), dtype=np.int64)
+    candidates = np.argpartition(distance, top_n - 1, axis=1)[:, :top_n]
+    order = np.take_along_axis(distance, candidates, axis=1).argsort(axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def stale_user_ids():
+    """复习记录晚于上次推荐计算时间（或从未计算过）的用户"""
+    latest_reco = (
+        ArticleRecommendation.objects
+        .filter(user=OuterRef('pk'))
+        .values('user')
+        .annotate(latest=Max('updated_at'))
+        .values('latest')
+    )
+    return list(
+        User.objects
+        .annotate(latest_review=Max('userword__last_review'), latest_reco=Subquery(latest_reco))
+        .filter(latest_review__isnull=False)
+        .filter(Q(latest_reco__isnull=True) | Q(latest_review__gt=Subquery(latest_reco)))
+        .values_list('id', flat=True)
+    )
+
+
+def refresh_recommendations(user_ids=None, top_n=DEFAULT_TOP_N, batch_size=USER_BATCH_SIZE):
+    """
+    重新计算推荐并写入 ArticleRecommendation，返回处理的用户数
+
+    user_ids 为 None 时只计算复习记录有变化的用户（增量刷新）。
+    """
+    if user_ids is None:
+        user_ids = stale_user_ids()
+    user_ids = sorted(user_ids)
+    if not user_ids:
+        return 0
+
+    article_ids, word_columns, article_matrix = build_article_matrix()
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        user_matrix = build_user_matrix(batch, word_columns)
+        coverage, unknown_density = score_articles(article_matrix, user_matrix)
+        ranked = rank_articles(coverage, unknown_density, top_n)
+
+        records = []
+        for row, user_id in enumerate(batch):
+            for rank, col in enumerate(ranked[row], start=1):
+                records.append(ArticleRecommendation(
+                    user_id=user_id,
+                    article_id=int(article_ids[col]),
+                    coverage=round(float(coverage[row, col]), 4),
+                    unknown_density=round(float(unknown_density[row, col]), 4),
+                    rank=rank,
+                ))
+        with transaction.atomic():
+            ArticleRecommendation.objects.filter(user_id__in=batch).delete()
+            ArticleRecommendation.objects.bulk_create(records, batch_size=1000)
+        logging.info(f"已更新 {len(batch)} 个用户的文章推荐")
+    return len(user_ids)
@@ -0,0 +1,133 @@
+"""
+音频文件延迟清理队列
+
+删除单词时只把音频文件路径登记到 AudioCleanupTask 表中，事务提交后由后台线程真正删除文件。
+- 登记使用 ignore_conflicts，重复登记同一路径不会报错
+- 文件已不存在视为删除成功，进程崩溃后重新执行不会出错
+- 删除前再次确认没有 AudioFile 引用该路径，避免误删被重新下载的音频
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from learning.models import AudioCleanupTask, AudioFile
+
+# 单批处理的任务数量
+CLEANUP_BATCH_SIZE = 200
+# 超过该次数仍失败的任务不再自动重试，留给 cleanup_audio_files 命令人工处理
+MAX_CLEANUP_ATTEMPTS = 5
+
+_worker_lock = threading.Lock()
+_worker_thread = None
+
+
+def enqueue_audio_cleanup(file_paths):
+    """登记待删除的音频文件路径（在调用方事务内执行）"""
+    paths = {path for path in file_paths if path}
+    if not paths:
+        return 0
+    AudioCleanupTask.objects.bulk_create(
+        [AudioCleanupTask(file_path=path) for path in paths],
+        ignore_conflicts=True,
+    )
+    return len(paths)
+
+
+def schedule_audio_cleanup():
+    """事务提交后启动后台清理线程；事务回滚时不会执行"""
+    transaction.on_commit(start_cleanup_worker)
+
+
+def start_cleanup_worker():
+    """启动后台清理线程，同一进程内最多只有一个线程在运行"""
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is not None and _worker_thread.is_alive():
+            return _worker_thread
+        _worker_thread = threading.Thread(
+            target=_run_worker, name='audio-cleanup', daemon=True
+        )
+        _worker_thread.start()
+        return _worker_thread
+
+
+def _run_worker():
+    try:
+        process_cleanup_queue()
+    except Exception as e:
+        logging.error(f"音频清理线程异常退出: {e}")
+    finally:
+        # 线程结束时释放该线程持有的数据库连接
+        from django.db import connection
+        connection.close()
+
+
+def _resolve_media_path(file_path):
+    """把相对路径转换为 MEDIA_ROOT 下的绝对路径，越界路径返回 None"""
+    media_root = os.path.normpath(str(settings.MEDIA_ROOT))
+    full_path = os.path.normpath(os.path.join(media_root, file_path))
+    if not full_path.startswith(media_root + os.sep):
+        return None
+    return full_path
+
+
+def remove_audio_file(file_path):
+    """删除单个音频文件，文件不存在也视为成功"""
+    full_path = _resolve_media_path(file_path)
+    if full_path is None:
+        logging.warning(f"拒绝删除 MEDIA_ROOT 之外的文件: {file_path}")
+        return
+    try:
+        os.remove(full_path)
+        logging.info(f"已删除音频文件: {full_path}")
+    except FileNotFoundError:
+        pass
+
+
+def process_cleanup_queue(batch_size=CLEANUP_BATCH_SIZE, max_attempts=MAX_CLEANUP_ATTEMPTS):
+    """
+    逐批处理清理队列，返回 (已删除数, 失败数)
+
+    每批按 id 递增读取，处理完毕后批量删除任务记录；失败的任务记录错误并增加尝试次数。
+    """
+    removed = failed = 0
+    last_id = 0
+    while True:
+        tasks = list(
+            AudioCleanupTask.objects
+            .filter(id__gt=last_id, attempts__lt=max_attempts)
+            .order_by('id')[:batch_size]
+        )
+        if not tasks:
+            break
+        last_id = tasks[-1].id
+
+        # 仍被 AudioFile 引用的路径说明音频被重新下载过，只删除任务不删除文件
+        paths = [task.file_path for task in tasks]
+        in_use = set(
+            AudioFile.objects.filter(file_path__in=paths).values_list('file_path', flat=True)
+        )
+
+        done_ids = []
+        for task in tasks:
+            if task.file_path in in_use:
+                done_ids.append(task.id)
+                continue
+            try:
+                remove_audio_file(task.file_path)
+                done_ids.append(task.id)
+                removed += 1
+            except OSError as e:
+                logging.error(f"删除音频文件失败: {task.file_path}, 错误信息: {e}")
+                AudioCleanupTask.objects.filter(id=task.id).update(
+                    attempts=F('attempts') + 1,
+                    last_error=str(e)[:255],
+                )
+                failed += 1
+
+        AudioCleanupTask.objects.filter(id__in=done_ids).delete()
+    return removed, failed
@@ -0,0 +1,151 @@
+"""
+打包音频存储
+
+所有发音追加写入同一个 pack 文件，PackedAudio 表记录 (sha256, offset, length)：
+- 内容按 sha256 去重，相同音频只写一次
+- pack 文件只追加不修改，读取时通过 mmap 直接切片，不需要为每个单词打开文件
+- AudioFile.file_path 使用 audio/pack/<sha256>.mp3 形式，前端仍按 MEDIA_URL + 路径播放
+"""
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from learning.models import PackedAudio
+
+PACK_PATH_PREFIX = 'audio/pack/'
+PACK_PATH_SUFFIX = '.mp3'
+
+# 进程内缓存的索引条目数量（条目不可变，缓存不会过期）
+INDEX_CACHE_SIZE = 4096
+
+
+def is_packed_path(file_path):
+    return bool(file_path) and file_path.startswith(PACK_PATH_PREFIX)
+
+
+def packed_path(digest):
+    return f"{PACK_PATH_PREFIX}{digest}{PACK_PATH_SUFFIX}"
+
+
+def digest_from_path(file_path):
+    """从 audio/pack/<sha256>.mp3 中取出哈希，不是打包路径时返回 None"""
+    if not is_packed_path(file_path) or not file_path.endswith(PACK_PATH_SUFFIX):
+        return None
+    return file_path[len(PACK_PATH_PREFIX):-len(PACK_PATH_SUFFIX)]
+
+
+class AudioPackStore:
+    """单个 pack 文件的读写封装，进程内共享一个实例"""
+
+    def __init__(self, pack_file):
+        self.pack_file = str(pack_file)
+        self._write_lock = threading.Lock()
+        self._map_lock = threading.Lock()
+        self._mmap = None
+        self._index = OrderedDict()
+
+    def add(self, data):
+        """写入一段音频并返回 PackedAudio；内容已存在时直接返回已有记录"""
+        digest = hashlib.sha256(data).hexdigest()
+        entry = self.lookup(digest)
+        if entry is not None:
+            return entry
+
+        with self._write_lock:
+            entry = PackedAudio.objects.filter(sha256=digest).first()
+            if entry is not None:
+                return entry
+            os.makedirs(os.path.dirname(self.pack_file), exist_ok=True)
+            with open(self.pack_file, 'ab') as f:
+                _lock_file(f)
+                try:
+                    f.seek(0, os.SEEK_END)
+                    offset = f.tell()
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                finally:
+                    _unlock_file(f)
+
+            # 进程崩溃时最多在 pack 末尾留下未被引用的字节，不会破坏已有数据
+            try:
+                with transaction.atomic():
+                    entry = PackedAudio.objects.create(sha256=digest, offset=offset, length=len(data))
+            except IntegrityError:
+                # 其他进程同时写入了相同内容，使用对方的记录
+                entry = PackedAudio.objects.get(sha256=digest)
+        return entry
+
+    def lookup(self, digest):
+        """按哈希查找索引条目，命中进程内缓存时不访问数据库"""
+        entry = self._index.get(digest)
+        if entry is not None:
+            self._index.move_to_end(digest)
+            return entry
+        entry = PackedAudio.objects.filter(sha256=digest).first()
+        if entry is not None:
+            self._index[digest] = entry
+            if len(self._index) > INDEX_CACHE_SIZE:
+                self._index.popitem(last=False)
+        return entry
+
+    def read(self, entry, start=0, end=None):
+        """
+        返回音频内容的 memoryview（闭区间 [start, end]，相对该条目）
+
+        mmap 在 pack 文件增长后按需重新映射；返回的切片直接引用页缓存，不复制数据。
+        """
+        if end is None:
+            end = entry.length - 1
+        buf = self._get_map(entry.offset + entry.length)
+        return memoryview(buf)[entry.offset + start:entry.offset + end + 1]
+
+    def _get_map(self, required_size):
+        with self._map_lock:
+            if self._mmap is None or len(self._mmap) < required_size:
+                with open(self.pack_file, 'rb') as f:
+                    # 旧的映射可能仍被正在发送的响应引用，交给垃圾回收关闭
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._mmap
+
+    def pack_size(self):
+        try:
+            return os.path.getsize(self.pack_file)
+        except FileNotFoundError:
+            return 0
+
+
+def _lock_file(f):
+    """跨进程追加写入时加文件锁（Windows 下没有 fcntl，退化为进程内锁）"""
+    try:
+        import fcntl
+    except ImportError:
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    try:
+        import fcntl
+    except ImportError:
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_audio_pack():
+    """获取当前配置对应的 AudioPackStore（配置变化时重新创建）"""
+    global _store
+    pack_file = str(settings.AUDIO_PACK_FILE)
+    with _store_lock:
+        if _store is None or _store.pack_file != pack_file:
+            _store = AudioPackStore(pack_file)
+        return _store
@@ -0,0 +1,211 @@
+"""
+热点路径基准测试
+
+每个规模在一个事务中生成合成数据、依次测量各用例，结束后整体回滚，不会在数据库中留下数据。
+视图直接以 RequestFactory 构造的请求调用（不经过中间件），每次迭代的准备工作（选用户、建任务）不计时。
+结果可以保存为基线 JSON，之后的运行与基线对比，p50 耗时或平均查询次数超出容差即视为退化。
+"""
+import json
+import math
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from learning.models import DailyTask, TaskWord, UserWord
+from learning.utils.request_metrics import QueryRecorder
+from learning.utils.synthetic_data import generate_dataset
+
+BENCHMARK_PREFIX = 'bench'
+DEFAULT_SCALES = [(10, 500), (50, 2000)]
+DEFAULT_ITERATIONS = 30
+WARMUP_ITERATIONS = 3
+# p50 耗时允许的相对增幅
+DEFAULT_TOLERANCE = 0.25
+# p50 耗时增加不足该值（毫秒）时忽略，避免毫秒级用例被计时噪声误报
+MIN_LATENCY_DELTA_MS = 1.0
+# 平均查询次数允许的绝对增幅
+QUERY_TOLERANCE = 0.5
+
+
+class BenchmarkContext:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.factory = RequestFactory()
+        self.users = list(
+            UserWord.objects.filter(user__username__startswith=f'{BENCHMARK_PREFIX}_user_')
+            .values_list('user', flat=True).distinct()
+        )
+        self.task_words = list(
+            TaskWord.objects
+            .filter(task__user__username__startswith=f'{BENCHMARK_PREFIX}_user_', status__in=['new', 'retry'])
+            .values_list('task_id', 'word_id', 'task__user')
+        )
+        self.task_offset = 0
+        self._users = {}
+
+    def user(self, user_id=None):
+        user_id = user_id or self.rng.choice(self.users)
+        if user_id not in self._users:
+            self._users[user_id] = User.objects.get(pk=user_id)
+        return self._users[user_id]
+
+    def request(self, method, path, user, data=None):
+        if method == 'post':
+            request = self.factory.post(path, json.dumps(data), content_type='application/json')
+        else:
+            request = self.factory.get(path, data or {})
+        request.user = user
+        return request
+
+
+# 用例：接收上下文，完成准备工作后返回需要计时的无参函数
+
+def case_get_due_words(ctx):
+    user = ctx.user()
+    return lambda: list(UserWord.get_due_words(user, limit=50))
+
+
+def case_generate_daily_task(ctx):
+    from learning.views import generate_daily_task
+
+    user = ctx.user()
+    # 每次使用不同日期，避免与已有任务冲突
+    ctx.task_offset += 1
+    task = DailyTask.objects.create(user=user, date=timezone.localdate() + timedelta(days=ctx.task_offset))
+    request = ctx.request('get', '/word_card/', user)
+    return lambda: generate_daily_task(request, task)
+
+
+def case_handle_feedback(ctx):
+    from learning.views import handle_feedback
+
+    task_id, word_id, user_id = ctx.rng.choice(ctx.task_words)
+    request = ctx.request('post', '/handle_feedback/', ctx.user(user_id), {
+        'task_id': task_id,
+        'word_id': word_id,
+        'action': ctx.rng.choice(['know', 'forget']),
+    })
+    return lambda: handle_feedback(request)
+
+
+def case_word_card(ctx):
+    from learning.views import word_card
+
+    request = ctx.request('get', '/word_card/', ctx.user())
+    return lambda: word_card(request)
+
+
+def case_word_list(ctx):
+    from learning.views import word_list
+
+    request = ctx.request('get', '/words/', ctx.user(), {'page': ctx.rng.randint(1, 20)})
+    return lambda: word_list(request)
+
+
+CASES = {
+    'get_due_words': case_get_due_words,
+    'generate_daily_task': case_generate_daily_task,
+    'handle_feedback': case_handle_feedback,
+    'word_card': case_word_card,
+    'word_list': case_word_list,
+}
+
+
+def percentile(sorted_values, p):
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def measure(case, ctx, iterations=DEFAULT_ITERATIONS, warmup=WARMUP_ITERATIONS):
+    """运行一个用例，返回耗时（毫秒）和每次查询次数的统计"""
+    durations = []
+    queries = []
+    for i in range(warmup + iterations):
+        operation = case(ctx)
+        recorder = QueryRecorder()
+        with connections['default'].execute_wrapper(recorder):
+            start = time.perf_counter()
+            operation()
+            elapsed = time.perf_counter() - start
+        if i >= warmup:
+            durations.append(elapsed * 1000)
+            queries.append(recorder.count)
+
+    durations.sort()
+    total = sum(durations)
+    return {
+        'iterations': iterations,
+        'ops_per_sec': round(iterations / (total / 1000), 2) if total else 0.0,
+        'mean_ms': round(total / iterations, 3),
+        'p50_ms': round(percentile(durations, 50), 3),
+        'p99_ms': round(percentile(durations, 99), 3),
+        'queries_per_op': round(sum(queries) / iterations, 2),
+    }
+
+
+def run_benchmarks(scales=None, cases=None, iterations=DEFAULT_ITERATIONS, seed=0):
+    """
+    按规模运行基准测试，返回 {"<用例>@<用户数>x<单词数>": 统计结果}
+
+    视图内部使用模块级 random，这里同时固定全局随机种子，保证多次运行的操作序列一致。
+    """
+    scales = scales or DEFAULT_SCALES
+    cases = cases or list(CASES)
+    results = {}
+    for users, words in scales:
+        random.seed(seed)
+        with transaction.atomic():
+            generate_dataset(users=users, words=words, seed=seed, prefix=BENCHMARK_PREFIX)
+            ctx = BenchmarkContext(seed)
+            for name in cases:
+                results[f'{name}@{users}x{words}'] = measure(CASES[name], ctx, iterations)
+            transaction.set_rollback(True)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    与基线对比，返回退化列表 [{'benchmark', 'metric', 'baseline', 'current'}, ...]
+
+    只比较两边都有的用例；耗时看 p50（比 p99 稳定），查询次数按绝对值比较。
+    查询次数只有在规模、迭代次数和随机种子都与基线一致时才可直接比较。
+    """
+    regressions = []
+    for key, current in sorted(results.items()):
+        base = baseline.get(key)
+        if not base:
+            continue
+        limit = max(base['p50_ms'] * (1 + tolerance), base['p50_ms'] + MIN_LATENCY_DELTA_MS)
+        if current['p50_ms'] > limit:
+            regressions.append({'benchmark': key, 'metric': 'p50_ms',
+                                'baseline': base['p50_ms'], 'current': current['p50_ms']})
+        if current['queries_per_op'] > base['queries_per_op'] + QUERY_TOLERANCE:
+            regressions.append({'benchmark': key, 'metric': 'queries_per_op',
+                                'baseline': base['queries_per_op'], 'current': current['queries_per_op']})
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def save_baseline(path, results, scales, iterations, seed):
+    data = {
+        'created_at': timezone.now().isoformat(),
+        'scales': [f'{users}x{words}' for users, words in scales],
+        'iterations': iterations,
+        'seed': seed,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,75 @@
+"""
+计数表的原子累加
+
+复习量预测、每日学习统计、单词难度统计都是“按唯一键累加若干计数”的表，process_feedback 每次回答都要写。
+支持 ON CONFLICT 的数据库（SQLite、PostgreSQL）用一条 INSERT ... ON CONFLICT DO UPDATE 完成，
+行是否存在都只有一条语句，并发创建同一行时也不会抛出 IntegrityError，因此不需要保存点；
+其他数据库退回到先 UPDATE、影响行数为 0 时再 INSERT。
+
+调用方负责事务：process_feedback 把 UserWord 的更新和全部计数放在同一个事务中提交。
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+
+def increment(model, keys, deltas):
+    """
+    给唯一键为 keys（字段 → 值）的行累加 deltas（字段 → 增量）；行不存在时以增量为初值插入
+
+    负增量在 0 处截断（插入时为 0）。其余字段插入时取模型默认值。
+    """
+    if not connection.features.supports_update_conflicts_with_target:
+        _increment_fallback(model, keys, deltas)
+        return
+
+    opts = model._meta
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    columns, params, target = [], [], []
+    for field in opts.concrete_fields:
+        if field.attname in keys or field.name in keys:
+            value = keys.get(field.attname, keys.get(field.name))
+            target.append(qn(field.column))
+        elif field.name in deltas:
+            value = max(deltas[field.name], 0)
+        elif field.primary_key:
+            continue
+        else:
+            value = field.get_default()
+        columns.append(qn(field.column))
+        params.append(field.get_db_prep_save(value, connection))
+
+    assignments = []
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        column = qn(opts.get_field(name).column)
+        if delta > 0:
+            assignments.append(f'{column} = {table}.{column} + %s')
+            params.append(delta)
+        else:
+            assignments.append(f'{column} = CASE WHEN {table}.{column} + %s > 0 THEN {table}.{column} + %s ELSE 0 END')
+            params.extend([delta, delta])
+
+    action = f"DO UPDATE SET {', '.join(assignments)}" if assignments else 'DO NOTHING'
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({', '.join(target)}) {action}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _increment_fallback(model, keys, deltas):
+    rows = model.objects.filter(**keys)
+    update = {name: Greatest(F(name) + delta, Value(0)) for name, delta in deltas.items() if delta}
+    if update and rows.update(**update):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **{name: max(delta, 0) for name, delta in deltas.items()})
+    except IntegrityError:
+        # 并发请求已创建该行
+        if update:
+            rows.update(**update)
@@ -0,0 +1,270 @@
+"""
+释义相似度近邻索引
+
+- 每条释义切分为字符 n-gram（中文释义按字切分效果比按词更稳定），构建 TF-IDF 稀疏矩阵，行向量做 L2 归一化
+- 分批计算余弦相似度（稀疏矩阵乘法），每个单词只保留前 k 个近邻，以 uint32 数组存入 DefinitionNeighbors
+- 释义完全相同的单词不互为近邻，避免出现两个正确选项
+- 增量更新只重算释义有变化的单词，以及可能因此改变近邻列表的单词（引用了变化单词、或与其相似度超过
+  原第 k 近邻的单词）；其余单词沿用旧结果，IDF 的细微漂移由定期的 --full 重建修正
+
+依赖 NumPy / SciPy，只在批处理任务和释义变更时使用，出题时只读取 DefinitionNeighbors。
+"""
+import hashlib
+import logging
+import re
+import sys
+from array import array
+
+from django.db import transaction
+
+from learning.models import DefinitionNeighbors, Word
+
+# 每个单词保存的近邻数量
+DEFAULT_TOP_K = 10
+# 字符 n-gram 的长度范围
+NGRAM_RANGE = (1, 3)
+# 每批计算相似度的行数，控制稠密结果矩阵的大小
+SIMILARITY_BATCH_SIZE = 256
+
+_SEPARATOR_RE = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def _require_scientific_stack():
+    try:
+        import numpy as np
+        from scipy import sparse
+    except ImportError as e:
+        raise RuntimeError("释义近邻索引需要安装 numpy 和 scipy") from e
+    return np, sparse
+
+
+def normalize_definition(text):
+    """小写并把标点、空白统一为单个空格"""
+    return _SEPARATOR_RE.sub(' ', (text or '').lower()).strip()
+
+
+def definition_hash(text):
+    return hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+
+
+def char_ngrams(text, ngram_range=NGRAM_RANGE):
+    """按分隔符切段后生成字符 n-gram，不跨越标点"""
+    low, high = ngram_range
+    grams = []
+    for segment in normalize_definition(text).split():
+        for n in range(low, high + 1):
+            grams.extend(segment[i:i + n] for i in range(len(segment) - n + 1))
+    return grams
+
+
+def pack_ids(ids):
+    values = array('I', ids)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_ids(data):
+    values = array('I')
+    values.frombytes(bytes(data or b''))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tolist()
+
+
+def build_tfidf(definitions):
+    """返回 L2 归一化的 TF-IDF CSR 矩阵（float32），行与 definitions 一一对应"""
+    np, sparse = _require_scientific_stack()
+    vocabulary = {}
+    rows, cols, counts = [], [], []
+    for row, text in enumerate(definitions):
+        row_counts = {}
+        for gram in char_ngrams(text):
+            col = vocabulary.setdefault(gram, len(vocabulary))
+            row_counts[col] = row_counts.get(col, 0) + 1
+        rows.extend([row] * len(row_counts))
+        cols.extend(row_counts)
+        counts.extend(row_counts.values())
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), (rows, cols)),
+        shape=(len(definitions), len(vocabulary)),
+    )
+    # 次线性词频 × 平滑 IDF
+    matrix.data = 1.0 + np.log(matrix.data)
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1.0 + matrix.shape[0]) / (1.0 + document_frequency)) + 1.0
+    matrix = matrix @ sparse.diags(idf.astype(np.float32))
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags((1.0 / norms).astype(np.float32)) @ matrix)
+
+
+def top_neighbors(matrix, groups, rows, top_k):
+    """
+    计算指定行的前 top_k 个近邻，返回 {行号: (近邻行号列表, 第 k 近邻相似度)}
+
+    groups 为每行释义的分组编号，同组（释义相同）的行互相排除；相似度为 0 的不计入。
+    """
+    np, _ = _require_scientific_stack()
+    results = {}
+    for start in range(0, len(rows), SIMILARITY_BATCH_SIZE):
+        batch = np.asarray(rows[start:start + SIMILARITY_BATCH_SIZE], dtype=np.int64)
+        similarity = (matrix[batch] @ matrix.T).toarray()
+        similarity[groups[batch][:, None] == groups[None, :]] = 0.0
+
+        k = min(top_k, similarity.shape[1])
+        if k == 0:
+            for row in batch:
+                results[int(row)] = ([], 0.0)
+            continue
+        candidates = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(similarity, candidates, axis=1)
+        order = np.argsort(-scores, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+
+        for i, row in enumerate(batch):
+            keep = scores[i] > 0
+            neighbors = candidates[i][keep].tolist()
+            threshold = float(scores[i][keep][-1]) if len(neighbors) == top_k else 0.0
+            results[int(row)] = (neighbors, threshold)
+    return results
+
+
+def update_definition_neighbors(word_ids=None, full=False, top_k=DEFAULT_TOP_K):
+    """
+    更新释义近邻，返回重新计算的单词数
+
+    参数:
+    - word_ids: 释义发生变化的单词ID；为 None 时按释义哈希找出所有过期的单词
+    - full: 为 True 时重算全部单词
+    """
+    np, _ = _require_scientific_stack()
+    words = list(Word.objects.exclude(definition='').order_by('id').values_list('id', 'definition'))
+    existing = {
+        word_id: (stored_hash, threshold, neighbor_data)
+        for word_id, stored_hash, threshold, neighbor_data in
+        DefinitionNeighbors.objects.values_list('word_id', 'definition_hash', 'threshold', 'neighbor_ids')
+    }
+    row_of = {word_id: row for row, (word_id, _) in enumerate(words)}
+    hashes = [definition_hash(text) for _, text in words]
+
+    # 释义被清空或单词已删除的旧记录
+    removed = set(existing) - set(row_of)
+    if full:
+        changed = set(row_of)
+    elif word_ids is None:
+        changed = {word_id for word_id, h in zip(row_of, hashes) if existing.get(word_id, (None,))[0] != h}
+    else:
+        changed = {word_id for word_id in word_ids if word_id in row_of}
+        removed &= set(word_ids)
+
+    if not changed and not removed:
+        return 0
+
+    ids = np.asarray([word_id for word_id, _ in words], dtype=np.int64)
+    normalized = [normalize_definition(text) for _, text in words]
+    group_of = {}
+    groups = np.asarray([group_of.setdefault(text, len(group_of)) for text in normalized], dtype=np.int64)
+    matrix = build_tfidf([text for _, text in words])
+
+    affected = set(changed)
+    if not full:
+        touched = changed | removed
+        thresholds = np.zeros(len(words), dtype=np.float32)
+        for word_id, (_, threshold, neighbor_data) in existing.items():
+            row = row_of.get(word_id)
+            if row is None:
+                continue
+            thresholds[row] = threshold
+            # 近邻列表引用了变化的单词
+            if touched.intersection(unpack_ids(neighbor_data)):
+                affected.add(word_id)
+        if changed:
+            changed_rows = [row_of[word_id] for word_id in changed]
+            similarity = matrix @ matrix[changed_rows].T
+            best = np.asarray(similarity.max(axis=1).todense()).ravel()
+            # 变化的单词可能挤进其他单词的前 k 个近邻
+            for row in np.nonzero(best > thresholds)[0]:
+                affected.add(int(ids[row]))
+
+    rows = sorted(row_of[word_id] for word_id in affected)
+    results = top_neighbors(matrix, groups, rows, top_k)
+    records = [
+        DefinitionNeighbors(
+            word_id=int(ids[row]),
+            neighbor_ids=pack_ids(int(ids[n]) for n in neighbors),
+            threshold=round(threshold, 6),
+            definition_hash=hashes[row],
+        )
+        for row, (neighbors, threshold) in results.items()
+    ]
+
+    with transaction.atomic():
+        if full:
+            DefinitionNeighbors.objects.all().delete()
+        elif removed:
+            DefinitionNeighbors.objects.filter(word_id__in=removed).delete()
+        DefinitionNeighbors.objects.bulk_create(
+            records,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['word'],
+            update_fields=['neighbor_ids', 'threshold', 'definition_hash', 'updated_at'],
+        )
+    logging.info(f"已更新 {len(records)} 个单词的释义近邻")
+    return len(records)
+
+
+def refresh_neighbors_for(word_ids):
+    """释义变更后的增量更新入口；缺少 numpy / scipy 时只记录日志，由定时任务补算"""
+    try:
+        return update_definition_neighbors(word_ids=list(word_ids))
+    except RuntimeError as e:
+        logging.warning(f"跳过释义近邻更新: {e}")
+        return 0
+
+
+def get_neighbor_ids(word_id, count=None):
+    """读取单词的释义近邻（一次主键查询），未计算时返回空列表"""
+    data = DefinitionNeighbors.objects.filter(word_id=word_id).values_list('neighbor_ids', flat=True).first()
+    ids = unpack_ids(data) if data else []
+    return ids[:count] if count is not None else ids
+
+
+def meaning_distractors(word, count=3):
+    """
+    为释义题挑选干扰释义，返回 [(单词ID, 释义), ...]
+
+    优先使用释义最相近的单词；近邻不足（尚未计算或已被删除）时用随机释义补齐。
+    """
+    neighbor_ids = get_neighbor_ids(word.id)
+    definitions = dict(Word.objects.filter(id__in=neighbor_ids[:count * 2]).values_list('id', 'definition'))
+    answer = normalize_definition(word.definition)
+
+    chosen = []
+    seen = {answer}
+    for neighbor_id in neighbor_ids:
+        definition = definitions.get(neighbor_id)
+        if definition and normalize_definition(definition) not in seen:
+            chosen.append((neighbor_id, definition))
+            seen.add(normalize_definition(definition))
+            if len(chosen) == count:
+                return chosen
+
+    fallback = (
+        Word.objects
+        .exclude(definition='')
+        .exclude(id__in=[word.id] + [word_id for word_id, _ in chosen])
+        .order_by('?')
+        .values_list('id', 'definition')[:count * 2]
+    )
+    for word_id, definition in fallback:
+        if normalize_definition(definition) not in seen:
+            chosen.append((word_id, definition))
+            seen.add(normalize_definition(definition))
+            if len(chosen) == count:
+                break
+    return chosen
@@ -0,0 +1,155 @@
+"""
+基于 SQLite FTS5 的全文检索
+
+- learning_word_fts / learning_article_fts 是外部内容（external content）虚拟表，
+  只保存倒排索引，正文仍在 learning_word / learning_article 中
+- 基表上的触发器在插入、删除、更新时同步索引，批量 update / delete 和原生 SQL 同样生效
+- 使用 porter 分词器，running / runs 可以匹配 run
+- 非 SQLite 数据库时退化为 icontains 查询
+"""
+import logging
+import re
+
+from django.db import connection
+from django.utils.html import escape
+
+FTS_TABLES = {
+    'learning_word_fts': ('learning_word', ('word', 'example')),
+    'learning_article_fts': ('learning_article', ('title', 'content')),
+}
+
+_QUERY_TOKEN_RE = re.compile(r"[\w']+", re.UNICODE)
+
+
+def fulltext_available(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def _install_statements(fts_table, base_table, columns):
+    cols = ', '.join(columns)
+    new_cols = ', '.join(f'new.{c}' for c in columns)
+    old_cols = ', '.join(f'old.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{cols}, content='{base_table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {base_table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {base_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {base_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+    ]
+
+
+def install_fulltext(conn=None, rebuild=False):
+    """
+    创建虚拟表和同步触发器（幂等）
+
+    SQLite 修改表结构时会重建基表并丢失触发器，因此每次 migrate 之后都会重新执行。
+    新建虚拟表或 rebuild=True 时从基表重建索引。
+    """
+    conn = conn or connection
+    if not fulltext_available(conn):
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name IN (%s)" % ', '.join(['%s'] * len(FTS_TABLES)),
+            list(FTS_TABLES),
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        for fts_table, (base_table, columns) in FTS_TABLES.items():
+            for statement in _install_statements(fts_table, base_table, columns):
+                cursor.execute(statement)
+            if rebuild or fts_table not in existing:
+                cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+    return True
+
+
+def uninstall_fulltext(conn=None):
+    conn = conn or connection
+    if not fulltext_available(conn):
+        return
+    with conn.cursor() as cursor:
+        for fts_table in FTS_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+def optimize_fulltext(conn=None):
+    """合并索引段，大量写入后执行可以提升查询速度"""
+    conn = conn or connection
+    if not fulltext_available(conn):
+        return
+    with conn.cursor() as cursor:
+        for fts_table in FTS_TABLES:
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('optimize')")
+
+
+def build_match_query(text):
+    """
+    把用户输入转换为安全的 FTS5 查询：每个词加引号避免语法错误，多个词之间为 AND
+
+    无可用词元时返回空字符串。
+    """
+    tokens = _QUERY_TOKEN_RE.findall(text or '')
+    return ' '.join('"%s"' % token.replace('"', '""') for token in tokens)
+
+
+def search_examples(text, limit=20):
+    """在 Word.example 中检索，返回 [{'id', 'word', 'snippet'}, ...]，按 bm25 相关度排序"""
+    from learning.models import Word
+
+    match = build_match_query(text)
+    if not match:
+        return []
+    if not fulltext_available():
+        words = Word.objects.filter(example__icontains=text).values('id', 'word', 'example')[:limit]
+        return [{'id': w['id'], 'word': w['word'], 'snippet': escape(w['example'])} for w in words]
+
+    sql = (
+        "SELECT w.id, w.word, snippet(learning_word_fts, 1, char(2), char(3), '…', 16) "
+        "FROM learning_word_fts JOIN learning_word w ON w.id = learning_word_fts.rowid "
+        "WHERE learning_word_fts MATCH %s ORDER BY bm25(learning_word_fts) LIMIT %s"
+    )
+    # 只在 example 列中匹配
+    return _run_search(sql, [f'example : ({match})', limit], ('id', 'word', 'snippet'))
+
+
+def search_articles(text, limit=20):
+    """在文章标题和正文中检索，返回 [{'id', 'title', 'snippet'}, ...]"""
+    from learning.models import Article
+
+    match = build_match_query(text)
+    if not match:
+        return []
+    if not fulltext_available():
+        articles = Article.objects.filter(content__icontains=text).values('id', 'title')[:limit]
+        return [{'id': a['id'], 'title': a['title'], 'snippet': ''} for a in articles]
+
+    sql = (
+        "SELECT a.id, a.title, snippet(learning_article_fts, 1, char(2), char(3), '…', 24) "
+        "FROM learning_article_fts JOIN learning_article a ON a.id = learning_article_fts.rowid "
+        "WHERE learning_article_fts MATCH %s ORDER BY bm25(learning_article_fts, 5.0, 1.0) LIMIT %s"
+    )
+    return _run_search(sql, [match, limit], ('id', 'title', 'snippet'))
+
+
+def highlight_snippet(snippet):
+    """转义片段中的 HTML，再把 FTS5 的命中标记替换为 <mark>"""
+    return escape(snippet or '').replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+
+def _run_search(sql, params, fields):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            results = [dict(zip(fields, row)) for row in cursor.fetchall()]
+        for result in results:
+            result['snippet'] = highlight_snippet(result['snippet'])
+        return results
+    except Exception as e:
+        # 索引缺失等情况不影响页面其余部分
+        logging.error(f"全文检索失败: {e}")
+        return []
@@ -0,0 +1,102 @@
+"""
+HTTP 条件请求与 Range 请求的公共处理
+
+音频内容一旦写入就不会修改，因此可以给出长期缓存头，并用 ETag / Last-Modified 让重复播放只返回 304。
+"""
+import re
+
+from django.utils.http import parse_etags, http_date, parse_http_date_safe
+
+# 音频内容不可变，缓存一年
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Range 头超出资源范围，应返回 416"""
+
+
+def parse_range_header(header, size):
+    """
+    解析单段 Range 头，返回闭区间 (start, end)；无 Range 或无法识别时返回 None
+
+    多段 Range（bytes=0-1,5-6）按 RFC 允许的方式忽略，返回完整内容。
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500 表示最后 500 字节
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable()
+        start = max(0, size - suffix)
+        end = size - 1
+    else:
+        start = int(first)
+        end = int(last) if last else size - 1
+        end = min(end, size - 1)
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def etag_matches(request, etag):
+    """If-None-Match 是否命中当前 ETag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def not_modified_since(request, last_modified):
+    """If-Modified-Since 是否晚于资源修改时间（同时带 If-None-Match 时以 ETag 为准）"""
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        return False
+    header = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if not header:
+        return False
+    since = parse_http_date_safe(header)
+    return since is not None and int(last_modified) <= since
+
+
+def if_range_allows(request, etag, last_modified=None):
+    """If-Range 校验失败时应忽略 Range 并返回完整内容"""
+    header = request.META.get('HTTP_IF_RANGE')
+    if not header:
+        return True
+    if header.startswith('"') or header.startswith('W/'):
+        return header == etag
+    return last_modified is not None and header == http_date(last_modified)
+
+
+def iter_file_range(f, start, length, chunk_size=64 * 1024):
+    """从文件的 start 处开始分块读取 length 字节，读完后关闭文件"""
+    try:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        f.close()
+
+
+def apply_cache_headers(response, etag, last_modified=None, cache_control=IMMUTABLE_CACHE_CONTROL):
+    """设置 ETag、Last-Modified、Cache-Control 和 Accept-Ranges"""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,186 @@
+"""
+按幂等键去重的请求处理
+
+双击、浏览器重试或页面刷新竞争会把同一个答案提交两次，重复执行记忆算法会让复习次数和历史记录翻倍。
+客户端为每次提交附带 Idempotency-Key 请求头，服务端按 (视图, 用户, 键) 去重：
+
+- 第一次请求先用 cache.add 占位（原子操作，并发的重复请求只有一个能占位成功），
+  处理成功（2xx）或确定性失败（404）后把响应（状态码和正文）写入去重存储；
+  其他结果（409 并发冲突、视图把临时错误映射成的 400、5xx 或异常）释放占位，允许客户端用同一个键重试
+- 重放的请求直接返回保存的响应，带 Idempotent-Replay: true 响应头；原请求尚未完成时返回 409
+- 去重存储分两层：进程内的有界 LRU（命中时不访问缓存后端）和 Django 缓存（多进程共享），
+  两层都按 TTL 过期
+
+没有幂等键的请求照常处理，热路径上只多一次请求头读取；带键的首次请求多一次 cache.add 和一次 cache.set。
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+DEFAULT_TTL = 600
+DEFAULT_LOCAL_SIZE = 10000
+_PENDING = 'pending'
+# 除 2xx 外可以重放的状态码：重试也不会改变结果
+FINAL_ERROR_STATUSES = {404}
+_KEY_RE = re.compile(r'^[\w-]{1,64}$')
+
+
+class LocalDedupeCache:
+    """进程内的有界 LRU，条目按 TTL 过期"""
+
+    def __init__(self, max_size=DEFAULT_LOCAL_SIZE, ttl=DEFAULT_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DedupeStore:
+    """两层去重存储：值为 'pending'（处理中）或 (状态码, 正文)"""
+
+    def __init__(self, prefix, ttl=DEFAULT_TTL, local_size=DEFAULT_LOCAL_SIZE):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.local = LocalDedupeCache(local_size, ttl)
+
+    def cache_key(self, key):
+        return f'idempotency:{self.prefix}:{key}'
+
+    def lookup(self, key):
+        """已完成的响应，没有记录或仍在处理中时分别返回 None 和 'pending'"""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        value = cache.get(self.cache_key(key))
+        if value is not None and value != _PENDING:
+            self.local.set(key, value)
+        return value
+
+    def claim(self, key):
+        """占位，返回 False 表示已有相同键的请求"""
+        return cache.add(self.cache_key(key), _PENDING, self.ttl)
+
+    def release(self, key):
+        cache.delete(self.cache_key(key))
+
+    def store(self, key, status, content):
+        value = (status, content)
+        cache.set(self.cache_key(key), value, self.ttl)
+        self.local.set(key, value)
+
+
+def replay_response(value):
+    if value == _PENDING:
+        return JsonResponse({'success': False, 'error': '相同的请求正在处理中'}, status=409)
+    status, content = value
+    response = HttpResponse(content, status=status, content_type='application/json')
+    response['Idempotent-Replay'] = 'true'
+    return response
+
+
+def is_final(status):
+    """响应是否可以作为该键的最终结果保存"""
+    return 200 <= status < 300 or status in FINAL_ERROR_STATUSES
+
+
+def user_key(user, key):
+    """校验客户端提供的键并按用户隔离，没有或格式不合法时返回 None"""
+    if not isinstance(key, str) or not _KEY_RE.match(key):
+        return None
+    return f'{user.pk}:{key}'
+
+
+def request_key(request, user):
+    """读取并校验请求头中的幂等键"""
+    return user_key(user, request.headers.get(IDEMPOTENCY_HEADER))
+
+
+def idempotent(store):
+    """
+    视图装饰器：按 Idempotency-Key 去重，同时支持同步和异步视图
+
+    需要放在 login_required 之内，只对已登录用户生效。
+    """
+    def before(key):
+        """返回重放的响应，或占位成功后返回 None"""
+        value = store.lookup(key)
+        if value is not None:
+            return replay_response(value)
+        if not store.claim(key):
+            return replay_response(store.lookup(key) or _PENDING)
+        return None
+
+    def after(key, response):
+        if is_final(response.status_code):
+            store.store(key, response.status_code, response.content)
+        else:
+            store.release(key)
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            async def wrapper(request, *args, **kwargs):
+                key = request_key(request, await request.auser())
+                if key is None:
+                    return await view(request, *args, **kwargs)
+                replay = await sync_to_async(before)(key)
+                if replay is not None:
+                    return replay
+                try:
+                    response = await view(request, *args, **kwargs)
+                except BaseException:
+                    await sync_to_async(store.release)(key)
+                    raise
+                await sync_to_async(after)(key, response)
+                return response
+        else:
+            def wrapper(request, *args, **kwargs):
+                key = request_key(request, request.user)
+                if key is None:
+                    return view(request, *args, **kwargs)
+                replay = before(key)
+                if replay is not None:
+                    return replay
+                try:
+                    response = view(request, *args, **kwargs)
+                except BaseException:
+                    store.release(key)
+                    raise
+                after(key, response)
+                return response
+
+        return wraps(view)(wrapper)
+
+    return decorator
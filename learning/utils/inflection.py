@@ -0,0 +1,199 @@
+"""
+基于规则的英语词形变化生成器
+
+为原形单词生成常见屈折形式：名词复数、动词第三人称单数 / 现在分词 / 过去式 / 过去分词、
+形容词比较级和最高级，并附带常见不规则变化表。生成结果用于建立 词形 → 单词 的映射，
+宁可多生成（不存在的形式不会出现在文章里），也不要漏掉常见形式。
+"""
+
+VOWELS = set('aeiou')
+
+# 不规则动词：原形 → 规则无法生成的各种形式
+IRREGULAR_VERBS = {
+    'be': ('was', 'were', 'been', 'is', 'am', 'are', 'being'),
+    'have': ('had', 'has', 'having'),
+    'do': ('did', 'done', 'does'),
+    'go': ('went', 'gone', 'goes'),
+    'say': ('said',),
+    'make': ('made',),
+    'get': ('got', 'gotten'),
+    'know': ('knew', 'known'),
+    'think': ('thought',),
+    'take': ('took', 'taken'),
+    'see': ('saw', 'seen'),
+    'come': ('came',),
+    'give': ('gave', 'given'),
+    'find': ('found',),
+    'tell': ('told',),
+    'become': ('became',),
+    'leave': ('left',),
+    'feel': ('felt',),
+    'bring': ('brought',),
+    'begin': ('began', 'begun'),
+    'keep': ('kept',),
+    'hold': ('held',),
+    'write': ('wrote', 'written'),
+    'stand': ('stood',),
+    'hear': ('heard',),
+    'let': ('let',),
+    'mean': ('meant',),
+    'set': ('set',),
+    'meet': ('met',),
+    'run': ('ran',),
+    'pay': ('paid',),
+    'sit': ('sat',),
+    'speak': ('spoke', 'spoken'),
+    'lie': ('lay', 'lain', 'lying'),
+    'lead': ('led',),
+    'read': ('read',),
+    'grow': ('grew', 'grown'),
+    'lose': ('lost',),
+    'fall': ('fell', 'fallen'),
+    'send': ('sent',),
+    'build': ('built',),
+    'understand': ('understood',),
+    'draw': ('drew', 'drawn'),
+    'break': ('broke', 'broken'),
+    'spend': ('spent',),
+    'cut': ('cut',),
+    'rise': ('rose', 'risen'),
+    'drive': ('drove', 'driven'),
+    'buy': ('bought',),
+    'wear': ('wore', 'worn'),
+    'choose': ('chose', 'chosen'),
+    'seek': ('sought',),
+    'throw': ('threw', 'thrown'),
+    'catch': ('caught',),
+    'deal': ('dealt',),
+    'win': ('won',),
+    'forget': ('forgot', 'forgotten'),
+    'sell': ('sold',),
+    'fight': ('fought',),
+    'teach': ('taught',),
+    'eat': ('ate', 'eaten'),
+    'sing': ('sang', 'sung'),
+    'swim': ('swam', 'swum'),
+    'drink': ('drank', 'drunk'),
+    'fly': ('flew', 'flown', 'flies'),
+    'sleep': ('slept',),
+    'steal': ('stole', 'stolen'),
+    'hide': ('hid', 'hidden'),
+    'shake': ('shook', 'shaken'),
+    'ride': ('rode', 'ridden'),
+    'bite': ('bit', 'bitten'),
+    'feed': ('fed',),
+    'hang': ('hung',),
+    'shoot': ('shot',),
+    'light': ('lit',),
+    'freeze': ('froze', 'frozen'),
+    'forgive': ('forgave', 'forgiven'),
+}
+
+# 不规则名词复数
+IRREGULAR_PLURALS = {
+    'man': 'men',
+    'woman': 'women',
+    'child': 'children',
+    'person': 'people',
+    'mouse': 'mice',
+    'tooth': 'teeth',
+    'foot': 'feet',
+    'goose': 'geese',
+    'ox': 'oxen',
+    'leaf': 'leaves',
+    'life': 'lives',
+    'knife': 'knives',
+    'wife': 'wives',
+    'half': 'halves',
+    'wolf': 'wolves',
+    'shelf': 'shelves',
+    'crisis': 'crises',
+    'analysis': 'analyses',
+    'phenomenon': 'phenomena',
+    'criterion': 'criteria',
+    'datum': 'data',
+}
+
+# 不规则比较级 / 最高级
+IRREGULAR_ADJECTIVES = {
+    'good': ('better', 'best'),
+    'well': ('better', 'best'),
+    'bad': ('worse', 'worst'),
+    'far': ('farther', 'further', 'farthest', 'furthest'),
+    'little': ('less', 'least'),
+    'many': ('more', 'most'),
+    'much': ('more', 'most'),
+}
+
+
+def _is_cvc(word):
+    """辅音-元音-辅音结尾的短词，变化时双写末尾辅音（stop → stopped）"""
+    if len(word) < 3 or len(word) > 5:
+        return False
+    a, b, c = word[-3], word[-2], word[-1]
+    return a not in VOWELS and b in VOWELS and c not in VOWELS and c not in 'wxy'
+
+
+def _s_form(word):
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh', 'o')):
+        return word + 'es'
+    if word.endswith('y') and len(word) > 1 and word[-2] not in VOWELS:
+        return word[:-1] + 'ies'
+    return word + 's'
+
+
+def _ing_form(word):
+    if word.endswith('ie'):
+        return word[:-2] + 'ying'
+    if word.endswith('e') and not word.endswith(('ee', 'ye', 'oe')) and len(word) > 2:
+        return word[:-1] + 'ing'
+    if _is_cvc(word):
+        return word + word[-1] + 'ing'
+    return word + 'ing'
+
+
+def _ed_form(word):
+    if word.endswith('e'):
+        return word + 'd'
+    if word.endswith('y') and len(word) > 1 and word[-2] not in VOWELS:
+        return word[:-1] + 'ied'
+    if _is_cvc(word):
+        return word + word[-1] + 'ed'
+    return word + 'ed'
+
+
+def _comparative_forms(word):
+    if word.endswith('e'):
+        return word + 'r', word + 'st'
+    if word.endswith('y') and len(word) > 1 and word[-2] not in VOWELS:
+        return word[:-1] + 'ier', word[:-1] + 'iest'
+    if _is_cvc(word):
+        return word + word[-1] + 'er', word + word[-1] + 'est'
+    return word + 'er', word + 'est'
+
+
+def generate_forms(word):
+    """
+    生成单词的所有屈折形式（全部小写，包含原形本身）
+
+    词组（含空格或连字符）只返回原形的小写形式。
+    """
+    base = word.strip().lower()
+    if not base:
+        return set()
+    forms = {base}
+    if not base.isalpha():
+        return forms
+
+    forms.add(_s_form(base))
+    forms.add(_ing_form(base))
+    forms.add(_ed_form(base))
+    # 比较级只对短词生成，长形容词使用 more / most
+    if len(base) <= 6:
+        forms.update(_comparative_forms(base))
+
+    forms.update(IRREGULAR_VERBS.get(base, ()))
+    if base in IRREGULAR_PLURALS:
+        forms.add(IRREGULAR_PLURALS[base])
+    forms.update(IRREGULAR_ADJECTIVES.get(base, ()))
+    return forms
@@ -0,0 +1,175 @@
+"""
+每日学习统计
+
+DailyStats 按 (用户, 日期) 保存复习次数、正确次数、首次学习的单词数、进入掌握阶段的单词数和学习时长，
+统计页只读取这些汇总行，不需要扫描每个单词的 history_intervals。
+
+- 增量：process_feedback 在更新 UserWord 的同一个事务中调用 record_review，一条 upsert 累加计数
+- 回填：rollup_user 按 history_intervals 重放记忆阶段的变化，重算一个用户的全部汇总行
+  （rollup_daily_stats 命令）
+
+学习时长按同一用户相邻两次回答的间隔累计，间隔超过 IDLE_LIMIT 视为中断，不计入；
+增量统计时上一次回答的时间保存在缓存中，事务提交后才写入：回滚重试的回答不会推进该时间。
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from learning.models import DailyStats, UserWord
+from learning.utils.counters import increment
+
+# 相邻两次回答间隔超过该秒数视为离开
+IDLE_LIMIT = 300
+HEATMAP_DAYS = 365
+RETENTION_DAYS = 90
+RETENTION_WINDOW = 7
+
+
+def local_day(moment):
+    return timezone.localtime(moment).date()
+
+
+def last_answer_key(user_id):
+    return f'stats_last_answer:{user_id}'
+
+
+def answer_seconds(previous, now):
+    """两次回答之间计入学习时长的秒数"""
+    if previous is None:
+        return 0
+    gap = (now - previous).total_seconds()
+    return int(gap) if 0 < gap <= IDLE_LIMIT else 0
+
+
+def next_phase(review_count, error_count):
+    """与 UserWord.process_feedback 相同的记忆阶段规则"""
+    if review_count >= 4 and error_count == 0:
+        return 'mastered'
+    if review_count > 1:
+        return 'retention'
+    return 'initial'
+
+
+def record_review(user_id, now, is_correct, first_review, mastered):
+    """累加一次回答；在 process_feedback 更新 UserWord 的事务中执行"""
+    key = last_answer_key(user_id)
+    seconds = answer_seconds(cache.get(key), now)
+    transaction.on_commit(lambda: cache.set(key, now, IDLE_LIMIT))
+
+    increment(DailyStats, {'user_id': user_id, 'day': local_day(now)}, {
+        'reviews': 1,
+        'correct': int(is_correct),
+        'new_words': int(first_review),
+        'mastered': int(mastered),
+        'time_spent': seconds,
+    })
+
+
+def replay_history(history):
+    """
+    按 history_intervals 重放一个单词的复习过程，依次返回 (时间, 是否正确, 是否首次学习, 是否进入掌握阶段)
+
+    缺少时间的记录会被跳过。
+    """
+    review_count = error_count = 0
+    phase = 'initial'
+    for entry in history:
+        try:
+            moment = datetime.fromisoformat(entry['date'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        correct = bool(entry.get('correct'))
+        review_count += 1
+        error_count = max(0, error_count - 1) if correct else error_count + 1
+        new_phase = next_phase(review_count, error_count)
+        yield moment, correct, review_count == 1, new_phase == 'mastered' and phase != 'mastered'
+        phase = new_phase
+
+
+def rollup_user(user_id):
+    """从 history_intervals 重算一个用户的每日统计，返回写入的行数"""
+    events = []
+    for history in UserWord.objects.filter(user_id=user_id).values_list('history_intervals', flat=True).iterator():
+        events.extend(replay_history(history or []))
+    events.sort(key=lambda event: event[0])
+
+    days = defaultdict(lambda: {'reviews': 0, 'correct': 0, 'new_words': 0, 'mastered': 0, 'time_spent': 0})
+    previous = None
+    for moment, correct, first_review, mastered in events:
+        stats = days[local_day(moment)]
+        stats['reviews'] += 1
+        stats['correct'] += int(correct)
+        stats['new_words'] += int(first_review)
+        stats['mastered'] += int(mastered)
+        stats['time_spent'] += answer_seconds(previous, moment)
+        previous = moment
+
+    with transaction.atomic():
+        DailyStats.objects.filter(user_id=user_id).delete()
+        DailyStats.objects.bulk_create(
+            [DailyStats(user_id=user_id, day=day, **stats) for day, stats in days.items()], batch_size=1000
+        )
+    return len(days)
+
+
+def current_streak(reviews_by_day, today):
+    """截至今天的连续学习天数；今天还没学习时从昨天开始算"""
+    day = today if reviews_by_day.get(today) else today - timedelta(days=1)
+    streak = 0
+    while reviews_by_day.get(day):
+        streak += 1
+        day -= timedelta(days=1)
+    return streak
+
+
+def heatmap_weeks(reviews_by_day, today, days=HEATMAP_DAYS):
+    """按周分列的热力图数据：每周 7 个格子（周一到周日），level 0–4 表示复习量的相对强度"""
+    start = today - timedelta(days=days - 1)
+    start -= timedelta(days=start.weekday())
+    peak = max(reviews_by_day.values(), default=0)
+    weeks = []
+    day = start
+    while day <= today:
+        week = []
+        for _ in range(7):
+            count = reviews_by_day.get(day, 0)
+            week.append({
+                'date': day,
+                'reviews': count,
+                'level': 0 if not count else min(4, 1 + int(4 * count / (peak + 1))),
+                'future': day > today,
+            })
+            day += timedelta(days=1)
+        weeks.append(week)
+    return weeks
+
+
+def retention_series(rows, today, days=RETENTION_DAYS, window=RETENTION_WINDOW):
+    """最近 days 天每天的正确率，以及 window 天滑动窗口的正确率；没有复习的日期正确率为 None"""
+    by_day = {row.day: row for row in rows}
+    series = []
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        row = by_day.get(day)
+        recent = [by_day.get(day - timedelta(days=i)) for i in range(window)]
+        reviews = sum(r.reviews for r in recent if r)
+        correct = sum(r.correct for r in recent if r)
+        series.append({
+            'date': day,
+            'accuracy': row.accuracy if row and row.reviews else None,
+            'rolling': correct / reviews if reviews else None,
+        })
+    return series
+
+
+def svg_points(values, width, height):
+    """把 [0, 1] 区间的数值序列转换为 SVG polyline 坐标，跳过 None"""
+    step = width / max(1, len(values) - 1)
+    return ' '.join(
+        f'{i * step:.1f},{(1 - value) * height:.1f}' for i, value in enumerate(values) if value is not None
+    )
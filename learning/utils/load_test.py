@@ -0,0 +1,352 @@
+"""
+闭环负载测试
+
+每个模拟学习者是一个协程，循环执行：打开单词卡片 → 获取并下载发音 → 提交反馈，上一个请求返回后
+才发出下一个请求（闭环），并发数即同时在线的学习者数量。逐级提高并发，观察吞吐量是否继续增长、
+延迟和错误率（尤其是 SQLite 的 "database is locked"）从哪一级开始恶化。
+
+学习路径默认是同步视图（/word_card/ 等），study_prefix=ASYNC_STUDY_PREFIX 时改用对应的异步视图，
+便于在同一份数据上比较两者。
+
+两种传输方式：
+- AsgiTransport：在进程内直接调用 english_learning.asgi.application，不经过网络
+  （Django 在 ASGI 下以 thread_sensitive 方式执行同步视图，同步视图实际是串行的）
+- HttpTransport：通过 HTTP/1.1 访问本地运行的服务器，可以测试 gunicorn / uvicorn 等多进程部署
+
+只依赖标准库。
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from learning.utils.benchmark import percentile
+
+DEFAULT_CONCURRENCY = [1, 2, 4, 8, 16]
+DEFAULT_DURATION = 10.0
+DEFAULT_CORRECT_RATE = 0.8
+LOCAL_HOST = 'localhost'
+# 异步学习视图的路径前缀（见 learning.urls）
+ASYNC_STUDY_PREFIX = '/async'
+
+_HIDDEN_INPUT_RE = re.compile(r'id="(taskId|wordId)" value="(\d+)"')
+_WORD_TEXT_RE = re.compile(r'<div class="word-text">\s*([^<]+?)\s*</div>')
+_CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        # 响应头名统一小写，Set-Cookie 可能有多个
+        self.headers = headers
+        self.body = body
+
+    def header(self, name):
+        name = name.lower()
+        for key, value in self.headers:
+            if key == name:
+                return value
+        return None
+
+    def cookies(self):
+        return [value for key, value in self.headers if key == 'set-cookie']
+
+    def text(self):
+        return self.body.decode('utf-8', errors='replace')
+
+
+class AsgiTransport:
+    """在进程内驱动 ASGI 应用"""
+
+    def __init__(self, application=None):
+        if application is None:
+            from english_learning.asgi import application
+        self.application = application
+
+    async def request(self, method, path, headers, body=b''):
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', LOCAL_HOST.encode())] + [
+                (key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in headers
+            ],
+            'server': (LOCAL_HOST, 80),
+            'client': ('127.0.0.1', 50000),
+        }
+        request_sent = False
+        disconnected = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        status = None
+        response_headers = []
+        chunks = []
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                response_headers.extend(
+                    (key.decode('latin-1').lower(), value.decode('latin-1')) for key, value in message['headers']
+                )
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            disconnected.set()
+        return Response(status, response_headers, b''.join(chunks))
+
+    async def close(self):
+        pass
+
+
+class HttpTransport:
+    """通过 HTTP/1.1 访问本地服务器（每个请求一个连接，Connection: close）"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        if parts.scheme != 'http':
+            raise ValueError("只支持 http:// 地址")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+
+    async def request(self, method, path, headers, body=b''):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            lines = [f'{method} {self.prefix}{path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                     'Connection: close', f'Content-Length: {len(body)}']
+            lines.extend(f'{key}: {value}' for key, value in headers)
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            status = int(status_line.split()[1])
+            response_headers = []
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                response_headers.append((key.strip().lower(), value.strip()))
+            response = Response(status, response_headers, b'')
+            length = response.header('content-length')
+            if response.header('transfer-encoding') == 'chunked':
+                response.body = await self._read_chunked(reader)
+            elif length is not None:
+                response.body = await reader.readexactly(int(length))
+            else:
+                response.body = await reader.read()
+            return response
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_chunked(reader):
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+    async def close(self):
+        pass
+
+
+class LoadStats:
+    """按接口汇总延迟，按类别统计错误"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.requests = 0
+
+    def record(self, endpoint, elapsed, error=None):
+        self.requests += 1
+        self.latencies.setdefault(endpoint, []).append(elapsed * 1000)
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def summary(self, duration):
+        all_latencies = sorted(value for values in self.latencies.values() for value in values)
+        error_count = sum(self.errors.values())
+        return {
+            'requests': self.requests,
+            'throughput': round(self.requests / duration, 2) if duration else 0.0,
+            'error_rate': round(error_count / self.requests, 4) if self.requests else 0.0,
+            'errors': dict(self.errors),
+            'p50_ms': round(percentile(all_latencies, 50), 2),
+            'p90_ms': round(percentile(all_latencies, 90), 2),
+            'p99_ms': round(percentile(all_latencies, 99), 2),
+            'endpoints': {
+                endpoint: {
+                    'requests': len(values),
+                    'p50_ms': round(percentile(sorted(values), 50), 2),
+                    'p99_ms': round(percentile(sorted(values), 99), 2),
+                }
+                for endpoint, values in sorted(self.latencies.items())
+            },
+        }
+
+
+def classify_error(response=None, exception=None):
+    """错误分类：database_locked / http_<状态码> / 异常类名；正常响应返回 None"""
+    if exception is not None:
+        text = str(exception)
+        return 'database_locked' if 'database is locked' in text else type(exception).__name__
+    if response.status >= 400:
+        return 'database_locked' if b'database is locked' in response.body else f'http_{response.status}'
+    return None
+
+
+class Learner:
+    """一个模拟学习者，维护自己的 Cookie（会话和 CSRF）"""
+
+    def __init__(self, transport, stats, username, password, correct_rate, rng, fetch_audio=True, study_prefix=''):
+        self.transport = transport
+        self.stats = stats
+        self.username = username
+        self.password = password
+        self.correct_rate = correct_rate
+        self.rng = rng
+        self.fetch_audio = fetch_audio
+        self.study_prefix = study_prefix
+        self.cookies = {}
+
+    async def call(self, endpoint, method, path, body=b'', content_type=None, extra_headers=(), expected=()):
+        headers = list(extra_headers)
+        if self.cookies:
+            headers.append(('Cookie', '; '.join(f'{k}={v}' for k, v in self.cookies.items())))
+        if content_type:
+            headers.append(('Content-Type', content_type))
+        start = time.perf_counter()
+        try:
+            response = await self.transport.request(method, path, headers, body)
+        except Exception as e:
+            self.stats.record(endpoint, time.perf_counter() - start, classify_error(exception=e))
+            return None
+        error = None if response.status in expected else classify_error(response)
+        self.stats.record(endpoint, time.perf_counter() - start, error)
+        for header in response.cookies():
+            cookie = SimpleCookie()
+            cookie.load(header)
+            for key, morsel in cookie.items():
+                self.cookies[key] = morsel.value
+        return response
+
+    async def login(self):
+        page = await self.call('login_form', 'GET', '/login/')
+        if page is None:
+            return False
+        match = _CSRF_INPUT_RE.search(page.text())
+        form = urlencode({
+            'username': self.username,
+            'password': self.password,
+            'csrfmiddlewaretoken': match.group(1) if match else '',
+        }).encode()
+        response = await self.call('login', 'POST', '/login/', form, 'application/x-www-form-urlencoded')
+        return response is not None and response.status == 302
+
+    async def study_card(self):
+        """学习一张卡片，返回 False 表示当日任务已完成或页面异常"""
+        page = await self.call('word_card', 'GET', f'{self.study_prefix}/word_card/')
+        if page is None or page.status != 200:
+            return False
+        text = page.text()
+        ids = dict(_HIDDEN_INPUT_RE.findall(text))
+        if 'taskId' not in ids:
+            return False
+
+        word = _WORD_TEXT_RE.search(text)
+        if self.fetch_audio and word:
+            # 没有发音的单词返回 404，属于正常结果
+            audio = await self.call('audio_url', 'GET', f'{self.study_prefix}/audio/{word.group(1)}/', expected=(404,))
+            if audio is not None and audio.status == 200:
+                audio_url = json.loads(audio.body).get('audio_url')
+                if audio_url:
+                    await self.call('audio_file', 'GET', f'/media/{audio_url}')
+
+        body = json.dumps({
+            'task_id': int(ids['taskId']),
+            'word_id': int(ids['wordId']),
+            'action': 'know' if self.rng.random() < self.correct_rate else 'forget',
+        }).encode()
+        await self.call('handle_feedback', 'POST', f'{self.study_prefix}/handle_feedback/', body, 'application/json',
+                        [('X-CSRFToken', self.cookies.get('csrftoken', ''))])
+        return True
+
+    async def run(self, deadline):
+        while time.monotonic() < deadline:
+            if not await self.study_card():
+                # 当日任务已完成：回到首页，保持负载不中断
+                await self.call('home', 'GET', '/')
+
+
+async def run_level(transport, accounts, concurrency, duration, correct_rate, seed=0, fetch_audio=True,
+                    study_prefix=''):
+    """以指定并发运行一轮负载，返回汇总结果"""
+    learners = [
+        Learner(transport, LoadStats(), *accounts[i % len(accounts)], correct_rate=correct_rate,
+                rng=random.Random(seed + i), fetch_audio=fetch_audio, study_prefix=study_prefix)
+        for i in range(concurrency)
+    ]
+    # 登录（密码哈希较慢）不计入测量窗口
+    logged_in = await asyncio.gather(*(learner.login() for learner in learners))
+    learners = [learner for learner, ok in zip(learners, logged_in) if ok]
+    if not learners:
+        raise RuntimeError("所有测试账号都登录失败，请检查用户名前缀和密码")
+
+    stats = LoadStats()
+    for learner in learners:
+        learner.stats = stats
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*(learner.run(deadline) for learner in learners))
+    summary = stats.summary(time.monotonic() - start)
+    summary['concurrency'] = concurrency
+    return summary
+
+
+async def run_load_test(transport, accounts, levels=None, duration=DEFAULT_DURATION,
+                        correct_rate=DEFAULT_CORRECT_RATE, seed=0, fetch_audio=True, study_prefix=''):
+    """
+    逐级提高并发运行负载测试，返回每一级的结果列表
+
+    accounts 为 [(用户名, 密码), ...]，学习者数量超过账号数时循环复用。
+    """
+    results = []
+    for concurrency in levels or DEFAULT_CONCURRENCY:
+        results.append(await run_level(transport, accounts, concurrency, duration, correct_rate, seed, fetch_audio,
+                                       study_prefix))
+    await transport.close()
+    return results
+
+
+def saturation_level(results, min_gain=0.1):
+    """吞吐量提升不足 min_gain 或开始出现错误的第一个并发级别，未饱和时返回 None"""
+    for previous, current in zip(results, results[1:]):
+        if current['error_rate'] > 0 or current['throughput'] < previous['throughput'] * (1 + min_gain):
+            return current['concurrency']
+    return None
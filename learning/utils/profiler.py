@@ -0,0 +1,144 @@
+"""
+按请求开启的采样分析器
+
+- 默认关闭：只有携带正确令牌的请求头、管理员带 ?__profile=1 的请求，或按 PROFILER_SAMPLE_RATE
+  随机抽中的请求才会被分析，其余请求只多几次属性读取
+- 分析期间由一个后台线程按固定间隔读取请求线程的调用栈（sys._current_frames），
+  不像 cProfile 那样挂钩每次函数调用，开销基本与请求本身无关
+- 结果保存为折叠栈格式（"帧;帧;帧 次数"），可以直接交给 flamegraph.pl、speedscope 等工具生成火焰图，
+  同名 .json 文件记录请求信息；目录内只保留最近 PROFILER_MAX_FILES 个结果
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_MAX_FILES = 200
+PROFILE_QUERY_PARAM = '__profile'
+PROFILE_HEADER = 'X-Profile'
+
+_NAME_RE = re.compile(r'^[\w.-]+$')
+
+
+class StackSampler:
+    """定时采样指定线程的调用栈，按折叠栈计数"""
+
+    def __init__(self, thread_id, interval=DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[collapse_stack(frame)] += 1
+                self.samples += 1
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse_stack(frame):
+    """把调用栈转换为从外到内、以分号连接的字符串"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame).replace(';', ':'))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILER_DIR', os.path.join(settings.BASE_DIR, 'profiles')))
+
+
+def should_profile(request, rng_value):
+    """判断是否分析该请求；rng_value 为 [0, 1) 的随机数"""
+    token = getattr(settings, 'PROFILER_TOKEN', None)
+    if token and request.headers.get(PROFILE_HEADER) == token:
+        return True
+    if PROFILE_QUERY_PARAM in request.GET:
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and user.is_staff:
+            return True
+    return rng_value < getattr(settings, 'PROFILER_SAMPLE_RATE', 0.0)
+
+
+def save_profile(counts, meta, directory=None, max_files=None):
+    """写入折叠栈和元数据，并清理超出数量上限的旧结果，返回文件名（不含扩展名）"""
+    directory = directory or profile_dir()
+    max_files = max_files or getattr(settings, 'PROFILER_MAX_FILES', DEFAULT_MAX_FILES)
+    os.makedirs(directory, exist_ok=True)
+
+    view = re.sub(r'[^\w.-]', '_', meta.get('view') or 'unknown')
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}-{view}"
+    with open(os.path.join(directory, f'{name}.folded'), 'w', encoding='utf-8') as f:
+        for stack, count in counts.most_common():
+            f.write(f'{stack} {count}\n')
+    with open(os.path.join(directory, f'{name}.json'), 'w', encoding='utf-8') as f:
+        json.dump(dict(meta, name=name), f, ensure_ascii=False)
+
+    rotate_profiles(directory, max_files)
+    return name
+
+
+def rotate_profiles(directory, max_files):
+    entries = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in entries[:max(0, len(entries) - max_files)]:
+        name = entry.name[:-len('.json')]
+        for suffix in ('.json', '.folded'):
+            try:
+                os.remove(os.path.join(directory, name + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(directory=None):
+    """按时间倒序返回已保存的分析结果元数据"""
+    directory = directory or profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith('.json'):
+            continue
+        try:
+            with open(entry.path, encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda meta: meta.get('started_at', 0), reverse=True)
+    return profiles
+
+
+def profile_path(name, directory=None):
+    """返回折叠栈文件路径，名称不合法或文件不存在时返回 None"""
+    if not _NAME_RE.match(name or ''):
+        return None
+    path = os.path.join(directory or profile_dir(), f'{name}.folded')
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,117 @@
+"""
+热点查询的执行计划检查
+
+每个热点查询登记一个构造函数（返回 QuerySet，不访问数据库）和对执行计划的期望：
+- indexes: 计划中必须出现的片段，通常是索引名，如 "USING INDEX user_priority_next_idx"
+- allow_scan: 是否允许 SCAN（全表扫描或整个索引顺序扫描）
+- allow_temp_sort: 是否允许 "USE TEMP B-TREE"（ORDER BY / DISTINCT / GROUP BY 需要临时排序）
+
+check_hot_queries() 对每个查询执行 EXPLAIN QUERY PLAN 并返回不符合期望的项，
+learning.tests 中对其做断言；新增热点查询时用 @hot_query 登记即可纳入检查。
+仅支持 SQLite。
+"""
+from collections import namedtuple
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import connections
+
+from learning.models import AudioFile, DailyTask, ReviewForecast, UserWord, Word
+
+HotQuery = namedtuple('HotQuery', ['name', 'build', 'indexes', 'allow_scan', 'allow_temp_sort'])
+
+HOT_QUERIES = {}
+
+# 构造查询时使用的占位对象，EXPLAIN 不需要真实数据
+_USER = User(pk=1)
+_TASK = DailyTask(pk=1, user=_USER)
+
+
+def hot_query(name, indexes=(), allow_scan=False, allow_temp_sort=False):
+    """登记热点查询的装饰器"""
+    def decorator(build):
+        HOT_QUERIES[name] = HotQuery(name, build, tuple(indexes), allow_scan, allow_temp_sort)
+        return build
+    return decorator
+
+
+def explain(queryset, using='default'):
+    """返回 EXPLAIN QUERY PLAN 的 detail 列"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise NotImplementedError("执行计划检查只支持 SQLite")
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_violations(query, using='default'):
+    """返回 (执行计划, 问题列表)"""
+    plan = explain(query.build(), using)
+    problems = []
+    for expected in query.indexes:
+        if not any(expected in line for line in plan):
+            problems.append(f"未使用 {expected}")
+    if not query.allow_scan:
+        problems.extend(f"出现扫描: {line}" for line in plan if line.startswith('SCAN '))
+    if not query.allow_temp_sort:
+        problems.extend(f"出现临时排序: {line}" for line in plan if 'USE TEMP B-TREE' in line)
+    return plan, problems
+
+
+def check_hot_queries(names=None, using='default'):
+    """检查登记的热点查询，返回 {名称: (执行计划, 问题列表)}，只包含有问题的查询"""
+    failures = {}
+    for name in names or sorted(HOT_QUERIES):
+        plan, problems = plan_violations(HOT_QUERIES[name], using)
+        if problems:
+            failures[name] = (plan, problems)
+    return failures
+
+
+@hot_query('due_words', indexes=['USING INDEX user_priority_next_idx'])
+def _due_words():
+    return UserWord.due_queryset(_USER)[:25]
+
+
+# get_due_words 的随机半部分：order_by('?') 必然需要临时排序，只要求按 user 定位而不是全表扫描
+@hot_query('due_words_random', indexes=['SEARCH learning_userword USING INDEX'], allow_temp_sort=True)
+def _due_words_random():
+    return UserWord.due_queryset(_USER).exclude(id__in=[1, 2]).order_by('?')[:25]
+
+
+# 按关联表 Word 的词频排序，临时排序不可避免；候选集由 user_review_count_idx 缩小到未复习的单词
+@hot_query('new_user_words', indexes=['USING INDEX user_review_count_idx'], allow_temp_sort=True)
+def _new_user_words():
+    from learning.views import new_user_words
+    return new_user_words(_USER, [1, 2])[:10]
+
+
+# 沿 frequency_rank 索引顺序读取，取够 LIMIT 条即停止，属于预期内的索引扫描
+@hot_query('unlearned_words', indexes=['USING INDEX learning_word_frequency_rank'], allow_scan=True)
+def _unlearned_words():
+    from learning.views import unlearned_words
+    return unlearned_words(_USER)[:20]
+
+
+@hot_query('pending_task_words', indexes=['SEARCH learning_taskword USING INDEX'])
+def _pending_task_words():
+    from learning.views import pending_task_words
+    return pending_task_words(_TASK)
+
+
+@hot_query('audio_lookup', indexes=['USING INDEX audio_word_language_idx'])
+def _audio_lookup():
+    return AudioFile.objects.filter(word_text='apple', language='us').order_by('pk')[:1]
+
+
+# 按主键分页：沿 rowid 顺序读取到 OFFSET + LIMIT 为止
+@hot_query('word_list_page', allow_scan=True)
+def _word_list_page():
+    return Word.objects.all().order_by('id')[15:30]
+
+
+@hot_query('review_forecast', indexes=['SEARCH learning_reviewforecast USING INDEX'])
+def _review_forecast():
+    return ReviewForecast.objects.filter(user=_USER, day__lt=date(2025, 2, 1), day__gte=date(2025, 1, 1))
@@ -0,0 +1,214 @@
+"""
+请求级 SQL 与耗时统计
+
+- QueryRecorder 通过 connection.execute_wrapper 挂在数据库连接上，记录一次请求内的查询次数、SQL 耗时，
+  以及按 SQL 模板（参数化后的语句）统计的重复查询（N+1 的典型特征）
+- 异步视图的查询在 sync_to_async 的线程中执行，连接是线程本地的，无法从中间件直接挂上 execute_wrapper；
+  改为通过 ContextVar 传递当前请求的记录器（sync_to_async 会复制上下文），
+  由 dispatch_to_current_recorder 在每个连接上转发
+- MetricsRegistry 在进程内按视图名聚合直方图，render_prometheus 输出 Prometheus 文本格式
+- 统计只在当前进程内累计，多进程部署时由 Prometheus 分别抓取各进程后汇总
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# 直方图分桶
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+# 每个视图保留的重复查询签名数量上限，避免内存无限增长
+MAX_SIGNATURES_PER_VIEW = 20
+# 未匹配到路由的请求
+UNRESOLVED_VIEW = '<unresolved>'
+
+DEFAULT_BUDGET = {'queries': 50, 'latency_ms': 1000}
+
+
+class QueryRecorder:
+    """单个请求的查询记录器，作为 execute_wrapper 使用"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        """返回 {SQL: 执行次数}，只包含执行了不止一次的语句"""
+        return {sql: count for sql, count in self.statements.items() if count > 1}
+
+
+_current_recorder = ContextVar('request_metrics_recorder', default=None)
+
+
+def dispatch_to_current_recorder(execute, sql, params, many, context):
+    """常驻在每个数据库连接上的 execute_wrapper，转发给当前上下文的记录器"""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_dispatcher(connection):
+    """在连接上挂载 dispatch_to_current_recorder（由 connection_created 信号调用）"""
+    if dispatch_to_current_recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_to_current_recorder)
+
+
+def set_current_recorder(recorder):
+    return _current_recorder.set(recorder)
+
+
+def reset_current_recorder(token):
+    _current_recorder.reset(token)
+
+
+def signature(sql):
+    """SQL 模板的短哈希，用作指标标签"""
+    return hashlib.sha1(sql.encode('utf-8')).hexdigest()[:12]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sql_time = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.duplicate_queries = 0
+        self.budget_violations = 0
+        # 签名 → [SQL, 累计重复执行次数]
+        self.signatures = {}
+
+    def record_duplicates(self, duplicates):
+        for sql, count in duplicates.items():
+            key = signature(sql)
+            entry = self.signatures.get(key)
+            if entry is None:
+                if len(self.signatures) >= MAX_SIGNATURES_PER_VIEW:
+                    continue
+                entry = self.signatures[key] = [sql, 0]
+            # 只计多出来的执行次数
+            entry[1] += count - 1
+            self.duplicate_queries += count - 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view, recorder, total_seconds, over_budget=False):
+        with self._lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+            metrics.latency.observe(total_seconds)
+            metrics.sql_time.observe(recorder.duration)
+            metrics.queries.observe(recorder.count)
+            metrics.record_duplicates(recorder.duplicates())
+            if over_budget:
+                metrics.budget_violations += 1
+
+    def reset(self):
+        with self._lock:
+            self.views = {}
+
+    def render_prometheus(self):
+        """输出 Prometheus 文本格式（0.0.4）"""
+        lines = []
+        with self._lock:
+            views = sorted(self.views.items())
+            self._render_histogram(lines, views, 'latency', 'learning_request_duration_seconds',
+                                   '请求总耗时（秒）')
+            self._render_histogram(lines, views, 'sql_time', 'learning_request_sql_duration_seconds',
+                                   '请求内 SQL 执行耗时（秒）')
+            self._render_histogram(lines, views, 'queries', 'learning_request_queries',
+                                   '请求内 SQL 查询次数')
+
+            lines.append('# HELP learning_request_duplicate_queries_total 重复执行的 SQL 次数（不含首次）')
+            lines.append('# TYPE learning_request_duplicate_queries_total counter')
+            for view, metrics in views:
+                for key, (_, count) in sorted(metrics.signatures.items()):
+                    lines.append(
+                        f'learning_request_duplicate_queries_total{{view="{_escape(view)}",signature="{key}"}} {count}'
+                    )
+
+            lines.append('# HELP learning_request_budget_exceeded_total 超出查询次数或耗时预算的请求数')
+            lines.append('# TYPE learning_request_budget_exceeded_total counter')
+            for view, metrics in views:
+                lines.append(f'learning_request_budget_exceeded_total{{view="{_escape(view)}"}} '
+                             f'{metrics.budget_violations}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histogram(lines, views, attr, name, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for view, metrics in views:
+            histogram = getattr(metrics, attr)
+            label = f'view="{_escape(view)}"'
+            for bound, total in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {total}')
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{{label}}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{{label}}} {histogram.count}')
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def get_budget(view):
+    """读取视图的查询次数 / 耗时预算，未单独配置的视图使用 default"""
+    budgets = getattr(settings, 'REQUEST_METRICS_BUDGETS', {})
+    budget = dict(DEFAULT_BUDGET)
+    budget.update(budgets.get('default', {}))
+    budget.update(budgets.get(view, {}))
+    return budget
+
+
+def exceeded_budget(view, recorder, total_seconds):
+    """返回超出预算的项目列表，如 ['queries', 'latency_ms']"""
+    budget = get_budget(view)
+    exceeded = []
+    if budget.get('queries') is not None and recorder.count > budget['queries']:
+        exceeded.append('queries')
+    if budget.get('latency_ms') is not None and total_seconds * 1000 > budget['latency_ms']:
+        exceeded.append('latency_ms')
+    return exceeded
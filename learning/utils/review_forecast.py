@@ -0,0 +1,109 @@
+"""
+复习量预测
+
+ReviewForecast 按 (用户, 日期) 保存到期单词数，预测接口只读取该用户未来若干天的行，
+耗时与词汇量无关。维护方式：
+- 增量：process_feedback / 负载均衡命令改变 next_review 时在同一个事务中把计数从旧日期移到新日期，
+  新建 UserWord 时加一（post_save 信号），批量删除单词时按天扣减；每次调整是一条 upsert（见 counters）
+- 全量：rebuild_forecast 用一次 GROUP BY 重算全部计数，由 rebuild_review_forecast 命令每晚执行，
+  纠正绕过上述入口的修改（如直接 save() 的旧代码、bulk_create）造成的偏差
+
+过期未复习的单词保留在原到期日期上，预测时合并为 overdue。
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from learning.models import ReviewForecast, UserWord
+from learning.utils.counters import increment
+
+DEFAULT_FORECAST_DAYS = 30
+MAX_FORECAST_DAYS = 365
+
+
+def local_day(moment):
+    return timezone.localtime(moment).date()
+
+
+def adjust(user_id, day, delta):
+    """给 (user_id, day) 的计数加上 delta，不低于 0；行不存在时创建"""
+    increment(ReviewForecast, {'user_id': user_id, 'day': day}, {'due_count': delta})
+
+
+def shift_due(user_id, old_review, new_review):
+    """单词的下次复习时间从 old_review 改为 new_review；在调用方更新 next_review 的事务中执行"""
+    old_day, new_day = local_day(old_review), local_day(new_review)
+    if old_day == new_day:
+        return
+    adjust(user_id, old_day, -1)
+    adjust(user_id, new_day, 1)
+
+
+def add_due(user_id, next_review):
+    adjust(user_id, local_day(next_review), 1)
+
+
+def remove_due(user_words):
+    """从预测中扣除即将删除的 UserWord（查询集），按 (用户, 日期) 分组扣减"""
+    rows = (
+        user_words.annotate(day=TruncDate('next_review'))
+        .values('user_id', 'day')
+        .annotate(count=Count('id'))
+    )
+    for row in rows:
+        adjust(row['user_id'], row['day'], -row['count'])
+
+
+def count_by_day(user_ids=None):
+    """用一次 GROUP BY 统计 UserWord 的到期分布，返回 {(用户ID, 日期): 数量}"""
+    queryset = UserWord.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    rows = (
+        queryset.annotate(day=TruncDate('next_review'))
+        .values('user_id', 'day')
+        .annotate(count=Count('id'))
+    )
+    return Counter({(row['user_id'], row['day']): row['count'] for row in rows})
+
+
+@transaction.atomic
+def rebuild_forecast(user_ids=None):
+    """全量重建预测表，返回 (写入行数, 重建前与实际计数不一致的行数)"""
+    actual = count_by_day(user_ids)
+    existing = ReviewForecast.objects.all()
+    if user_ids is not None:
+        existing = existing.filter(user_id__in=user_ids)
+    stored = Counter({(user_id, day): count for user_id, day, count in existing.values_list('user_id', 'day', 'due_count')})
+    drift = sum(1 for key in set(actual) | set(stored) if actual[key] != stored[key])
+
+    existing.delete()
+    ReviewForecast.objects.bulk_create(
+        [ReviewForecast(user_id=user_id, day=day, due_count=count) for (user_id, day), count in actual.items()],
+        batch_size=1000,
+    )
+    return len(actual), drift
+
+
+def forecast(user, days=DEFAULT_FORECAST_DAYS, today=None):
+    """
+    返回 {'overdue': 今天之前到期的数量, 'days': [{'date': 日期, 'due': 数量}, ...]}
+
+    days 从今天开始，共 days 天，没有到期单词的日期为 0。
+    """
+    today = today or timezone.localdate()
+    end = today + timedelta(days=days)
+    rows = ReviewForecast.objects.filter(user=user, day__lt=end)
+    overdue = rows.filter(day__lt=today).aggregate(total=Sum('due_count'))['total'] or 0
+    counts = dict(rows.filter(day__gte=today).values_list('day', 'due_count'))
+    return {
+        'overdue': overdue,
+        'days': [
+            {'date': day, 'due': counts.get(day, 0)}
+            for day in (today + timedelta(days=offset) for offset in range(days))
+        ],
+    }
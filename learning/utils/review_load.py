@@ -0,0 +1,172 @@
+"""
+按容量均衡的复习日期选择
+
+process_feedback 原来在计算出的间隔上加 ±10% 的随机抖动，抖动是独立的，某些天仍会堆出大量复习（复习墙）。
+开启 REVIEW_LOAD_BALANCING 后改为：
+- 每个用户在缓存中维护未来每天的到期单词数（直方图），缓存丢失时从复习量预测表（ReviewForecast）读取，
+  之后由 process_feedback 在更新成功后增量调整（旧日期减一、新日期加一）
+- 选择下次复习日期时，在间隔的 ±REVIEW_LOAD_FUZZ 窗口内选到期数最少的一天，负载相同时选最接近原间隔的一天
+
+直方图只用于选择日期，并发请求之间的读改写可能有少量偏差，不影响正确性；
+smooth_user 在已有数据上做一次整体均衡（见 smooth_review_load 命令）。
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from learning.models import ReviewForecast, UserWord
+from learning.utils.review_forecast import shift_due
+
+DEFAULT_FUZZ = 0.1
+# 直方图只统计这么多天以内的到期单词
+HORIZON_DAYS = 365
+HISTOGRAM_TIMEOUT = 60 * 60 * 24
+
+
+def histogram_key(user_id):
+    return f'review_load:{user_id}'
+
+
+def balancing_enabled():
+    return getattr(settings, 'REVIEW_LOAD_BALANCING', False)
+
+
+def load_fuzz():
+    return getattr(settings, 'REVIEW_LOAD_FUZZ', DEFAULT_FUZZ)
+
+
+def due_day(moment):
+    return timezone.localtime(moment).date()
+
+
+def build_histogram(user_id, now=None):
+    """从复习量预测表读取未来的到期单词数，返回 {日期序数: 数量}"""
+    today = due_day(now or timezone.now())
+    rows = ReviewForecast.objects.filter(
+        user_id=user_id, day__gte=today, day__lt=today + timedelta(days=HORIZON_DAYS), due_count__gt=0
+    ).values_list('day', 'due_count')
+    return {day.toordinal(): count for day, count in rows}
+
+
+def get_histogram(user_id):
+    histogram = cache.get(histogram_key(user_id))
+    if histogram is None:
+        histogram = build_histogram(user_id)
+        cache.set(histogram_key(user_id), histogram, HISTOGRAM_TIMEOUT)
+    return histogram
+
+
+def invalidate_histogram(user_id):
+    cache.delete(histogram_key(user_id))
+
+
+def interval_window(interval, fuzz):
+    """间隔允许的整数天范围 [lo, hi]，至少一天之后"""
+    lo = max(1, round(interval * (1 - fuzz)))
+    hi = max(lo, round(interval * (1 + fuzz)))
+    return lo, hi
+
+
+def least_loaded_offset(histogram, today, lo, hi, target):
+    """[lo, hi] 中到期数最少的天数偏移，负载相同时选最接近 target 的"""
+    base = today.toordinal()
+    return min(range(lo, hi + 1), key=lambda offset: (histogram.get(base + offset, 0), abs(offset - target), offset))
+
+
+def balanced_next_review(user_id, interval, now):
+    """在间隔窗口内选择负载最低的一天，保留当前的时刻"""
+    lo, hi = interval_window(interval, load_fuzz())
+    offset = least_loaded_offset(get_histogram(user_id), due_day(now), lo, hi, interval)
+    return now + timedelta(days=offset)
+
+
+def record_move(user_id, old_review, new_review):
+    """单词的下次复习时间从 old_review 改为 new_review 后增量更新直方图；直方图不在缓存中时不处理"""
+    histogram = cache.get(histogram_key(user_id))
+    if histogram is None:
+        return
+    today = due_day(timezone.now()).toordinal()
+    old_day = due_day(old_review).toordinal()
+    if histogram.get(old_day, 0) > 0:
+        histogram[old_day] -= 1
+    new_day = due_day(new_review).toordinal()
+    if today <= new_day < today + HORIZON_DAYS:
+        histogram[new_day] = histogram.get(new_day, 0) + 1
+    # 顺便清理已经过去的日期
+    for day in [day for day, count in histogram.items() if day < today or count <= 0]:
+        del histogram[day]
+    cache.set(histogram_key(user_id), histogram, HISTOGRAM_TIMEOUT)
+
+
+def smooth_user(user_id, now=None, fuzz=None, spread_overdue=0):
+    """
+    重新均衡一个用户已有的复习安排，返回 (需要更新的 UserWord 列表, 均衡前单日峰值, 均衡后单日峰值)
+
+    未来 HORIZON_DAYS 天内到期的单词按原到期时间依次处理，每个单词可以在其间隔的 ±fuzz 窗口内移动
+    （间隔按 next_review - last_review 计算），贪心地放到窗口内当前负载最低的一天。
+    spread_overdue > 0 时，已过期的积压按优先级从高到低分摊到今天起的 spread_overdue 天内。
+    返回的实例只修改了 next_review，由调用方用 apply_smoothing 写回。
+    """
+    now = now or timezone.now()
+    fuzz = load_fuzz() if fuzz is None else fuzz
+    today = due_day(now)
+    horizon = now + timedelta(days=HORIZON_DAYS)
+    words = list(
+        UserWord.objects.filter(user_id=user_id, next_review__lt=horizon)
+        .only('id', 'user_id', 'next_review', 'last_review', 'priority', 'version')
+        .order_by('next_review')
+    )
+
+    overdue = [word for word in words if word.next_review < now]
+    upcoming = [word for word in words if word.next_review >= now]
+
+    # 均衡前的每日到期数；参与分摊的积压都算在今天
+    before = {0: len(overdue)} if spread_overdue > 0 else {}
+    for word in upcoming:
+        day = (due_day(word.next_review) - today).days
+        before[day] = before.get(day, 0) + 1
+
+    histogram = {}
+    changed = []
+
+    def place(word, offset, new_review):
+        day = today.toordinal() + offset
+        histogram[day] = histogram.get(day, 0) + 1
+        if new_review != word.next_review:
+            word.previous_review = word.next_review
+            word.next_review = new_review
+            changed.append(word)
+
+    if spread_overdue > 0:
+        overdue.sort(key=lambda word: -word.priority)
+        for word in overdue:
+            offset = least_loaded_offset(histogram, today, 0, spread_overdue - 1, 0)
+            # 分到今天的保持原样（立即可复习）
+            place(word, offset, word.next_review if offset == 0 else now + timedelta(days=offset))
+
+    for word in upcoming:
+        scheduled = (due_day(word.next_review) - today).days
+        interval = max(1.0, (word.next_review - word.last_review).total_seconds() / 86400)
+        slack = round(interval * fuzz)
+        lo = max(1 if scheduled >= 1 else 0, scheduled - slack)
+        hi = max(lo, scheduled + slack)
+        offset = least_loaded_offset(histogram, today, lo, hi, scheduled)
+        place(word, offset, word.next_review + timedelta(days=offset - scheduled))
+
+    return changed, max(before.values(), default=0), max(histogram.values(), default=0)
+
+
+def apply_smoothing(words):
+    """按版本号条件写回 next_review，跳过期间被 process_feedback 更新过的单词，返回写入数量"""
+    written = 0
+    with transaction.atomic():
+        for word in words:
+            if UserWord.objects.filter(pk=word.pk, version=word.version).update(
+                next_review=word.next_review, version=word.version + 1
+            ):
+                shift_due(word.user_id, word.previous_review, word.next_review)
+                written += 1
+    return written
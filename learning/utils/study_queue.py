@@ -0,0 +1,72 @@
+"""
+当日任务的学习队列
+
+队列保存在缓存中（按任务 ID），元素为待学习单词的 UserWord ID：
+- 取下一张卡片只看队首，O(1)；卡片在回答之前一直留在队首，刷新页面不会换词
+- 回答“认识”后出队；回答“忘记”后重新插入到第 STUDY_RELEARN_STEPS 个位置，即再学 K 张卡片后重现，
+  而不是像随机抽取那样可能立刻重现或很久不出现
+- 缓存丢失时按 TaskWord 状态（new / retry）重建，顺序随机
+"""
+import random
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_RELEARN_STEPS = 3
+# 当日任务只在当天有效
+QUEUE_TIMEOUT = 60 * 60 * 24
+
+
+def queue_key(task_id):
+    return f'study_queue:{task_id}'
+
+
+def relearn_steps():
+    return getattr(settings, 'STUDY_RELEARN_STEPS', DEFAULT_RELEARN_STEPS)
+
+
+def build_queue(word_ids, rng=random):
+    word_ids = list(word_ids)
+    rng.shuffle(word_ids)
+    return deque(word_ids)
+
+
+def requeue(queue, word_id, is_correct, steps):
+    """按回答结果调整队列：答对出队，答错插入到第 steps 个位置（队列不足时排到队尾）"""
+    try:
+        # 回答的通常是队首，remove 立即命中
+        queue.remove(word_id)
+    except ValueError:
+        pass
+    if not is_correct:
+        queue.insert(min(steps, len(queue)), word_id)
+    return queue
+
+
+def load_queue(task_id):
+    """缓存中的队列，不存在时返回 None"""
+    return cache.get(queue_key(task_id))
+
+
+def save_queue(task_id, queue):
+    cache.set(queue_key(task_id), queue, QUEUE_TIMEOUT)
+
+
+async def aload_queue(task_id):
+    return await cache.aget(queue_key(task_id))
+
+
+async def asave_queue(task_id, queue):
+    await cache.aset(queue_key(task_id), queue, QUEUE_TIMEOUT)
+
+
+def record_answer(task_id, word_id, is_correct):
+    """回答后更新队列；队列不在缓存中时不做处理，下次取卡片时会从 TaskWord 状态重建"""
+    queue = load_queue(task_id)
+    if queue is not None:
+        save_queue(task_id, requeue(queue, word_id, is_correct, relearn_steps()))
+
+
+def discard_queue(task_id):
+    cache.delete(queue_key(task_id))
@@ -0,0 +1,169 @@
+"""
+合成数据生成
+
+按固定随机种子生成 N 个用户 × M 个单词的数据集，全部使用 bulk_create / bulk_update 写入：
+- 单词：带前缀的虚构拼写、释义和例句，词频排名随机分配
+- 学习记录：每个用户学过词库的一部分（偏向高频词），复习次数、错误次数、连续正确次数与记忆阶段相互一致，
+  下次复习时间分布在过去一周到未来一个月之间（约两成已到期）
+- 当日任务：部分用户已有当天的 DailyTask 和 TaskWord
+- 派生数据：复习量预测、每日学习统计和单词作答计数按生成的学习记录重建
+
+同一参数和种子生成的数据完全相同，便于不同版本之间对比性能。
+"""
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from learning.models import DailyTask, TaskWord, UserWord, Word
+from learning.utils.learning_stats import rollup_user
+from learning.utils.review_forecast import rebuild_forecast
+from learning.utils.word_difficulty import rebuild_word_stats
+from learning.utils.word_deletion import bulk_delete_words
+from learning.utils.word_forms import bump_forms_version
+
+DEFAULT_PREFIX = 'synthetic'
+BULK_BATCH_SIZE = 1000
+# 用户学过的单词占词库的比例范围
+LEARNED_RATIO = (0.2, 0.8)
+# 已有当日任务的用户比例
+TASK_USER_RATIO = 0.5
+TASK_SIZE = 40
+
+_SYLLABLES = ['ba', 'co', 'de', 'fi', 'gu', 'ha', 'ji', 'ko', 'lu', 'ma', 'ne', 'po', 'qua', 'ri', 'st',
+              'ta', 've', 'wo', 'xy', 'ze', 'tion', 'ment', 'er', 'ing', 'ly']
+_DEFINITIONS = ['n. 事物；东西', 'v. 移动；行走', 'adj. 明亮的；聪明的', 'adv. 迅速地', 'n. 方法；途径',
+                'v. 思考；认为', 'adj. 重要的', 'n. 时间；时刻', 'v. 改变；变化', 'n. 地方；位置']
+
+
+def _fake_word(rng, prefix, index):
+    # 前缀便于清理，末尾加编号保证唯一
+    return prefix + ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 3))) + f'{index:05d}'
+
+
+def _review_history(rng, now):
+    """生成一条自洽的复习记录字段"""
+    review_count = min(int(rng.expovariate(1 / 4)), 30)
+    error_count = sum(1 for _ in range(review_count) if rng.random() < 0.25)
+    correct_streak = rng.randint(-2, max(0, review_count - error_count))
+    if review_count >= 4 and error_count == 0:
+        phase = 'mastered'
+    elif review_count > 1:
+        phase = 'retention'
+    else:
+        phase = 'initial'
+
+    strength = max(0.5, min(3.0 + 1.5 ** correct_streak - 0.8 * math.log1p(error_count), 15.0))
+    last_review = now - timedelta(days=rng.uniform(0, 30))
+    intervals = []
+    date = last_review - timedelta(days=sum(rng.uniform(1, 5) for _ in range(review_count)))
+    for _ in range(review_count):
+        interval = round(rng.uniform(1, 21), 1)
+        date += timedelta(days=interval / 4)
+        intervals.append({'date': date.isoformat(), 'interval': interval,
+                          'correct': rng.random() > 0.25, 'strength': round(strength, 2)})
+
+    return {
+        'review_count': review_count,
+        'error_count': error_count,
+        'correct_streak': correct_streak,
+        'memory_phase': phase,
+        'memory_strength': strength,
+        'priority': round(rng.uniform(0.1, 20.0), 3),
+        # 约两成已到期
+        'next_review': now + timedelta(days=rng.uniform(-7, 30)),
+        'history_intervals': intervals,
+        'last_review': last_review,
+    }
+
+
+def generate_dataset(users=10, words=1000, seed=0, prefix=DEFAULT_PREFIX):
+    """
+    生成合成数据集，返回各表写入的行数
+
+    用户名为 <prefix>_user_<序号>，密码统一为 "password"。
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    today = timezone.localdate()
+    counts = {}
+
+    with transaction.atomic():
+        ranks = list(range(1, words + 1))
+        rng.shuffle(ranks)
+        word_objs = [
+            Word(
+                word=_fake_word(rng, prefix, i),
+                definition=rng.choice(_DEFINITIONS),
+                example=f'This is an example sentence number {i}.',
+                frequency_rank=ranks[i],
+            )
+            for i in range(words)
+        ]
+        word_objs = Word.objects.bulk_create(word_objs, batch_size=BULK_BATCH_SIZE)
+        counts['words'] = len(word_objs)
+        by_frequency = sorted(word_objs, key=lambda w: w.frequency_rank)
+
+        password = make_password('password')
+        user_objs = User.objects.bulk_create(
+            [User(username=f'{prefix}_user_{i:05d}', password=password) for i in range(users)],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        counts['users'] = len(user_objs)
+
+        user_words = []
+        for user in user_objs:
+            size = int(len(word_objs) * rng.uniform(*LEARNED_RATIO))
+            # 从高频端的 1.5 倍范围内抽取，模拟先学常用词
+            learned = rng.sample(by_frequency[:min(len(by_frequency), int(size * 1.5))], size)
+            for word in learned:
+                history = _review_history(rng, now)
+                last_review = history.pop('last_review')
+                user_word = UserWord(user=user, word=word, **history)
+                user_word._synthetic_last_review = last_review
+                user_words.append(user_word)
+        UserWord.objects.bulk_create(user_words, batch_size=BULK_BATCH_SIZE)
+        # last_review 为 auto_now，bulk_create 时会被覆盖为当前时间，这里再写回历史值
+        for user_word in user_words:
+            user_word.last_review = user_word._synthetic_last_review
+        UserWord.objects.bulk_update(user_words, ['last_review'], batch_size=BULK_BATCH_SIZE)
+        counts['user_words'] = len(user_words)
+        # bulk_create 不触发信号，复习量预测和每日统计按新用户重建
+        rebuild_forecast([user.id for user in user_objs])
+        for user in user_objs:
+            rollup_user(user.id)
+        rebuild_word_stats()
+
+        by_user = {}
+        for user_word in user_words:
+            by_user.setdefault(user_word.user_id, []).append(user_word)
+        tasks = [
+            DailyTask(user=user, date=today)
+            for user in user_objs
+            if by_user.get(user.id) and rng.random() < TASK_USER_RATIO
+        ]
+        tasks = DailyTask.objects.bulk_create(tasks, batch_size=BULK_BATCH_SIZE)
+        task_words = []
+        for task in tasks:
+            candidates = by_user[task.user_id]
+            for user_word in rng.sample(candidates, min(TASK_SIZE, len(candidates))):
+                status = rng.choices(['new', 'retry', 'known'], weights=[5, 2, 3])[0]
+                task_words.append(TaskWord(task=task, word=user_word, status=status))
+        TaskWord.objects.bulk_create(task_words, batch_size=BULK_BATCH_SIZE)
+        counts['daily_tasks'] = len(tasks)
+        counts['task_words'] = len(task_words)
+
+        # bulk_create 不触发 post_save，手动让词形映射重新加载
+        transaction.on_commit(bump_forms_version)
+    return counts
+
+
+def clear_dataset(prefix=DEFAULT_PREFIX):
+    """删除以 prefix 生成的用户、单词及其学习记录，返回 (用户数, 单词数)"""
+    users = User.objects.filter(username__startswith=f'{prefix}_user_').delete()[1].get(User._meta.label, 0)
+    words = bulk_delete_words(queryset=Word.objects.filter(word__startswith=prefix))
+    return users, words
@@ -0,0 +1,98 @@
+"""
+当日任务离线包
+
+把 DailyTask 中的所有卡片数据和引用到的 mp3 一次性打包成 gzip 压缩的 JSON：
+- 音频按文件路径去重，base64 编码后放在 audio 字典中，卡片通过 audio 键引用
+- 包内容的 sha256 作为 ETag，客户端已有相同版本时只需一次 304
+- 压缩结果按卡片内容签名缓存（任务单词状态 + 单词的释义、例句、音频路径等），
+  任务状态和单词都不变时不重复读取音频；编辑单词后签名变化，不会继续返回旧包
+"""
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+
+from learning.models import TaskWord
+from learning.utils.audio_pack import digest_from_path, get_audio_pack
+
+BUNDLE_CACHE_TIMEOUT = 60 * 60
+# 写入离线包的单词字段，任一字段变化都会生成新的包
+SIGNATURE_WORD_FIELDS = ('word', 'phonetic', 'definition', 'example', 'phonetic_us', 'phonetic_uk')
+
+
+def read_audio_bytes(file_path):
+    """读取音频内容，同时支持单文件和 pack 存储；文件不存在时返回 None"""
+    if not file_path:
+        return None
+    digest = digest_from_path(file_path)
+    if digest:
+        store = get_audio_pack()
+        entry = store.lookup(digest)
+        return bytes(store.read(entry)) if entry else None
+    full_path = os.path.normpath(os.path.join(settings.MEDIA_ROOT, file_path))
+    try:
+        with open(full_path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        logging.warning(f"离线包读取音频失败: {file_path}, 错误信息: {e}")
+        return None
+
+
+def build_task_bundle(task):
+    """
+    生成任务离线包，返回 (gzip 压缩后的字节, ETag)
+
+    只需要一次查询取出任务单词（含 UserWord 和 Word），签名不变时直接命中缓存。
+    """
+    task_words = list(
+        TaskWord.objects
+        .filter(task=task)
+        .select_related('word__word')
+        .order_by('id')
+    )
+    signature = hashlib.sha1(json.dumps([
+        (tw.id, tw.status, tw.word.word_id) + tuple(getattr(tw.word.word, field) for field in SIGNATURE_WORD_FIELDS)
+        for tw in task_words
+    ], ensure_ascii=False).encode()).hexdigest()
+    cache_key = f"task_bundle:{task.id}:{signature}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    cards = []
+    audio = {}
+    for task_word in task_words:
+        word = task_word.word.word
+        audio_key = word.phonetic_us or word.phonetic_uk or None
+        if audio_key and audio_key not in audio:
+            data = read_audio_bytes(audio_key)
+            if data is None:
+                audio_key = None
+            else:
+                audio[audio_key] = base64.b64encode(data).decode('ascii')
+        cards.append({
+            'id': task_word.word.id,
+            'word': word.word,
+            'phonetic': word.phonetic,
+            'definition': word.definition,
+            'example': word.example,
+            'status': task_word.status,
+            'audio': audio_key,
+        })
+
+    payload = json.dumps({
+        'task_id': task.id,
+        'date': task.date.isoformat(),
+        'cards': cards,
+        'audio': audio,
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    etag = f'"{hashlib.sha256(payload).hexdigest()}"'
+    # mtime=0 保证相同内容压缩结果一致
+    result = (gzip.compress(payload, mtime=0), etag)
+    cache.set(cache_key, result, BUNDLE_CACHE_TIMEOUT)
+    return result
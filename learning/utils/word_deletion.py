@@ -0,0 +1,75 @@
+"""
+批量删除单词
+
+按主键分块，每块在独立的短事务中用集合删除（DELETE ... WHERE id IN (...)）清理
+TaskWord → UserWord → AudioFile → Word，避免一次性长时间锁库；
+音频文件只登记到清理队列，事务提交后由后台线程删除，不阻塞请求线程。
+"""
+import logging
+
+from django.db import transaction
+
+from learning.models import AudioFile, TaskWord, UserWord, Word
+from learning.utils.audio_cleanup import enqueue_audio_cleanup, schedule_audio_cleanup
+from learning.utils.review_forecast import remove_due
+from learning.utils.word_forms import bump_forms_version
+
+# 每个事务删除的单词数量
+DELETE_CHUNK_SIZE = 500
+
+
+def bulk_delete_words(word_ids=None, queryset=None, chunk_size=DELETE_CHUNK_SIZE):
+    """
+    批量删除单词及其关联数据，返回删除的单词数量
+
+    参数:
+    - word_ids: 要删除的单词 ID 列表
+    - queryset: 也可以直接传入 Word 查询集作为过滤条件，与 word_ids 二选一
+    - chunk_size: 每个事务处理的单词数量
+    """
+    if queryset is None:
+        if word_ids is None:
+            raise ValueError("word_ids 和 queryset 至少需要提供一个")
+        queryset = Word.objects.filter(id__in=list(word_ids))
+
+    deleted = 0
+    last_id = 0
+    while True:
+        # 按 id 递增分块读取，删除过程中不依赖 OFFSET，结果稳定
+        chunk = list(
+            queryset.filter(id__gt=last_id).order_by('id').values_list('id', 'word')[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        deleted += _delete_chunk(chunk)
+
+    if deleted:
+        logging.info(f"批量删除单词完成，共删除 {deleted} 个")
+    return deleted
+
+
+@transaction.atomic
+def _delete_chunk(chunk):
+    ids = [word_id for word_id, _ in chunk]
+    texts = {text for _, text in chunk}
+
+    # 同名单词仍存在时保留共享的音频记录
+    remaining_texts = set(
+        Word.objects.filter(word__in=texts).exclude(id__in=ids).values_list('word', flat=True)
+    )
+    texts -= remaining_texts
+
+    audio_files = AudioFile.objects.filter(word_text__in=texts)
+    enqueue_audio_cleanup(audio_files.values_list('file_path', flat=True))
+
+    TaskWord.objects.filter(word__word_id__in=ids).delete()
+    user_words = UserWord.objects.filter(word_id__in=ids)
+    remove_due(user_words)
+    user_words.delete()
+    audio_files.delete()
+    count = Word.objects.filter(id__in=ids).delete()[1].get(Word._meta.label, 0)
+
+    schedule_audio_cleanup()
+    transaction.on_commit(bump_forms_version)
+    return count
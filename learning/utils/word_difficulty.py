@@ -0,0 +1,127 @@
+"""
+单词难度统计
+
+WordDifficulty 按单词累计所有用户的作答：作答次数、首次作答的次数和错误数、进入掌握阶段的次数
+以及当时的复习次数合计。维护方式：
+- 增量：process_feedback 在更新 UserWord 的同一个事务中调用 record_answer，一条 upsert 累加计数
+- 回填：rebuild_word_stats 按 history_intervals 重放全部学习记录重算计数
+
+update_word_difficulty 命令定期调用 estimate_all：
+1. 以全体单词的平均水平为先验，平滑每个单词的首次错误率和平均掌握所需复习次数，
+   二者相对平均值的比值加权得到难度（1 为平均）
+2. 初始强度 = DEFAULT_INITIAL_STRENGTH / 难度，限制在 [MIN_STRENGTH, MAX_STRENGTH]
+3. 用一条 UPDATE ... SET initial_strength = (子查询) 写回所有尚未学习（review_count=0）的 UserWord
+
+请求时不需要按用户计算，新学单词直接使用已写入的初始强度。
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from learning.models import DEFAULT_INITIAL_STRENGTH, UserWord, WordDifficulty
+from learning.utils.counters import increment
+from learning.utils.learning_stats import replay_history
+
+# 先验的等效样本数，作答少的单词向平均水平收缩
+PRIOR_WEIGHT = 10
+# 难度中首次错误率所占的权重，其余为掌握所需复习次数
+ERROR_WEIGHT = 0.6
+# 掌握至少需要的复习次数（review_count >= 4 且没有未抵消的错误）
+MIN_REVIEWS_TO_MASTERY = 4
+MIN_STRENGTH = 1.5
+MAX_STRENGTH = 4.5
+
+COUNTER_FIELDS = ('attempts', 'first_attempts', 'first_errors', 'mastered', 'reviews_to_mastery')
+
+
+def record_answer(word_id, is_correct, first_review, mastery_reviews=None):
+    """累加一次作答；mastery_reviews 为本次进入掌握阶段时的复习次数。在 process_feedback 的事务中执行"""
+    increment(WordDifficulty, {'word_id': word_id}, {
+        'attempts': 1,
+        'first_attempts': int(first_review),
+        'first_errors': int(first_review and not is_correct),
+        'mastered': int(mastery_reviews is not None),
+        'reviews_to_mastery': mastery_reviews or 0,
+    })
+
+
+@transaction.atomic
+def rebuild_word_stats():
+    """从 history_intervals 重算全部单词的作答计数（保留已有的难度估计），返回写入的行数"""
+    counters = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for word_id, history in UserWord.objects.values_list('word_id', 'history_intervals').iterator():
+        for review_count, (_, correct, first_review, mastered) in enumerate(replay_history(history or []), 1):
+            stats = counters[word_id]
+            stats['attempts'] += 1
+            if first_review:
+                stats['first_attempts'] += 1
+                stats['first_errors'] += int(not correct)
+            if mastered:
+                stats['mastered'] += 1
+                stats['reviews_to_mastery'] += review_count
+
+    estimates = {
+        word_id: (difficulty, strength, estimated_at)
+        for word_id, difficulty, strength, estimated_at
+        in WordDifficulty.objects.values_list('word_id', 'difficulty', 'initial_strength', 'estimated_at')
+    }
+    rows = []
+    for word_id, stats in counters.items():
+        difficulty, strength, estimated_at = estimates.get(word_id, (None, DEFAULT_INITIAL_STRENGTH, None))
+        rows.append(WordDifficulty(word_id=word_id, difficulty=difficulty, initial_strength=strength,
+                                   estimated_at=estimated_at, **stats))
+    WordDifficulty.objects.all().delete()
+    WordDifficulty.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def global_rates():
+    """全体单词的 (首次错误率, 平均掌握所需复习次数)，作为平滑的先验"""
+    totals = WordDifficulty.objects.aggregate(
+        first_attempts=Sum('first_attempts'), first_errors=Sum('first_errors'),
+        mastered=Sum('mastered'), reviews_to_mastery=Sum('reviews_to_mastery'),
+    )
+    first_attempts = totals['first_attempts'] or 0
+    mastered = totals['mastered'] or 0
+    # 加一平滑，避免错误率为 0 时无法计算比值
+    error_rate = ((totals['first_errors'] or 0) + 1) / (first_attempts + 2)
+    mastery = totals['reviews_to_mastery'] / mastered if mastered else MIN_REVIEWS_TO_MASTERY
+    return error_rate, max(mastery, MIN_REVIEWS_TO_MASTERY)
+
+
+def estimate_difficulty(stats, error_rate, mastery):
+    """返回 (难度, 初始强度)；stats 为 WordDifficulty 或带同名属性的对象"""
+    word_error = (stats.first_errors + PRIOR_WEIGHT * error_rate) / (stats.first_attempts + PRIOR_WEIGHT)
+    word_mastery = (stats.reviews_to_mastery + PRIOR_WEIGHT * mastery) / (stats.mastered + PRIOR_WEIGHT)
+    difficulty = ERROR_WEIGHT * word_error / error_rate + (1 - ERROR_WEIGHT) * word_mastery / mastery
+    strength = max(MIN_STRENGTH, min(DEFAULT_INITIAL_STRENGTH / difficulty, MAX_STRENGTH))
+    return round(difficulty, 3), round(strength, 2)
+
+
+def reseed_initial_strength():
+    """
+    把 WordDifficulty 的初始强度写回尚未学习的 UserWord，返回更新的行数
+
+    只改 initial_strength，不在 process_feedback 的写回字段中，因此不需要递增 version。
+    """
+    target = WordDifficulty.objects.filter(word_id=OuterRef('word_id')).values('initial_strength')[:1]
+    return (
+        UserWord.objects.filter(review_count=0, word__difficulty_stats__isnull=False)
+        .exclude(initial_strength=F('word__difficulty_stats__initial_strength'))
+        .update(initial_strength=Subquery(target))
+    )
+
+
+@transaction.atomic
+def estimate_all():
+    """重新估计全部单词的难度并写回未学习的 UserWord，返回 (估计的单词数, 更新的 UserWord 数)"""
+    error_rate, mastery = global_rates()
+    now = timezone.now()
+    rows = list(WordDifficulty.objects.only('word_id', *COUNTER_FIELDS))
+    for row in rows:
+        row.difficulty, row.initial_strength = estimate_difficulty(row, error_rate, mastery)
+        row.estimated_at = now
+    WordDifficulty.objects.bulk_update(rows, ['difficulty', 'initial_strength', 'estimated_at'], batch_size=1000)
+    return len(rows), reseed_initial_strength()
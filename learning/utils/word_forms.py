@@ -0,0 +1,108 @@
+"""
+词形 → 单词ID 解析
+
+WordForm 表保存离线生成的 词形 → 单词 映射，进程内再加载成一个 dict：
+- resolve(tokens) 只做小写化和 dict 查找，不访问数据库
+- 表发生变化时更新缓存中的版本号，各进程在下次解析时发现版本变化并重新加载
+- 原形优先于屈折形式；同级时取 ID 最小的单词，保证结果稳定
+"""
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from learning.models import Word, WordForm
+from learning.utils.inflection import generate_forms
+
+FORMS_VERSION_CACHE_KEY = 'word_forms_version'
+FORM_BATCH_SIZE = 1000
+
+_index_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def vocabulary_version():
+    """词库版本号：单词新增、删除或词形重建后变化，进程内的各种词库索引据此失效"""
+    # 版本号使用随机值：缓存被清空或淘汰后生成的新版本一定与进程内的旧版本不同
+    return cache.get_or_set(FORMS_VERSION_CACHE_KEY, _new_version, timeout=None)
+
+
+def bump_forms_version():
+    """词形表变化后调用，让所有进程重新加载映射"""
+    cache.set(FORMS_VERSION_CACHE_KEY, _new_version(), timeout=None)
+
+
+def load_form_index():
+    """从数据库加载完整映射：先加载屈折形式，再用单词原形覆盖"""
+    index = {}
+    # 倒序遍历，ID 较小的单词最后写入并生效
+    rows = (
+        WordForm.objects
+        .filter(is_lemma=False)
+        .order_by('-word_id')
+        .values_list('form', 'word_id')
+        .iterator(chunk_size=10000)
+    )
+    for form, word_id in rows:
+        index[form] = word_id
+
+    # 原形直接取自 Word 表，还没有生成词形的新单词也能解析
+    for word_id, text in Word.objects.order_by('-id').values_list('id', 'word').iterator(chunk_size=10000):
+        index[text.strip().lower()] = word_id
+    return index
+
+
+def get_form_index():
+    """获取进程内映射，版本号变化时重新加载"""
+    global _index, _index_version
+    version = vocabulary_version()
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                _index = load_form_index()
+                _index_version = version
+                logging.info(f"已加载词形映射: {len(_index)} 个词形")
+    return _index
+
+
+def resolve(tokens):
+    """批量把词元解析为单词ID，无法解析的返回 None，结果与输入一一对应"""
+    index = get_form_index()
+    get = index.get
+    return [get(token.lower()) for token in tokens]
+
+
+def resolve_one(token):
+    return get_form_index().get(token.lower())
+
+
+def build_form_rows(words):
+    """为一批 (单词ID, 单词) 生成 WordForm 对象"""
+    rows = []
+    for word_id, text in words:
+        lemma = text.strip().lower()
+        for form in generate_forms(text):
+            if len(form) <= 100:
+                rows.append(WordForm(form=form, word_id=word_id, is_lemma=(form == lemma)))
+    return rows
+
+
+def sync_word_forms(word_ids):
+    """重新生成指定单词的词形（新增或修改单词后调用）"""
+    word_ids = list(word_ids)
+    if not word_ids:
+        return 0
+    words = list(Word.objects.filter(id__in=word_ids).values_list('id', 'word'))
+    rows = build_form_rows(words)
+    with transaction.atomic():
+        WordForm.objects.filter(word_id__in=word_ids).delete()
+        WordForm.objects.bulk_create(rows, batch_size=FORM_BATCH_SIZE, ignore_conflicts=True)
+    transaction.on_commit(bump_forms_version)
+    return len(rows)
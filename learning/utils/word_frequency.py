@@ -0,0 +1,120 @@
+"""
+语料词频统计
+
+流式读取 Article.content 和外部语料文件，词元经词形索引解析为单词ID后写入 Count-Min Sketch：
+- 计数结构大小固定（width × depth），与语料规模无关
+- 估计值只会偏大，偏差集中在低频长尾，不影响高频单词的排名
+- 最后按估计频次为每个单词写入 Word.frequency_rank（1 为最常用）
+"""
+import logging
+from array import array
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from learning.models import UNRANKED_FREQUENCY, Article, Word
+from learning.utils.article_index import TOKEN_RE
+from learning.utils.word_forms import resolve
+
+# 单次解析的词元数量
+TOKEN_BATCH_SIZE = 10000
+# 写回排名时每批更新的单词数量
+RANK_BATCH_SIZE = 1000
+
+# 梅森素数，用于 (a * x + b) mod p 哈希
+_PRIME = (1 << 61) - 1
+# 固定的哈希参数，保证同一语料多次统计结果一致
+_HASH_PARAMS = [
+    (0x5bd1e995, 0x1b873593),
+    (0x27d4eb2f, 0x165667b1),
+    (0x85ebca6b, 0xc2b2ae35),
+    (0x9e3779b1, 0x7f4a7c15),
+    (0x94d049bb, 0x133111eb),
+    (0xbf58476d, 0x1ce4e5b9),
+]
+
+
+class CountMinSketch:
+    """整数键的 Count-Min Sketch，内存占用为 width × depth 个计数器"""
+
+    def __init__(self, width=1 << 18, depth=4):
+        if depth > len(_HASH_PARAMS):
+            raise ValueError(f"depth 不能超过 {len(_HASH_PARAMS)}")
+        self.width = width
+        self.depth = depth
+        self.params = _HASH_PARAMS[:depth]
+        self.tables = [array('L', bytes(array('L').itemsize * width)) for _ in range(depth)]
+        self.total = 0
+
+    def _buckets(self, key):
+        width = self.width
+        return [((a * key + b) % _PRIME) % width for a, b in self.params]
+
+    def add(self, key, count=1):
+        for table, bucket in zip(self.tables, self._buckets(key)):
+            table[bucket] += count
+        self.total += count
+
+    def estimate(self, key):
+        return min(table[bucket] for table, bucket in zip(self.tables, self._buckets(key)))
+
+
+def iter_article_texts(chunk_size=100):
+    for content in Article.objects.order_by('id').values_list('content', flat=True).iterator(chunk_size=chunk_size):
+        yield content
+
+
+def iter_corpus_files(paths, encoding='utf-8'):
+    """逐行读取语料文件，不把整个文件读入内存"""
+    for path in paths:
+        with open(path, encoding=encoding, errors='ignore') as f:
+            for line in f:
+                yield line
+
+
+def count_corpus(texts, sketch=None):
+    """把文本流中的词元解析为单词ID并计数，返回 (sketch, 词元总数)"""
+    sketch = sketch or CountMinSketch()
+    tokens = 0
+    batch = []
+
+    def flush():
+        for word_id in resolve(batch):
+            if word_id is not None:
+                sketch.add(word_id)
+        batch.clear()
+
+    for text in texts:
+        for match in TOKEN_RE.finditer(text):
+            batch.append(match.group())
+            tokens += 1
+            if len(batch) >= TOKEN_BATCH_SIZE:
+                flush()
+    if batch:
+        flush()
+    return sketch, tokens
+
+
+def assign_frequency_ranks(sketch, min_count=1):
+    """
+    按估计频次为单词写入排名，返回获得排名的单词数
+
+    频次低于 min_count 的单词恢复为 UNRANKED_FREQUENCY；同频次按 ID 排序保证结果稳定。
+    """
+    scored = []
+    for word_id in Word.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=10000):
+        count = sketch.estimate(word_id)
+        if count >= min_count:
+            scored.append((-count, word_id))
+    scored.sort()
+
+    with transaction.atomic():
+        Word.objects.exclude(frequency_rank=UNRANKED_FREQUENCY).update(frequency_rank=UNRANKED_FREQUENCY)
+        for start in range(0, len(scored), RANK_BATCH_SIZE):
+            batch = scored[start:start + RANK_BATCH_SIZE]
+            whens = [When(id=word_id, then=Value(start + offset + 1)) for offset, (_, word_id) in enumerate(batch)]
+            Word.objects.filter(id__in=[word_id for _, word_id in batch]).update(
+                frequency_rank=Case(*whens, output_field=IntegerField())
+            )
+    logging.info(f"已更新 {len(scored)} 个单词的词频排名")
+    return len(scored)
@@ -1,19 +1,28 @@
+import gzip
 import json
 import logging
 import os
 import time
+import uuid
 from itertools import chain
 
 from django.conf import settings
 from django.contrib.auth import login
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.models import User
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.core.exceptions import SuspiciousFileOperation
 from django.db import transaction
-from django.http import JsonResponse
+from django.db.models import Count, Q
+from django.http import JsonResponse, Http404, HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified, \
+    StreamingHttpResponse, FileResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
+from django.utils._os import safe_join
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from datetime import datetime, timedelta
@@ -25,12 +34,31 @@ from .models import Word, AudioFile, UserWord
 from django.shortcuts import render
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
-from .models import DailyTask, TaskWord, UserWord
+from .models import DailyTask, TaskWord, UserWord, Article, ArticleRecommendation, DailyStats, FeedbackConflict
+from .utils.article_index import annotate_article
+from .utils.audio_pack import get_audio_pack
+from .utils.bktree import spelling_distractors
+from .utils.definition_neighbors import meaning_distractors
+from .utils.fulltext import search_articles, search_examples
+from .utils.profiler import list_profiles, profile_path
+from .utils.request_metrics import registry as metrics_registry
+from .utils.review_forecast import DEFAULT_FORECAST_DAYS, MAX_FORECAST_DAYS, forecast
+from .utils.idempotency import DedupeStore, idempotent, user_key
+from .utils.learning_stats import HEATMAP_DAYS, current_streak, heatmap_weeks, retention_series, svg_points
+from .utils.http_range import RangeNotSatisfiable, apply_cache_headers, etag_matches, if_range_allows, \
+    iter_file_range, not_modified_since, parse_range_header
+from .utils.study_queue import aload_queue, asave_queue, build_queue, discard_queue, load_queue, record_answer, \
+    save_queue
+from .utils.task_bundle import build_task_bundle
+from .utils.word_forms import resolve_one, sync_word_forms
+from .utils.word_deletion import bulk_delete_words
 
 # 设置日志配置
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 # 复习间隔：1天、2天、4天、7天、15天
 REVIEW_INTERVALS = [1, 2, 4, 7, 15]
+# 音频流式输出的分块大小
+AUDIO_STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def home(request):
@@ -97,25 +125,73 @@ def get_cached_word_ids():
     return word_ids
 
 
-@login_required
-def word_card(request):
-    """
-    显示单词学习卡片的核心视图
-    包含进度计算、任务状态检查和动态内容加载
-    """
-    user = request.user
-    today = timezone.localdate()
-
-    # 获取或创建当日任务
+def get_today_task(request):
+    """获取或创建当前用户的当日任务，新任务或空任务会先生成学习内容"""
     task, created = DailyTask.objects.get_or_create(
-        user=user,
-        date=today,
+        user=request.user,
+        date=timezone.localdate(),
         defaults={'is_completed': False}
     )
 
     # 如果新创建任务或任务为空，生成学习内容
     if created or not task.taskword_set.exists():
         generate_daily_task(request, task)  # 直接传递任务对象
+    return task
+
+
+def pending_task_words(task):
+    """当日任务中待学习（new / retry）的单词"""
+    return TaskWord.objects.filter(task=task, status__in=['new', 'retry']).select_related('word__word')
+
+
+def next_task_word(task):
+    """取当日任务学习队列的队首单词（见 learning.utils.study_queue），没有待学习单词时返回 None"""
+    queue = load_queue(task.id)
+    rebuilt = False
+    while True:
+        if not queue and not rebuilt:
+            # 缓存丢失，或队列已空但仍可能有待学习单词时，按 TaskWord 状态重建一次
+            queue = build_queue(pending_task_words(task).values_list('word_id', flat=True))
+            rebuilt = True
+            save_queue(task.id, queue)
+        if not queue:
+            return None
+        task_word = pending_task_words(task).filter(word_id=queue[0]).first()
+        if task_word is not None:
+            return task_word
+        # 队首单词已通过其他途径完成
+        queue.popleft()
+        save_queue(task.id, queue)
+
+
+async def anext_task_word(task):
+    """next_task_word 的异步版本"""
+    queue = await aload_queue(task.id)
+    rebuilt = False
+    while True:
+        if not queue and not rebuilt:
+            queue = build_queue([
+                word_id async for word_id in pending_task_words(task).values_list('word_id', flat=True)
+            ])
+            rebuilt = True
+            await asave_queue(task.id, queue)
+        if not queue:
+            return None
+        task_word = await pending_task_words(task).filter(word_id=queue[0]).afirst()
+        if task_word is not None:
+            return task_word
+        queue.popleft()
+        await asave_queue(task.id, queue)
+
+
+@login_required
+def word_card(request):
+    """
+    显示单词学习卡片的核心视图
+    包含进度计算、任务状态检查和动态内容加载
+    """
+    # 获取或创建当日任务
+    task = get_today_task(request)
     # 检查任务完成状态
     if task.is_completed:
         return render(request, 'learning/review_complete.html')
@@ -126,19 +202,7 @@ def word_card(request):
     progress = int((completed_words / total_words) * 100) if total_words > 0 else 0
 
     # 获取下一个需要学习的单词
-    task_word_list = (
-        TaskWord.objects
-        .filter(task=task, status__in=['new', 'retry'])
-        .select_related('word__word')
-    )
-    # 如果没有符合条件的单词，返回None
-    if not task_word_list.exists():
-        return None
-
-    # 按优先级（priority）降序排序，并加上一点随机性
-    retry_words = list(task_word_list)
-    random.shuffle(retry_words)  # 随机打乱顺序
-    task_word = retry_words[0]
+    task_word = next_task_word(task)
     # 如果没有待学习单词，标记任务完成
     if not task_word:
         task.is_completed = True
@@ -158,33 +222,96 @@ def word_card(request):
         },
         'progress': progress,
         'remaining': total_words - completed_words,
+        'feedback_url': '/handle_feedback/',
+        'feedback_key': uuid.uuid4().hex,
+        'audio_prefix': '/audio/',
     }
 
     return render(request, 'learning/word_card.html', context)
 
 
+async def aget_today_task(request):
+    """get_today_task 的异步版本：已有任务时只走异步 ORM，首次生成任务的批量写入放到线程中执行"""
+    task = await DailyTask.objects.filter(user=request.user, date=timezone.localdate()).afirst()
+    if task is None or not await task.taskword_set.aexists():
+        task = await sync_to_async(get_today_task)(request)
+    return task
+
+
+@login_required
+async def word_card_async(request):
+    """word_card 的异步版本，用于 ASGI 部署，地址为 /async/word_card/"""
+    # 模板渲染不能再惰性查询用户
+    request.user = await request.auser()
+    task = await aget_today_task(request)
+    if task.is_completed:
+        return render(request, 'learning/review_complete.html')
+
+    # 一次聚合查询得到总数和已掌握数
+    counts = await task.taskword_set.aaggregate(
+        total=Count('id'), known=Count('id', filter=Q(status='known'))
+    )
+    total_words, completed_words = counts['total'], counts['known']
+    progress = int((completed_words / total_words) * 100) if total_words > 0 else 0
+
+    task_word = await anext_task_word(task)
+    if not task_word:
+        task.is_completed = True
+        await task.asave(update_fields=['is_completed'])
+        return render(request, 'learning/review_complete.html')
+
+    context = {
+        'task_id': task.id,
+        'word': {
+            'id': task_word.word.id,
+            'word': task_word.word.word.word,
+            'phonetic': task_word.word.word.phonetic,
+            'definition': task_word.word.word.definition,
+            'example': task_word.word.word.example,
+            'audio_url': task_word.word.word.phonetic_us if task_word.word.word.phonetic_us else None,
+        },
+        'progress': progress,
+        'remaining': total_words - completed_words,
+        'feedback_url': '/async/handle_feedback/',
+        'feedback_key': uuid.uuid4().hex,
+        'audio_prefix': '/async/audio/',
+    }
+    return render(request, 'learning/word_card.html', context)
+
+
+def unlearned_words(user):
+    """用户还没有学习记录的单词，按语料词频从高到低排列"""
+    return (
+        Word.objects
+        .exclude(id__in=UserWord.objects.filter(user=user).values('word_id'))
+        .order_by('frequency_rank', 'id')
+    )
+
+
+def new_user_words(user, exclude_ids=()):
+    """已加入学习记录但从未复习过的单词，按语料词频从高到低引入"""
+    return (
+        UserWord.objects
+        .filter(user=user, review_count=0)
+        .exclude(pk__in=exclude_ids)
+        .order_by('word__frequency_rank', 'word_id')
+    )
+
+
 def select_words_for_today(user, total_new_words=20):
     """
     为用户选择今天需要学习的单词，包括新单词和复习单词。
     - user: 当前用户对象
     - total_new_words: 每天需要学习的单词数量（默认为20个）
     """
-    # 获取所有单词
-    all_words = Word.objects.all()
-
     # 获取用户的学习历史
     user_words = UserWord.objects.filter(user=user)
 
-    # 获取所有新单词，即那些在 UserWord 表中不存在的单词
-    learned_words = [uw.word for uw in user_words]
-    new_words = [word for word in all_words if word not in learned_words]
-
-    # 从新单词中随机选择 total_new_words 个单词
-    new_words_today = random.sample(new_words, min(total_new_words, len(new_words)))
+    # 新单词：UserWord 表中不存在的单词，按语料词频从高到低选取（走 frequency_rank 索引）
+    new_words_today = list(unlearned_words(user)[:total_new_words])
 
     # 获取需要复习的单词，按优先级从高到低排序
-    review_words_today = user_words.exclude(word__in=new_words_today)  # 避免重复选择
-    review_words_today = review_words_today.order_by('-priority')[:total_new_words]
+    review_words_today = user_words.order_by('-priority').select_related('word')[:total_new_words]
 
     # 合并新单词和复习单词
     words_for_today = new_words_today + [uw.word for uw in review_words_today]
@@ -209,19 +336,20 @@ def generate_daily_task(request, task):
     user = request.user
 
     # 获取待复习单词（优先级排序）
-    due_words = UserWord.get_due_words(user, limit=30)
+    # 查询集含随机排序部分，只求值一次，避免多次求值结果不一致导致重复插入
+    due_words = list(UserWord.get_due_words(user, limit=30))
+    due_ids = {word.pk for word in due_words}
 
-    # 补充新单词：10个新单词
-    new_words = UserWord.objects.filter(
-        user=user,
-        review_count=0
-    ).exclude(pk__in=due_words.values_list('pk', flat=True))[:10]
+    # 补充新单词：10个新单词，按语料词频从高到低引入
+    new_words = new_user_words(user, due_ids)[:10]
 
     # 创建任务关联
     task_words = chain(due_words, new_words)
     for word in task_words:
-        status = 'retry' if word in due_words else 'new'
+        status = 'retry' if word.pk in due_ids else 'new'
         TaskWord.objects.create(task=task, word=word, status=status)
+    # 任务内容变化，学习队列在下次取卡片时重建
+    discard_queue(task.id)
     return JsonResponse({
         'task_id': task.id,
         'is_completed': task.is_completed,
@@ -229,8 +357,32 @@ def generate_daily_task(request, task):
     })
 
 
+def apply_feedback(task, word_id, is_correct):
+    """更新任务单词状态并执行记忆算法，返回更新后的 UserWord"""
+    task_word = TaskWord.objects.select_related('word').get(task=task, word_id=word_id)
+
+    # 更新单词状态
+    task_word.status = 'known' if is_correct else 'retry'
+    task_word.save()
+
+    # 处理记忆算法
+    user_word = task_word.word
+    user_word.process_feedback(is_correct)
+
+    # 答错的单词在若干张卡片之后重现
+    record_answer(task.id, task_word.word_id, is_correct)
+    return user_word
+
+
+# 反馈提交的去重存储，同步和异步视图共用（同一张卡片的答案只处理一次）
+feedback_dedupe = DedupeStore('feedback')
+# 离线学习结果按条去重；离线结果可能隔较长时间才重发，保留到当日任务结束
+sync_result_dedupe = DedupeStore('sync_result', ttl=24 * 3600)
+
+
 @login_required
 @require_http_methods(["POST"])
+@idempotent(feedback_dedupe)
 def handle_feedback(request):
     """处理用户反馈"""
     try:
@@ -243,17 +395,11 @@ def handle_feedback(request):
         # 将 action 转换为 is_correct
         is_correct = action == 'know'
 
-        # 获取任务和任务单词
+        # 获取任务
         task = DailyTask.objects.get(pk=task_id)
-        task_word = TaskWord.objects.get(task=task, word_id=word_id)
-
-        # 更新单词状态
-        task_word.status = 'known' if is_correct else 'retry'
-        task_word.save()
 
-        # 处理记忆算法
-        user_word = task_word.word
-        user_word.process_feedback(is_correct)
+        # 更新单词状态并处理记忆算法
+        user_word = apply_feedback(task, word_id, is_correct)
 
         # 检查任务完成状态
         task.check_completion()
@@ -274,6 +420,11 @@ def handle_feedback(request):
             'success': False,
             'error': 'TaskWord not found'
         }, status=404)
+    except FeedbackConflict as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=409)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -281,6 +432,232 @@ def handle_feedback(request):
         }, status=400)
 
 
+def apply_feedback_and_check(task, word_id, is_correct):
+    """在同一个线程中完成反馈处理（乐观并发写回，锁冲突时重试）和任务完成检查"""
+    user_word = apply_feedback(task, word_id, is_correct)
+    task.check_completion()
+    return user_word
+
+
+@login_required
+@require_http_methods(["POST"])
+@idempotent(feedback_dedupe)
+async def handle_feedback_async(request):
+    """
+    handle_feedback 的异步版本
+
+    读取请求和任务走异步 ORM；process_feedback 的乐观并发写回、计数 upsert 和锁冲突重试
+    都在同一个同步事务里完成，无法拆成异步调用，整体放进 sync_to_async 在线程中执行。
+    """
+    try:
+        data = json.loads(request.body)
+        is_correct = data.get('action') == 'know'
+        task = await DailyTask.objects.aget(pk=data.get('task_id'))
+        user_word = await sync_to_async(apply_feedback_and_check)(task, data.get('word_id'), is_correct)
+        return JsonResponse({
+            'success': True,
+            'task_completed': task.is_completed,
+            'new_priority': user_word.priority
+        })
+    except DailyTask.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+    except TaskWord.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'TaskWord not found'}, status=404)
+    except FeedbackConflict as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+def build_quiz_question(word, mode):
+    """
+    生成选择题，返回 (题干, 选项列表)
+
+    - spelling: 根据释义选出拼写正确的单词，干扰项是词库中拼写最接近的单词
+    - meaning: 根据单词选出正确的释义，干扰项是释义最相近的其他单词
+    """
+    if mode == 'spelling':
+        options = [word.word] + spelling_distractors(word.word)
+        random.shuffle(options)
+        return word.definition, [{'value': o, 'label': o} for o in options]
+    if mode == 'meaning':
+        options = [(word.id, word.definition)] + meaning_distractors(word)
+        random.shuffle(options)
+        return word.word, [{'value': str(word_id), 'label': definition} for word_id, definition in options]
+    raise ValueError(f"不支持的测验模式: {mode}")
+
+
+def check_quiz_answer(word, mode, choice):
+    if mode == 'spelling':
+        return (choice or '').strip().lower() == word.word.lower()
+    if mode == 'meaning':
+        return str(choice) == str(word.id)
+    raise ValueError(f"不支持的测验模式: {mode}")
+
+
+@login_required
+def quiz(request, mode='spelling'):
+    """选择题测验，题目取自当日任务的待学习单词"""
+    task = get_today_task(request)
+    if task.is_completed:
+        return render(request, 'learning/review_complete.html')
+
+    task_word = next_task_word(task)
+    if not task_word:
+        task.is_completed = True
+        task.save()
+        return render(request, 'learning/review_complete.html')
+
+    word = task_word.word.word
+    try:
+        prompt, options = build_quiz_question(word, mode)
+    except ValueError:
+        raise Http404("测验模式不存在")
+
+    total_words = task.taskword_set.count()
+    completed_words = task.taskword_set.filter(status='known').count()
+    context = {
+        'task_id': task.id,
+        'word_id': task_word.word.id,
+        'mode': mode,
+        'prompt': prompt,
+        'example': word.example,
+        'options': options,
+        'progress': int((completed_words / total_words) * 100) if total_words > 0 else 0,
+        'remaining': total_words - completed_words,
+    }
+    return render(request, 'learning/quiz.html', context)
+
+
+@login_required
+@require_http_methods(["POST"])
+def quiz_answer(request):
+    """判定测验答案（在服务端完成），并按答对 / 答错更新记忆数据"""
+    try:
+        data = json.loads(request.body)
+        task = DailyTask.objects.get(pk=data.get('task_id'), user=request.user)
+        task_word = TaskWord.objects.select_related('word__word').get(task=task, word_id=data.get('word_id'))
+        word = task_word.word.word
+        mode = data.get('mode', 'spelling')
+
+        is_correct = check_quiz_answer(word, mode, data.get('choice'))
+        apply_feedback(task, task_word.word_id, is_correct)
+        task.check_completion()
+
+        return JsonResponse({
+            'success': True,
+            'correct': is_correct,
+            'answer': word.definition if mode == 'meaning' else word.word,
+            'task_completed': task.is_completed,
+        })
+    except (DailyTask.DoesNotExist, TaskWord.DoesNotExist):
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+    except FeedbackConflict as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@login_required
+@require_http_methods(["GET"])
+def task_bundle(request):
+    """
+    当日任务离线包：一次返回全部卡片数据和音频（gzip 压缩的 JSON）
+
+    响应带内容哈希 ETag，客户端携带 If-None-Match 命中时返回 304。
+    """
+    task = get_today_task(request)
+    body, etag = build_task_bundle(task)
+
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    elif 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(body, content_type='application/json; charset=utf-8')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(body), content_type='application/json; charset=utf-8')
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def is_valid_sync_result(result):
+    """离线结果格式：word_id 为整数，action 为 know / forget，id 可省略或为字符串"""
+    word_id = result.get('word_id')
+    return (
+        isinstance(word_id, int) and not isinstance(word_id, bool)
+        and result.get('action') in ('know', 'forget')
+        and isinstance(result.get('id'), (str, type(None)))
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+def sync_task_results(request):
+    """
+    同步离线学习结果
+
+    请求体: {"task_id": 1, "results": [{"id": "<结果ID>", "word_id": 2, "action": "know"}, ...]}
+    结果按提交顺序逐条执行记忆算法，最后统一检查一次任务完成状态。
+
+    离线页在出错或离开页面时会重发整批结果，其中可能包含已经执行过的部分；
+    每条结果带客户端生成的 id，按 id 去重，已处理过的结果只计入 duplicates。
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+    results = (data.get('results') or []) if isinstance(data, dict) else None
+    if not isinstance(results, list) or not all(isinstance(result, dict) for result in results):
+        return JsonResponse({'success': False, 'error': 'results must be a list of objects'}, status=400)
+    # 先校验整批，格式错误时一条都不执行
+    if not all(is_valid_sync_result(result) for result in results):
+        return JsonResponse({'success': False, 'error': 'each result needs an integer word_id and action'}, status=400)
+    try:
+        task = DailyTask.objects.get(pk=data.get('task_id'), user=request.user)
+    except (DailyTask.DoesNotExist, ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+
+    applied = duplicates = 0
+    for result in results:
+        key = user_key(request.user, result.get('id'))
+        if key is not None and (sync_result_dedupe.lookup(key) is not None or not sync_result_dedupe.claim(key)):
+            duplicates += 1
+            continue
+        try:
+            apply_feedback(task, result.get('word_id'), result.get('action') == 'know')
+            applied += 1
+        except TaskWord.DoesNotExist:
+            logging.warning(f"同步结果时未找到任务单词: task={task.id}, word={result.get('word_id')}")
+        except FeedbackConflict as e:
+            # 未执行，释放占位以便客户端重发
+            logging.warning(f"同步结果时更新冲突: {e}")
+            if key is not None:
+                sync_result_dedupe.release(key)
+            continue
+        except BaseException:
+            if key is not None:
+                sync_result_dedupe.release(key)
+            raise
+        if key is not None:
+            sync_result_dedupe.store(key, 200, b'')
+
+    task.check_completion()
+    return JsonResponse({
+        'success': True,
+        'applied': applied,
+        'duplicates': duplicates,
+        'task_completed': task.is_completed,
+    })
+
+
+@login_required
+def offline_study(request):
+    """离线学习页：下载任务离线包后在浏览器本地完成整轮学习"""
+    return render(request, 'learning/offline_study.html')
+
+
 @login_required
 def daily_review(request):
     """每日复习主视图"""
@@ -381,6 +758,13 @@ def update_word_priority(user_word, feedback_type):
 def get_audio_url(request, word):
     # audio_files = get_object_or_404(AudioFile, word_text=word)
     audio_file = AudioFile.objects.filter(word_text=word, language='us').first()
+    if audio_file is None:
+        # 屈折形式（running / ran）回退到原形单词的发音
+        word_id = resolve_one(word)
+        if word_id is not None:
+            lemma = Word.objects.filter(id=word_id).values_list('word', flat=True).first()
+            if lemma and lemma != word:
+                audio_file = AudioFile.objects.filter(word_text=lemma, language='us').first()
     if audio_file is None:
         logging.error(f"未找到单词 {word} 的美式发音音频文件")
         return JsonResponse({'error': '未找到音频文件'}, status=404)
@@ -394,9 +778,189 @@ def get_audio_url(request, word):
     return JsonResponse({'audio_url': audio_url})
 
 
-def reading_page(request):
-    # 这里实现阅读页的功能
-    return render(request, 'learning/reading_page.html')
+# 发音路径缓存时间（秒）；未找到的结果不缓存，新下载的发音可以立即生效
+AUDIO_URL_CACHE_TIMEOUT = 300
+
+
+async def get_audio_url_async(request, word):
+    """get_audio_url 的异步版本，命中的发音路径写入缓存（异步缓存接口）"""
+    cache_key = f'audio_url:{word}'
+    audio_url = await cache.aget(cache_key)
+    if audio_url is None:
+        audio_files = AudioFile.objects.filter(language='us').order_by('pk').values_list('file_path', flat=True)
+        audio_url = await audio_files.filter(word_text=word).afirst()
+        if audio_url is None:
+            # 屈折形式回退到原形；词形索引的首次加载是同步的
+            word_id = await sync_to_async(resolve_one)(word)
+            if word_id is not None:
+                lemma = await Word.objects.filter(id=word_id).values_list('word', flat=True).afirst()
+                if lemma and lemma != word:
+                    audio_url = await audio_files.filter(word_text=lemma).afirst()
+        if audio_url is None:
+            logging.error(f"未找到单词 {word} 的美式发音音频文件")
+            return JsonResponse({'error': '未找到音频文件'}, status=404)
+        audio_url = str(audio_url)
+        await cache.aset(cache_key, audio_url, AUDIO_URL_CACHE_TIMEOUT)
+    return JsonResponse({'audio_url': audio_url})
+
+
+def serve_packed_audio(request, digest):
+    """
+    从 pack 文件中提供音频
+
+    支持 ETag / If-None-Match（内容按哈希寻址，ETag 即哈希）和单段 Range 请求；
+    内容通过 mmap 切片分块写出，不需要为每次播放打开单独的文件。
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    store = get_audio_pack()
+    entry = store.lookup(digest)
+    if entry is None:
+        raise Http404('未找到音频文件')
+
+    etag = f'"{entry.sha256}"'
+    if etag_matches(request, etag):
+        return apply_cache_headers(HttpResponseNotModified(), etag)
+
+    try:
+        byte_range = None
+        if if_range_allows(request, etag):
+            byte_range = parse_range_header(request.META.get('HTTP_RANGE'), entry.length)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{entry.length}'
+        return response
+
+    start, end = byte_range if byte_range else (0, entry.length - 1)
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type='audio/mpeg')
+    else:
+        view = store.read(entry, start, end)
+        response = StreamingHttpResponse(
+            (view[i:i + AUDIO_STREAM_CHUNK_SIZE] for i in range(0, len(view), AUDIO_STREAM_CHUNK_SIZE)),
+            content_type='audio/mpeg',
+        )
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{entry.length}'
+    response['Content-Length'] = str(end - start + 1)
+    return apply_cache_headers(response, etag)
+
+
+def serve_audio(request, path):
+    """
+    提供 media/audio 目录下的音频文件（生产环境替代 static() 的开发用媒体服务）
+
+    - 完整内容使用 FileResponse，由 WSGI 服务器的 file_wrapper 走 sendfile 零拷贝发送
+    - ETag（修改时间 + 大小）/ Last-Modified 支持 If-None-Match 与 If-Modified-Since，重复播放返回 304
+    - 支持单段 Range 请求，以及长期不可变的 Cache-Control
+    - 配置 AUDIO_SENDFILE_HEADER 后只返回 X-Accel-Redirect / X-Sendfile 头，由前端代理发送文件
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    try:
+        full_path = safe_join(os.path.join(settings.MEDIA_ROOT, 'audio'), path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('未找到音频文件')
+    if not os.path.isfile(full_path):
+        raise Http404('未找到音频文件')
+
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    if etag_matches(request, etag) or not_modified_since(request, stat.st_mtime):
+        return apply_cache_headers(HttpResponseNotModified(), etag, stat.st_mtime)
+
+    sendfile_header = getattr(settings, 'AUDIO_SENDFILE_HEADER', None)
+    if sendfile_header:
+        # 交给前端代理发送文件，代理自行处理 Range
+        response = HttpResponse(content_type='audio/mpeg')
+        if sendfile_header == 'X-Accel-Redirect':
+            response[sendfile_header] = settings.AUDIO_ACCEL_REDIRECT_PREFIX + 'audio/' + path
+        else:
+            response[sendfile_header] = full_path
+        return apply_cache_headers(response, etag, stat.st_mtime)
+
+    try:
+        byte_range = None
+        if if_range_allows(request, etag, stat.st_mtime):
+            byte_range = parse_range_header(request.META.get('HTTP_RANGE'), stat.st_size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type='audio/mpeg')
+        response['Content-Length'] = str(stat.st_size)
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_file_range(open(full_path, 'rb'), start, end - start + 1, AUDIO_STREAM_CHUNK_SIZE),
+            status=206,
+            content_type='audio/mpeg',
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type='audio/mpeg')
+    return apply_cache_headers(response, etag, stat.st_mtime)
+
+
+def reading_page(request, article_id=None):
+    """
+    阅读页：不带文章ID时显示文章列表，否则显示带词汇标注的文章
+
+    文章中的单词按当前用户的学习状态（到期 / 学习中 / 已掌握 / 未学过）高亮，
+    标注依赖文章的预建倒排索引和一次批量状态查询，查询次数与文章长度无关。
+    """
+    if article_id is None:
+        articles = Article.objects.only('id', 'title', 'difficulty').order_by('id')
+        recommendations = []
+        if request.user.is_authenticated:
+            # 推荐结果由 recommend_articles 命令离线计算，这里只按排名读取
+            recommendations = (
+                ArticleRecommendation.objects
+                .filter(user=request.user)
+                .select_related('article')
+                .only('coverage', 'unknown_density', 'rank', 'article__id', 'article__title')
+                .order_by('rank')
+            )
+        return render(request, 'learning/reading_page.html', {
+            'articles': articles,
+            'recommendations': recommendations,
+        })
+
+    article = get_object_or_404(Article, id=article_id)
+    segments, summary = annotate_article(article, request.user)
+    return render(request, 'learning/reading_page.html', {
+        'article': article,
+        'segments': segments,
+        'summary': summary,
+    })
+
+
+@require_http_methods(["GET"])
+def search(request):
+    """
+    全文检索：在单词例句和文章中查找包含关键词的上下文
+
+    参数 q 为关键词，scope 可选 examples / articles，默认两者都查。
+    """
+    query = request.GET.get('q', '').strip()
+    scope = request.GET.get('scope')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+    except ValueError:
+        limit = 20
+
+    result = {'query': query}
+    if scope in (None, 'examples'):
+        result['examples'] = search_examples(query, limit)
+    if scope in (None, 'articles'):
+        result['articles'] = search_articles(query, limit)
+    return JsonResponse(result)
 
 
 def add_words(request):
@@ -404,50 +968,176 @@ def add_words(request):
         words_text = request.POST.get('words', '')  # 获取文本区域中的数据
         if words_text:
             lines = words_text.strip().split('\n')  # 按行分割文本
+            created_ids = []
             for line in lines:
                 word = line.strip()  # 去除多余空格
                 if word:  # 如果行不为空
                     # 添加到数据库（假设没有音标和释义时）
-                    Word.objects.get_or_create(word=word)
+                    obj, created = Word.objects.get_or_create(word=word)
+                    if created:
+                        created_ids.append(obj.id)
+            # 为新单词生成词形索引；新单词还没有释义，释义近邻在补全释义后再更新
+            sync_word_forms(created_ids)
             return redirect('word_list')  # 保存成功后重定向到单词列表页
     return render(request, 'learning/add_words.html')
 
 
 def delete_word(request, word_id):
     try:
-        with transaction.atomic():
-            word = get_object_or_404(Word, id=word_id)
-
-            # 获取关联的 AudioFile 记录
-            audio_files = AudioFile.objects.filter(word_text=word.word)
-
-            # 尝试从数据库中删除单词对象及其关联的 AudioFile 记录
-            for audio_file in audio_files:
-                try:
-                    audio_file.delete()
-                except Exception as e:
-                    logging.error(f"删除 AudioFile 数据库记录失败: {audio_file.id}, 错误信息: {e}")
-                    raise  # 重新抛出异常以触发事务回滚
-
-            try:
-                word.delete()
-            except Exception as e:
-                logging.error(f"删除单词对象失败: {word.id}, 错误信息: {e}")
-                raise  # 重新抛出异常以触发事务回滚
-
-            # 如果所有数据库操作成功，则删除文件
-            for audio_file in audio_files:
-                if audio_file.file_path:
-                    file_path = os.path.normpath(os.path.join(settings.MEDIA_ROOT, audio_file.file_path))
-                    if os.path.exists(file_path) and str(file_path).startswith(str(settings.MEDIA_ROOT)):
-                        try:
-                            os.remove(file_path)
-                            logging.info(f"已删除音频文件: {file_path}")
-                        except OSError as e:
-                            logging.error(f"删除音频文件失败: {file_path}, 错误信息: {e}")
-
+        word = get_object_or_404(Word, id=word_id)
+        # 复用批量删除逻辑：集合删除关联数据，音频文件交给后台清理队列
+        bulk_delete_words(word_ids=[word.id])
     except Exception as e:
         logging.error(f"删除单词过程中发生错误: {e}")
-        return redirect('word_list')
 
     return redirect('word_list')
+
+
+@login_required
+@require_http_methods(["POST"])
+def delete_words(request):
+    """
+    批量删除单词
+
+    请求体为 JSON，支持两种方式：
+    - {"ids": [1, 2, 3]}：按 ID 删除
+    - {"filter": {"rating": 0, "keyword": "ab"}}：按难度评分 / 单词包含的文本删除，至少指定一个条件
+
+    单词为全体用户共享，只允许管理员调用。
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if ids is not None:
+        # bool 是 int 的子类，需要单独排除
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return JsonResponse({'success': False, 'error': 'ids must be a list of integers'}, status=400)
+        deleted = bulk_delete_words(word_ids=ids)
+    elif isinstance(filters, dict):
+        # 没有可识别的条件时拒绝，避免删除全部单词
+        if 'rating' not in filters and not filters.get('keyword'):
+            return JsonResponse({'success': False, 'error': 'filter requires rating or keyword'}, status=400)
+        rating, keyword = filters.get('rating'), filters.get('keyword')
+        if 'rating' in filters and (not isinstance(rating, int) or isinstance(rating, bool)):
+            return JsonResponse({'success': False, 'error': 'rating must be an integer'}, status=400)
+        if keyword and not isinstance(keyword, str):
+            return JsonResponse({'success': False, 'error': 'keyword must be a string'}, status=400)
+        queryset = Word.objects.all()
+        if 'rating' in filters:
+            queryset = queryset.filter(rating=rating)
+        if keyword:
+            queryset = queryset.filter(word__icontains=keyword)
+        deleted = bulk_delete_words(queryset=queryset)
+    else:
+        return JsonResponse({'success': False, 'error': 'ids or filter is required'}, status=400)
+
+    return JsonResponse({'success': True, 'deleted': deleted})
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Prometheus 指标（当前进程）
+
+    配置了 METRICS_TOKEN 时要求 Authorization: Bearer <token>，否则只允许管理员访问。
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        allowed = request.headers.get('Authorization', '') == f'Bearer {token}'
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics_registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@login_required
+@require_http_methods(["GET"])
+def review_forecast(request):
+    """
+    未来若干天（?days=，默认 30，最多 365）每天到期的复习单词数
+
+    读取按天汇总的 ReviewForecast，耗时与词汇量无关；管理员可以用 ?user=<用户名> 查看其他用户。
+    """
+    try:
+        days = int(request.GET.get('days', DEFAULT_FORECAST_DAYS))
+    except ValueError:
+        return JsonResponse({'error': 'days 必须是整数'}, status=400)
+    if not 1 <= days <= MAX_FORECAST_DAYS:
+        return JsonResponse({'error': f'days 的范围是 1 到 {MAX_FORECAST_DAYS}'}, status=400)
+
+    user = request.user
+    username = request.GET.get('user')
+    if username and username != user.get_username():
+        if not user.is_staff:
+            return JsonResponse({'error': '无权查看其他用户'}, status=403)
+        user = get_object_or_404(User, username=username)
+
+    result = forecast(user, days)
+    return JsonResponse({
+        'user': user.get_username(),
+        'overdue': result['overdue'],
+        'days': [{'date': item['date'].isoformat(), 'due': item['due']} for item in result['days']],
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+def stats_dashboard(request):
+    """学习统计页：正确率曲线和学习热力图，只读取一年内的 DailyStats 汇总行"""
+    today = timezone.localdate()
+    rows = list(
+        DailyStats.objects.filter(user=request.user, day__gt=today - timedelta(days=HEATMAP_DAYS)).order_by('day')
+    )
+    reviews_by_day = {row.day: row.reviews for row in rows}
+
+    series = retention_series(rows, today)
+    chart_width, chart_height = 600, 160
+    reviews = sum(row.reviews for row in rows)
+    context = {
+        'totals': {
+            'reviews': reviews,
+            'accuracy': round(100 * sum(row.correct for row in rows) / reviews) if reviews else 0,
+            'new_words': sum(row.new_words for row in rows),
+            'mastered': sum(row.mastered for row in rows),
+            'minutes': sum(row.time_spent for row in rows) // 60,
+        },
+        'streak': current_streak(reviews_by_day, today),
+        'weeks': heatmap_weeks(reviews_by_day, today),
+        'chart': {
+            'width': chart_width,
+            'height': chart_height,
+            'daily': svg_points([point['accuracy'] for point in series], chart_width, chart_height),
+            'rolling': svg_points([point['rolling'] for point in series], chart_width, chart_height),
+            'start': series[0]['date'],
+            'end': today,
+        },
+    }
+    return render(request, 'learning/stats.html', context)
+
+
+@staff_member_required
+def profile_list(request):
+    """已保存的请求采样分析结果（管理员可见）"""
+    profiles = list_profiles()
+    for meta in profiles:
+        meta['started'] = datetime.fromtimestamp(meta.get('started_at', 0), tz=timezone.get_current_timezone())
+    return render(request, 'learning/profiles.html', {'profiles': profiles})
+
+
+@staff_member_required
+def profile_download(request, name):
+    """下载折叠栈文件，可直接交给 flamegraph.pl / speedscope 生成火焰图"""
+    path = profile_path(name)
+    if path is None:
+        raise Http404("分析结果不存在")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{name}.folded',
+                        content_type='text/plain; charset=utf-8')